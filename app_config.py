@@ -0,0 +1,90 @@
+import json
+import os
+import sys
+
+CONFIG_FILE = "config.json"
+
+DEFAULTS = {
+    "log_level": "INFO",
+    "log_file": "scraper.log",
+    "log_rate_limit_seconds": 5.0,
+    "log_error_rate_limit_seconds": 1.0,
+    "session_db": "sessions.db",
+    "columnar_export": True,
+    "export_dir": "exports",
+    "columnar_export_dir": "matches",
+    "columnar_flush_seconds": 30.0,
+    "ocr_backend": "paddle",
+    "ocr_threads": 8,
+    "onnx_model_dir": "models/onnx",
+    "onnx_inter_op_threads": 1,
+    "ocr_tiling": True,
+    "ocr_tile_size": 1280,
+    "ocr_tile_overlap": 96,
+    "ocr_tile_workers": None,
+    "ocr_tile_memory_mb": 1024,
+    "ocr_rec_int8": False,
+    "int8_max_accuracy_drop": 0.005,
+    "record_crops": False,
+    "crop_dir": "crops",
+    "record_crops_max": 5000,
+    "memory_caps_mb": {"pipeline": 512, "orphans": 32, "preview": 16, "capture": 64},
+    "memory_report_seconds": 300,
+    "profile_seconds": 30,
+    "profile_interval_ms": 10,
+    "profile_dir": "profiles",
+    "ocr_confidence_threshold": 0.9,
+    "llm_confidence_threshold": 0.6,
+    "glyph_recognizer": True,
+    "glyph_confidence_threshold": 0.9,
+    "llm_base_url": "https://api.openai.com/v1",
+    "llm_model": "gpt-4o-mini",
+    "llm_cache": "llm_cache.json",
+    "llm_batch_size": 8,
+    "llm_max_concurrency": 2,
+    "llm_timeout_seconds": 30.0,
+}
+
+_config = None
+
+
+def app_dir():
+    if getattr(sys, "frozen", False):
+        return os.path.dirname(sys.executable)
+    return os.path.dirname(os.path.abspath(__file__))
+
+
+def app_path(name):
+    if os.path.isabs(name):
+        return name
+    return os.path.join(app_dir(), name)
+
+
+def load_config(path=None):
+    global _config
+    config = dict(DEFAULTS)
+    path = path or app_path(CONFIG_FILE)
+    if os.path.exists(path):
+        try:
+            with open(path, "r", encoding="utf-8") as file:
+                config.update(json.load(file))
+        except Exception as e:
+            if sys.stderr is not None:
+                sys.stderr.write(f"Config load error: {e}\n")
+    _config = config
+    return config
+
+
+def get_config():
+    if _config is None:
+        return load_config()
+    return _config
+
+
+def get(key, default=None):
+    return get_config().get(key, default)
+
+
+def export_path(*names):
+    # every export (CSV/XLSX, per-match columnar files, profiles) goes under one root
+    return os.path.join(app_path(get("export_dir", "exports")), *names)
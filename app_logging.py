@@ -0,0 +1,135 @@
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+import time
+
+import app_config
+
+ROOT_LOGGER = "makcolik"
+LOG_FORMAT = "%(asctime)s %(levelname)-7s [%(threadName)s] %(name)s: %(message)s"
+
+_listener = None
+_queue_handler = None
+
+
+class RateLimitFilter(logging.Filter):
+    def __init__(self, interval=5.0, error_interval=1.0, max_keys=1024):
+        super().__init__()
+        self.interval = interval
+        # warnings and errors are throttled too, over a shorter window so a new failure still shows up quickly
+        self.error_interval = error_interval
+        self.max_keys = max_keys
+        self._last = {}
+        self._suppressed = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        severe = record.levelno >= logging.WARNING
+        interval = self.error_interval if severe else self.interval
+        if interval <= 0:
+            return True
+
+        # a template with args identifies its call site without formatting; a message without args may be
+        # an f-string that differs every time, so below WARNING only an explicit key throttles it
+        key = getattr(record, "key", None) or (record.msg if record.args or severe else None)
+        if key is None:
+            return True
+        now = time.monotonic()
+        with self._lock:
+            last = self._last.get(key)
+            if last is not None and now - last < interval:
+                self._suppressed[key] = self._suppressed.get(key, 0) + 1
+                return False
+            if last is None and len(self._last) >= self.max_keys:
+                self._prune(now)
+            self._last[key] = now
+            suppressed = self._suppressed.pop(key, 0)
+
+        if suppressed:
+            record.msg = f"{record.msg} [{suppressed} similar suppressed]"
+        return True
+
+    def _prune(self, now):
+        # keys past the interval no longer throttle anything; if all are recent the oldest go first
+        window = max(self.interval, self.error_interval)
+        for key in [key for key, last in self._last.items() if now - last >= window]:
+            del self._last[key]
+            self._suppressed.pop(key, None)
+        while len(self._last) >= self.max_keys:
+            key = next(iter(self._last))
+            del self._last[key]
+            self._suppressed.pop(key, None)
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # records stay in-process, so formatting is left to the listener thread
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def setup_logging(level=None, log_file=None, rate_limit=None, queue_size=10000):
+    global _listener, _queue_handler
+    if _listener is not None:
+        return logging.getLogger(ROOT_LOGGER)
+
+    level = level or app_config.get("log_level", "INFO")
+    log_file = log_file or app_config.get("log_file")
+    if rate_limit is None:
+        rate_limit = app_config.get("log_rate_limit_seconds", 5.0)
+    error_rate_limit = app_config.get("log_error_rate_limit_seconds", 1.0)
+
+    formatter = logging.Formatter(LOG_FORMAT)
+    handlers = []
+    if log_file:
+        try:
+            file_handler = logging.handlers.RotatingFileHandler(
+                app_config.app_path(log_file), maxBytes=5 * 1024 * 1024, backupCount=3, encoding="utf-8"
+            )
+            file_handler.setFormatter(formatter)
+            handlers.append(file_handler)
+        except OSError:
+            pass
+    # --noconsole builds have no stderr at all
+    if sys.stderr is not None:
+        stream_handler = logging.StreamHandler(sys.stderr)
+        stream_handler.setFormatter(formatter)
+        handlers.append(stream_handler)
+
+    log_queue = queue.Queue(maxsize=queue_size)
+    _queue_handler = NonBlockingQueueHandler(log_queue)
+    _queue_handler.addFilter(RateLimitFilter(rate_limit, error_rate_limit))
+
+    logger = logging.getLogger(ROOT_LOGGER)
+    logger.setLevel(level if isinstance(level, int) else str(level).upper())
+    logger.addHandler(_queue_handler)
+    logger.propagate = False
+
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    return logger
+
+
+def shutdown_logging():
+    global _listener, _queue_handler
+    if _listener is None:
+        return
+    _listener.stop()
+    logging.getLogger(ROOT_LOGGER).removeHandler(_queue_handler)
+    _listener = None
+    _queue_handler = None
+
+
+def get_logger(name):
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
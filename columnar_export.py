@@ -0,0 +1,171 @@
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from app_logging import get_logger
+
+pa = None
+pq = None
+
+log = get_logger("columnar_export")
+
+META_FIELDS = ("session_id", "teams", "score_text", "full_time_score", "first_half_score", "started_at", "completed_at")
+
+
+def import_pyarrow():
+    # pyarrow takes a noticeable part of startup, so the writer thread imports it
+    global pa, pq
+    if pa is None:
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            return False
+        pa, pq = pyarrow, pyarrow.parquet
+    return True
+
+
+def build_schema(catalog):
+    fields = [
+        pa.field("session_id", pa.int64()),
+        pa.field("teams", pa.string()),
+        pa.field("score_text", pa.string()),
+        pa.field("full_time_score", pa.string()),
+        pa.field("first_half_score", pa.string()),
+        pa.field("started_at", pa.timestamp("ms")),
+        pa.field("completed_at", pa.timestamp("ms")),
+    ]
+    fields.extend(pa.field(name, pa.float64()) for name in catalog.column_names)
+    return pa.schema(fields)
+
+
+class ColumnarExporter:
+    def __init__(self, store, catalog, root_dir, flush_interval=30.0, batch_size=100):
+        self.store = store
+        self.catalog = catalog
+        self.root_dir = root_dir
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._queue = queue.Queue()
+        self._rows = []
+        # sessions waiting in _rows, so a second submit before the write does not add the match twice
+        self._pending = set()
+        self._schema = None
+        self._sequence = 0
+        self.exported = 0
+        self.available = True
+        self._thread = threading.Thread(target=self._run, name="ColumnarExporter", daemon=True)
+        self._thread.start()
+
+    def submit(self, session_id):
+        if self.available and session_id is not None:
+            self._queue.put(("match", session_id))
+
+    def set_catalog(self, catalog):
+        if self.available:
+            self._queue.put(("catalog", catalog))
+
+    def flush(self, timeout=10.0):
+        if not self.available:
+            return True
+        event = threading.Event()
+        self._queue.put(("flush", event))
+        return event.wait(timeout)
+
+    def close(self, timeout=10.0):
+        if self._thread is None:
+            return
+        self._queue.put(("stop", None))
+        self._thread.join(timeout)
+        self._thread = None
+
+    def _run(self):
+        if not import_pyarrow():
+            self.available = False
+            log.warning("pyarrow is not installed, columnar export is disabled")
+            return
+        self._schema = build_schema(self.catalog)
+
+        next_flush = time.monotonic() + self.flush_interval
+        while True:
+            try:
+                kind, payload = self._queue.get(timeout=max(0.0, next_flush - time.monotonic()))
+            except queue.Empty:
+                kind, payload = "tick", None
+
+            try:
+                if kind == "match":
+                    row = self._build_row(payload)
+                    if row is not None:
+                        self._rows.append(row)
+                elif kind == "catalog":
+                    self._write()
+                    self.catalog = payload
+                    self._schema = build_schema(payload)
+                elif kind == "flush":
+                    self._write()
+                    payload.set()
+                elif kind == "stop":
+                    self._write()
+                    return
+            except Exception as e:
+                log.exception("Columnar export error: %s", e)
+
+            if len(self._rows) >= self.batch_size or time.monotonic() >= next_flush:
+                try:
+                    self._write()
+                except Exception as e:
+                    log.exception("Columnar export write error: %s", e)
+                next_flush = time.monotonic() + self.flush_interval
+
+    def _build_row(self, session_id):
+        self.store.flush()
+        session = self.store.session(session_id)
+        # a session restored at start-up is completed again on close; it is already in the dataset
+        if session is None or session["exported_at"] is not None or session_id in self._pending:
+            return None
+        records = self.store.session_records(session_id)
+        if not records:
+            return None
+        self._pending.add(session_id)
+
+        completed_at = session["updated_at"] or time.time()
+        meta = [
+            session_id,
+            session["teams"],
+            session["score_text"],
+            session["full_time_score"],
+            session["first_half_score"],
+            datetime.fromtimestamp(session["started_at"]),
+            datetime.fromtimestamp(completed_at),
+        ]
+        values = self.catalog.fill_values([None] * len(self.catalog.column_names), records)
+        return meta + values
+
+    def _write(self):
+        if not self._rows:
+            return
+
+        rows, self._rows = self._rows, []
+        self._pending.clear()
+        completed_index = META_FIELDS.index("completed_at")
+        by_day = {}
+        for row in rows:
+            by_day.setdefault(row[completed_index].strftime("%Y-%m-%d"), []).append(row)
+
+        for day, day_rows in by_day.items():
+            columns = list(zip(*day_rows))
+            arrays = [pa.array(column, type=field.type) for column, field in zip(columns, self._schema)]
+            table = pa.Table.from_arrays(arrays, schema=self._schema)
+
+            # hive-style partition per completion day, one file per flush
+            partition = os.path.join(self.root_dir, f"date={day}")
+            os.makedirs(partition, exist_ok=True)
+            self._sequence += 1
+            name = f"part-{datetime.now().strftime('%H%M%S')}-{os.getpid()}-{self._sequence:05d}.parquet"
+            path = os.path.join(partition, name)
+            pq.write_table(table, path)
+            self.store.mark_exported([row[0] for row in day_rows])
+            self.exported += len(day_rows)
+            log.info("Exported %d matches to %s", len(day_rows), path)
@@ -0,0 +1,61 @@
+import hashlib
+import json
+import os
+import threading
+import cv2
+from app_logging import get_logger
+
+log = get_logger("crop_recorder")
+
+LABELS_FILE = "labels.jsonl"
+
+
+class CropRecorder:
+    # keeps odds cell crops with the PaddleOCR read, for benchmarks, calibration and tuning
+    def __init__(self, root_dir, max_crops=5000, min_confidence=0.9):
+        self.root_dir = root_dir
+        self.max_crops = max_crops
+        self.min_confidence = min_confidence
+        self._lock = threading.Lock()
+        os.makedirs(os.path.join(root_dir, "cells"), exist_ok=True)
+        self._labels_path = os.path.join(root_dir, LABELS_FILE)
+        self._seen = {entry["file"] for entry in load_labels(root_dir)}
+
+    def __len__(self):
+        return len(self._seen)
+
+    def record(self, image, texts, confidence):
+        if confidence < self.min_confidence or image is None or image.size == 0:
+            return False
+        name = os.path.join("cells", hashlib.sha1(image.tobytes()).hexdigest()[:16] + ".png")
+        with self._lock:
+            if len(self._seen) >= self.max_crops or name in self._seen:
+                return False
+            self._seen.add(name)
+            try:
+                cv2.imwrite(os.path.join(self.root_dir, name), image)
+                with open(self._labels_path, "a", encoding="utf-8") as file:
+                    file.write(json.dumps({"file": name, "texts": list(texts), "confidence": round(confidence, 4)},
+                                          ensure_ascii=False) + "\n")
+            except Exception as e:
+                log.error("Crop record error: %s", e)
+                return False
+        return True
+
+
+def load_labels(root_dir):
+    path = os.path.join(root_dir, LABELS_FILE)
+    if not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8") as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+
+def load_crops(root_dir, limit=None):
+    # [(image, texts)], texts being [option, value] as PaddleOCR (or a later manual fix) read them
+    crops = []
+    for entry in load_labels(root_dir)[:limit]:
+        image = cv2.imread(os.path.join(root_dir, entry["file"]))
+        if image is not None:
+            crops.append((image, entry["texts"]))
+    return crops
@@ -1,12 +1,123 @@
 import cv2
 import numpy as np
+from collections import OrderedDict
+from app_logging import get_logger
+
+log = get_logger("detect_block")
+
+class OddsLayoutCache:
+    def __init__(self, max_entries=256, size_step=4, min_fill=0.85, max_outside_drift=0.05):
+        self.max_entries = max_entries
+        self.size_step = size_step
+        self.min_fill = min_fill
+        self.max_outside_drift = max_outside_drift
+        self._layouts = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.rejects = 0
+
+    def make_key(self, layout_key, width, height):
+        return (layout_key, width // self.size_step, height // self.size_step)
+
+    def get(self, key):
+        layout = self._layouts.get(key)
+        if layout is not None:
+            self._layouts.move_to_end(key)
+        return layout
+
+    def put(self, key, rects, width, height, thresh, x_start):
+        if not rects:
+            return
+        relative = [(x / width, y / height, w / width, h / height) for x, y, w, h in rects]
+        outside_ratio = self._outside_ratio(thresh, rects, x_start)
+        self._layouts[key] = (relative, outside_ratio)
+        self._layouts.move_to_end(key)
+        while len(self._layouts) > self.max_entries:
+            self._layouts.popitem(last=False)
+
+    def invalidate(self, key):
+        self._layouts.pop(key, None)
+
+    def clear(self):
+        self._layouts.clear()
+
+    def resolve(self, layout, width, height):
+        relative, _ = layout
+        rects = []
+        for fx, fy, fw, fh in relative:
+            x = int(round(fx * width))
+            y = int(round(fy * height))
+            w = max(1, min(int(round(fw * width)), width - x))
+            h = max(1, min(int(round(fh * height)), height - y))
+            rects.append((x, y, w, h))
+        return rects
+
+    def validate(self, layout, rects, thresh, x_start):
+        _, expected_outside = layout
+        for x, y, w, h in rects:
+            cell = thresh[y:y + h, x - x_start:x - x_start + w]
+            if cell.size == 0 or cv2.countNonZero(cell) < self.min_fill * cell.size:
+                return False
+        outside = self._outside_ratio(thresh, rects, x_start)
+        return abs(outside - expected_outside) <= self.max_outside_drift
+
+    def _outside_ratio(self, thresh, rects, x_start):
+        total = cv2.countNonZero(thresh)
+        inside = 0
+        for x, y, w, h in rects:
+            inside += cv2.countNonZero(thresh[y:y + h, x - x_start:x - x_start + w])
+        return (total - inside) / float(max(1, thresh.size))
+
+
+def _runs(mask, min_length):
+    edges = np.diff(np.concatenate(([0], mask.view(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    keep = (ends - starts) >= min_length
+    return starts[keep], ends[keep]
+
+
+def segment_odds_grid(thresh, min_cell_width=20, min_cell_height=15, min_area=50 * 30,
+                      row_fill=0.05, col_fill=0.5):
+    if thresh is None or thresh.size == 0:
+        return []
+
+    foreground = thresh > 0
+    row_profile = np.count_nonzero(foreground, axis=1)
+    row_starts, row_ends = _runs(row_profile >= row_fill * thresh.shape[1], min_cell_height)
+
+    grid = []
+    for y0, y1 in zip(row_starts, row_ends):
+        band = foreground[y0:y1]
+        col_profile = np.count_nonzero(band, axis=0)
+        col_starts, col_ends = _runs(col_profile >= col_fill * (y1 - y0), min_cell_width)
+        if len(col_starts) == 0:
+            continue
+
+        cells = np.empty((len(col_starts), 4), dtype=np.int32)
+        count = 0
+        for x0, x1 in zip(col_starts, col_ends):
+            filled = np.flatnonzero(band[:, x0:x1].any(axis=1))
+            cy0 = y0 + filled[0]
+            cy1 = y0 + filled[-1] + 1
+            if (x1 - x0) * (cy1 - cy0) < min_area:
+                continue
+            cells[count] = (x0, cy0, x1 - x0, cy1 - cy0)
+            count += 1
+        if count:
+            grid.append(cells[:count])
+
+    return grid
+
 
 class BlockDetector:
-    def __init__(self, min_area=10000, logo_hist=None, logo_size=None):
+    def __init__(self, min_area=10000, logo_hist=None, logo_size=None, segmenter="projection"):
         self.min_area = min_area
         self.logo_hist = logo_hist
         self.logo_size = logo_size
+        self.segmenter = segmenter
         self.thresh = None
+        self.layout_cache = OddsLayoutCache()
 
     def detect_rectangles(self, image):
         if image is None or image.size == 0:
@@ -109,14 +220,10 @@ class BlockDetector:
             block_crop = image[y:y + h, x:x + w]
             has_logo, score = self.check_logo_in_block(block_crop)
 
+            # only the block outline: segmenting its cells here would run on every frame, ahead of the layout cache
             if has_logo:                
                 color = (0, 0, 255)
                 detected.append(rect)
-                odds_blocks = self.detect_odds_blocks(block_crop)
-                for odds_block in odds_blocks:
-                    tx, ty, tw, th = odds_block['coordinates']
-                    cv2.rectangle(result_image, (x + tx, y + ty), (x + tx + tw, y + ty + th), (255, 0, 0), 3)
-                    
             else:
                 color = (0, 255, 0)
 
@@ -131,21 +238,71 @@ class BlockDetector:
 
         return result_image, detected
 
-    def detect_odds_blocks(self, image):
-        if image is None or image.size == 0:
-            return []
-            
-        odds_blocks = []
+    def _odds_threshold(self, image):
         h, w = image.shape[:2]
         x_start = int(w * 0.4)
-        
+
         if x_start >= w:
-            return []
-            
+            return x_start, None
+
         cropped = image[:, x_start:w]
         gray = cv2.cvtColor(cropped, cv2.COLOR_BGR2GRAY)
         _, thresh = cv2.threshold(gray, 250, 255, cv2.THRESH_BINARY_INV)
+        return x_start, thresh
+
+    def threshold_odds(self, image):
+        # done ahead of OCR; segmentation waits until the header is known and the layout cache has missed
+        if image is None or image.size == 0:
+            return None
+        x_start, thresh = self._odds_threshold(image)
+        if thresh is None:
+            return None
+        return x_start, thresh
 
+    def detect_odds_blocks(self, image, layout_key=None, thresholded=None):
+        if image is None or image.size == 0:
+            return []
+
+        h, w = image.shape[:2]
+        if thresholded is not None:
+            x_start, thresh = thresholded
+        else:
+            x_start, thresh = self._odds_threshold(image)
+        if thresh is None:
+            return []
+
+        cache_key = None
+        if layout_key is not None:
+            cache_key = self.layout_cache.make_key(layout_key, w, h)
+            layout = self.layout_cache.get(cache_key)
+            if layout is not None:
+                rects = self.layout_cache.resolve(layout, w, h)
+                if self.layout_cache.validate(layout, rects, thresh, x_start):
+                    self.layout_cache.hits += 1
+                    return [{'coordinates': rect, 'area': rect[2] * rect[3]} for rect in rects]
+                self.layout_cache.rejects += 1
+                self.layout_cache.invalidate(cache_key)
+            else:
+                self.layout_cache.misses += 1
+
+        odds_blocks = self._segment(thresh, x_start)
+
+        if cache_key is not None:
+            self.layout_cache.put(cache_key, [b['coordinates'] for b in odds_blocks], w, h, thresh, x_start)
+
+        return odds_blocks
+
+    def _segment(self, thresh, x_start):
+        if self.segmenter == "contour":
+            return self._segment_by_contours(thresh, x_start)
+        return [
+            {'coordinates': (x_start + int(x), int(y), int(cw), int(ch)), 'area': int(cw) * int(ch)}
+            for row in segment_odds_grid(thresh)
+            for x, y, cw, ch in row
+        ]
+
+    def _segment_by_contours(self, thresh, x_start):
+        odds_blocks = []
         contours, _ = cv2.findContours(thresh, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
 
         for contour in contours:
@@ -160,6 +317,6 @@ class BlockDetector:
                 })
         
         odds_blocks.reverse()
-        print(f"Detected {len(odds_blocks)} odds blocks.")
+        log.debug("Detected %d odds blocks.", len(odds_blocks))
 
-        return odds_blocks
\ No newline at end of file
+        return odds_blocks
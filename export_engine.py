@@ -0,0 +1,98 @@
+import csv
+import os
+import re
+import threading
+from app_logging import get_logger
+from odds_record import format_value
+
+log = get_logger("export_engine")
+
+FIXED_HEADERS = ['Takımlar', 'İlk Yarı Skoru', 'Mac Sonucu Skoru']
+
+
+def safe_filename(name, extension):
+    return re.sub(r'[\\/:"*?<>|]+', '_', name) + extension
+
+
+def build_header(catalog):
+    return FIXED_HEADERS + catalog.column_names
+
+
+def build_rows(store, catalog, session_ids):
+    store.flush()
+    width = len(catalog.column_names)
+    rows = []
+    for session_id in session_ids:
+        session = store.session(session_id)
+        records = store.session_records(session_id)
+        if session is None or not records:
+            continue
+        values = catalog.fill_values([None] * width, records)
+        rows.append(
+            [session["teams"], session["first_half_score"] or "-", session["full_time_score"] or "-"]
+            + [format_value(value) if value is not None else "-" for value in values]
+        )
+    return rows
+
+
+def write_csv(path, header, rows):
+    with open(path, "w", newline="", encoding="utf-8-sig") as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(header)
+        writer.writerows(rows)
+
+
+def write_excel(path, header, rows):
+    import openpyxl
+
+    wb = openpyxl.Workbook(write_only=True)
+    sheet = wb.create_sheet(title="Exported Data")
+    sheet.append(header)
+    for row in rows:
+        sheet.append(row)
+    wb.save(path)
+
+
+WRITERS = {
+    ".csv": write_csv,
+    ".xlsx": write_excel,
+}
+
+
+class ExportEngine:
+    def __init__(self, store, dispatch=None):
+        self.store = store
+        self.dispatch = dispatch or (lambda fn: fn())
+        self._lock = threading.Lock()
+
+    def export(self, path, catalog, session_ids=(), since=None, on_done=None):
+        writer = WRITERS[path[path.rfind("."):].lower()]
+        thread = threading.Thread(
+            target=self._run, args=(writer, path, catalog, list(session_ids), since, on_done),
+            name="ExportEngine", daemon=True
+        )
+        thread.start()
+        return thread
+
+    def _run(self, writer, path, catalog, session_ids, since, on_done):
+        error = None
+        count = 0
+        try:
+            with self._lock:
+                os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+                self.store.flush()
+                if since is not None:
+                    session_ids = self.store.session_ids_since(since) + [
+                        session_id for session_id in session_ids if session_id is not None
+                    ]
+                    session_ids = list(dict.fromkeys(session_ids))
+                rows = build_rows(self.store, catalog, session_ids)
+                writer(path, build_header(catalog), rows)
+                count = len(rows)
+            log.info("Exported %d matches to %s", count, path)
+        except Exception as e:
+            log.exception("Export error: %s", e)
+            error = e
+
+        if on_done is not None:
+            self.dispatch(lambda: on_done(path, count, error))
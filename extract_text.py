@@ -1,149 +1,143 @@
-from paddleocr import PaddleOCR, draw_ocr
 import re
-import cv2
-import random
 import threading
-from PIL import Image
+import time
+import cv2
+import numpy as np
+import app_config
+import ocr_backend
+from app_logging import get_logger
+from tiled_ocr import TiledReader
+
+log = get_logger("extract_text")
 
 pattern = re.compile(r'^\d+\.\d{2}$')
 _ocr_instance = None
 _ocr_lock = threading.Lock()
+_tiled_reader = None
+
+def create_ocr(**overrides):
+    try:
+        return ocr_backend.create_ocr(**overrides)
+    except Exception as e:
+        if app_config.get("ocr_backend", "paddle") == "paddle":
+            raise
+        log.error("OCR backend %s failed, falling back to paddle: %s", app_config.get("ocr_backend"), e)
+        return ocr_backend.create_ocr("paddle", **overrides)
 
 def get_ocr():
     global _ocr_instance
     with _ocr_lock:
         if _ocr_instance is None:
-            _ocr_instance = PaddleOCR(
-                use_angle_cls=True, 
-                lang='tr', 
-                show_log=False, 
-                cpu_threads=8,
-                enable_mkldnn=True,
-                det_db_score_mode="slow",
-                det_limit_side_len=5880,
-                det_db_box_thresh=0.1,
-                det_db_thresh=0.1,
-                rec_batch_num=16,
-                det_db_unclip_ratio=2,
-                max_text_length=200,
-                drop_score=0.1,
-            )
+            _ocr_instance = create_ocr()
     return _ocr_instance
 
+def get_tiled_reader():
+    # tall captures are read in overlapping tiles on extra instances instead of one huge detector pass
+    global _tiled_reader
+    if not app_config.get("ocr_tiling", True):
+        return None
+    with _ocr_lock:
+        if _tiled_reader is None:
+            tile_size = app_config.get("ocr_tile_size", 1280)
+            workers = app_config.get("ocr_tile_workers") or ocr_backend.load_profile().get("workers", 2)
+            _tiled_reader = TiledReader(
+                lambda: create_ocr(det_limit_side_len=tile_size),
+                tile_size=tile_size,
+                overlap=app_config.get("ocr_tile_overlap", 96),
+                workers=workers,
+                memory_mb=app_config.get("ocr_tile_memory_mb", 1024),
+            )
+    return _tiled_reader
+
+def is_ready():
+    return _ocr_instance is not None
+
+def warm_up():
+    # loads the models and runs one inference so the first captured frame does not pay for it
+    started = time.perf_counter()
+    ocr = get_ocr()
+    image = np.full((48, 160, 3), 255, np.uint8)
+    cv2.putText(image, "1.85", (20, 34), cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 0, 0), 2)
+    ocr.ocr(image)
+    return time.perf_counter() - started
+
+def read_words(image, ocr=None):
+    # (text, score) for every recognised word, in PaddleOCR reading order
+    if ocr is None:
+        tiled = get_tiled_reader()
+        if tiled is not None and tiled.needs_tiling(image):
+            return tiled.read(image, get_ocr())
+    result = (ocr or get_ocr()).ocr(image)
+    words = []
+    if not result or not result[0]:
+        return words
+    for line in result:
+        if not line:
+            continue
+        for word_info in line:
+            if len(word_info) >= 2 and word_info[1] and len(word_info[1]) >= 1:
+                score = word_info[1][1] if len(word_info[1]) >= 2 else 0.0
+                words.append((word_info[1][0], float(score)))
+    return words
+
+def _min_confidence(words):
+    return min((score for _, score in words), default=0.0)
+
 def extract_team_name(image):
     if image is None or image.size == 0:
-        return [], ""
+        return [], []
         
     try:
-        ocr = get_ocr()
-        result = ocr.ocr(image)
-        
-        if not result or not result[0]:
-            return [], ""
-            
-        texts = []
-        
-        for line in result:
-            if not line:
-                continue
-            for word_info in line:
-                if word_info[1] and len(word_info[1]) >= 1:
-                    text = word_info[1][0]
-                    texts.append(text)
-
-        return texts
+        words = read_words(image)
+        return [text for text, _ in words], [score for _, score in words]
     except Exception as e:
-        print(f"Extract team name error: {e}")
-        return [], ""
+        log.error("Extract team name error: %s", e)
+        return [], []
 
 def extract_score_data(score_image):
     if score_image is None or score_image.size == 0:
-        return ""
+        return "", 0.0
         
     try:
-        ocr = get_ocr()
-        result = ocr.ocr(score_image)
-
-        if not result or not result[0]:
-            return ""
-
-        texts = []
-        for line in result[0]:
-            if not line:
-                continue
-            if len(line) >= 2 and line[1] and len(line[1]) >= 1:
-                text = line[1][0] 
-                texts.append(text)
-
-        return "".join(texts)
+        words = read_words(score_image)
+        return "".join(text for text, _ in words), _min_confidence(words)
     except Exception as e:
-        print(f"Extract score data error: {e}")
-        return ""
+        log.error("Extract score data error: %s", e)
+        return "", 0.0
     
 def extract_block_data(block_image):
     if block_image is None or block_image.size == 0:
-        return ""
+        return "", 0.0
         
     try:
-        ocr = get_ocr()
-        result = ocr.ocr(block_image)
-        
-        if not result or not result[0]:
-            return ""
-            
-        texts = []
-        for line in result:
-            if not line:
-                continue
-            for word_info in line:
-                if len(word_info) >= 2 and word_info[1] and len(word_info[1]) >= 1:
-                    text = word_info[1][0] 
-                    texts.append(text)
-        
-        return "".join(texts)
+        words = read_words(block_image)
+        return "".join(text for text, _ in words), _min_confidence(words)
     except Exception as e:
-        print(f"Extract block data error: {e}")
-        return ""
+        log.error("Extract block data error: %s", e)
+        return "", 0.0
 
-def get_odds_data(odds_block):
+def get_odds_data(odds_block, ocr=None):
+    # ([option, value], [option_score, value_score]); a '-' placeholder scores 0
     if odds_block is None or odds_block.size == 0:
-        return ['-', '-']
+        return ['-', '-'], [0.0, 0.0]
         
     try:
-        ocr = get_ocr()
-        result = ocr.ocr(odds_block)
-        
-        if not result or not result[0]:
-            num = random.randint(100000, 999999)
-            # cv2.imwrite(f"{num}.png", odds_block)
-            return ['-', '-']
-            
-        texts = []
-        for line in result:
-            if not line:
-                continue
-            for word in line:
-                if len(word) >= 2 and word[1] and len(word[1]) >= 1:
-                    text = word[1][0] if word[1][0] else '-'
-                    texts.append(text)
+        words = [(text or '-', score) for text, score in read_words(odds_block, ocr)]
         
-        if len(texts) == 0:
-            num = random.randint(100000, 999999)
-            # cv2.imwrite(f"{num}.png", odds_block)
-            return ['-', '-']
-        elif len(texts) == 1:
-            if pattern.match(texts[0]):
-                num = random.randint(100000, 999999)
-                # cv2.imwrite(f"{num}.png", odds_block)
-                return ['-', texts[0]]
+        if len(words) == 0:
+            return ['-', '-'], [0.0, 0.0]
+        elif len(words) == 1:
+            text, score = words[0]
+            if pattern.match(text):
+                return ['-', text], [0.0, score]
             else:
-                return [texts[0], '-']
+                return [text, '-'], [score, 0.0]
         else:
-            if len(texts) > 1 and pattern.match(texts[1]):
-                return texts[:2]
+            if pattern.match(words[1][0]):
+                return [words[0][0], words[1][0]], [words[0][1], words[1][1]]
             else:
-                return [texts[0], '-']
+                return [words[0][0], '-'], [words[0][1], 0.0]
                 
     except Exception as e:
-        print(f"Get odds data error: {e}")
-        return ['-', '-']
\ No newline at end of file
+        log.error("Get odds data error: %s", e)
+        return ['-', '-'], [0.0, 0.0]
@@ -0,0 +1,152 @@
+import queue
+import threading
+import time
+from app_logging import get_logger
+
+log = get_logger("frame_pipeline")
+
+_STOP = object()
+
+
+class StageStats:
+    def __init__(self, name):
+        self.name = name
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.started = time.perf_counter()
+            self.busy = 0.0
+            self.items = 0
+            self.dropped = 0
+
+    def add(self, seconds, items=1):
+        with self._lock:
+            self.busy += seconds
+            self.items += items
+
+    def drop(self):
+        with self._lock:
+            self.dropped += 1
+
+    def utilization(self, now=None):
+        elapsed = (now or time.perf_counter()) - self.started
+        return min(1.0, self.busy / elapsed) if elapsed > 0 else 0.0
+
+
+class Stage:
+    def __init__(self, name, fn, maxsize=2):
+        self.name = name
+        self.fn = fn
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.stats = StageStats(name)
+        self.thread = None
+
+
+class FramePipeline:
+    # one worker per stage joined by bounded queues; fn(item) returns the next stage's item, or None to stop there
+    def __init__(self, stages, capture_name="capture"):
+        self.capture = StageStats(capture_name)
+        self.stages = [Stage(name, fn, maxsize) for name, fn, maxsize in stages]
+        self._running = False
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._running:
+                return
+            self._running = True
+            for index, stage in enumerate(self.stages):
+                following = self.stages[index + 1] if index + 1 < len(self.stages) else None
+                stage.thread = threading.Thread(
+                    target=self._run, args=(stage, following), name=f"Pipeline-{stage.name}", daemon=True
+                )
+                stage.thread.start()
+
+    def submit(self, item):
+        # the capture loop never waits: a frame arriving while detection is still behind is dropped
+        self.start()
+        try:
+            self.stages[0].queue.put_nowait(item)
+            return True
+        except queue.Full:
+            self.stages[0].stats.drop()
+            return False
+
+    def inject(self, name, item):
+        # hands an item straight to a later stage; False when that stage's queue is full
+        self.start()
+        stage = next(stage for stage in self.stages if stage.name == name)
+        try:
+            stage.queue.put_nowait(item)
+            return True
+        except queue.Full:
+            return False
+
+    def _put(self, stage, item):
+        while self._running:
+            try:
+                stage.queue.put(item, timeout=0.2)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _run(self, stage, following):
+        while True:
+            item = stage.queue.get()
+            if item is _STOP:
+                break
+            started = time.perf_counter()
+            try:
+                result = stage.fn(item)
+            except Exception as e:
+                log.exception("Pipeline stage %s error: %s", stage.name, e)
+                result = None
+            stage.stats.add(time.perf_counter() - started)
+            if result is not None and following is not None:
+                # a full queue downstream holds this stage back, which in turn fills the queues upstream
+                self._put(following, result)
+
+    def drain(self):
+        for stage in self.stages:
+            while True:
+                try:
+                    stage.queue.get_nowait()
+                except queue.Empty:
+                    break
+
+    def stop(self, timeout=2.0):
+        with self._lock:
+            if not self._running:
+                return
+            self._running = False
+        self.drain()
+        for stage in self.stages:
+            stage.queue.put(_STOP)
+        for stage in self.stages:
+            stage.thread.join(timeout=timeout)
+
+    def queue_sizes(self):
+        return {stage.name: stage.queue.qsize() for stage in self.stages}
+
+    def reset_stats(self):
+        self.capture.reset()
+        for stage in self.stages:
+            stage.stats.reset()
+
+    def utilization(self):
+        now = time.perf_counter()
+        stats = [self.capture] + [stage.stats for stage in self.stages]
+        return {s.name: s.utilization(now) for s in stats}
+
+    def bottleneck(self):
+        utilization = self.utilization()
+        return max(utilization, key=utilization.get)
+
+    def summary(self):
+        utilization = self.utilization()
+        parts = " | ".join(f"{name} {value * 100:.0f}%" for name, value in utilization.items())
+        dropped = self.stages[0].stats.dropped
+        return f"Stage busy: {parts} (bottleneck {self.bottleneck()}, {dropped} frames dropped)"
@@ -0,0 +1,70 @@
+import itertools
+import math
+import threading
+import time
+from collections import deque
+
+
+class FrameTrace:
+    __slots__ = ("frame_id", "captured_at", "captured_perf")
+
+    def __init__(self, frame_id, captured_at, captured_perf):
+        self.frame_id = frame_id
+        self.captured_at = captured_at
+        self.captured_perf = captured_perf
+
+    def age_ms(self, now=None):
+        if now is None:
+            now = time.perf_counter()
+        return (now - self.captured_perf) * 1000.0
+
+    def __repr__(self):
+        return f"FrameTrace(frame_id={self.frame_id}, captured_at={self.captured_at:.3f})"
+
+
+class FrameClock:
+    def __init__(self):
+        self._counter = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def next_trace(self):
+        with self._lock:
+            frame_id = next(self._counter)
+        return FrameTrace(frame_id, time.time(), time.perf_counter())
+
+
+class LatencyStats:
+    def __init__(self, maxlen=100000):
+        self._samples = deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+
+    def add(self, latency_ms):
+        with self._lock:
+            self._samples.append(latency_ms)
+
+    def clear(self):
+        with self._lock:
+            self._samples.clear()
+
+    def __len__(self):
+        return len(self._samples)
+
+    def percentiles(self, points=(50, 95, 99)):
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return {p: None for p in points}
+
+        result = {}
+        last = len(samples) - 1
+        for p in points:
+            # nearest-rank percentile
+            rank = max(0, min(last, math.ceil(p / 100.0 * len(samples)) - 1))
+            result[p] = samples[rank]
+        return result
+
+    def summary(self):
+        pct = self.percentiles()
+        if pct[50] is None:
+            return "Latency p50/p95/p99: -"
+        return f"Latency p50/p95/p99: {pct[50]:.0f} / {pct[95]:.0f} / {pct[99]:.0f} ms (n={len(self)})"
@@ -0,0 +1,204 @@
+import multiprocessing as mp
+import queue
+import time
+from multiprocessing import shared_memory
+import numpy as np
+from app_logging import get_logger
+
+log = get_logger("frame_transport")
+
+ALIGN = 64
+# per slot: reference count, generation
+HEADER_FIELDS = 2
+
+
+class FrameDescriptor:
+    # what actually crosses the process boundary instead of the pixels
+    __slots__ = ("slot", "generation", "shape", "dtype", "rects", "meta")
+
+    def __init__(self, slot, generation, shape, dtype, rects=(), meta=None):
+        self.slot = slot
+        self.generation = generation
+        self.shape = shape
+        self.dtype = dtype
+        self.rects = rects
+        self.meta = meta
+
+    def __getstate__(self):
+        return (self.slot, self.generation, self.shape, self.dtype, self.rects, self.meta)
+
+    def __setstate__(self, state):
+        self.slot, self.generation, self.shape, self.dtype, self.rects, self.meta = state
+
+    def __repr__(self):
+        return f"FrameDescriptor(slot={self.slot}, generation={self.generation}, shape={self.shape})"
+
+
+def _aligned(size):
+    return (size + ALIGN - 1) // ALIGN * ALIGN
+
+
+class SharedFramePool:
+    # fixed slots in one shared memory segment; a slot is reused once every lease on it has been released
+    def __init__(self, slots=4, slot_bytes=16 << 20, handle=None, context=None):
+        if handle is None:
+            self.slots = slots
+            self.slot_bytes = _aligned(slot_bytes)
+            # the lock must come from the context the workers are started with
+            self._condition = (context or mp).Condition()
+            self._owner = True
+            self._shm = shared_memory.SharedMemory(create=True, size=self._header_bytes() + slots * self.slot_bytes)
+        else:
+            name, self.slots, self.slot_bytes, self._condition = handle
+            self._owner = False
+            # spawned workers share the creator's resource tracker, so attaching does not take over the unlink
+            self._shm = shared_memory.SharedMemory(name=name)
+        self._header = np.ndarray((self.slots, HEADER_FIELDS), dtype=np.int64, buffer=self._shm.buf)
+        if self._owner:
+            self._header[:] = 0
+        self.writes = 0
+        self.waits = 0
+
+    def _header_bytes(self):
+        return _aligned(self.slots * HEADER_FIELDS * 8)
+
+    @property
+    def handle(self):
+        # pass to a worker process at start-up; the condition can only be inherited, not sent over a queue
+        return self._shm.name, self.slots, self.slot_bytes, self._condition
+
+    @classmethod
+    def attach(cls, handle):
+        return cls(handle=handle)
+
+    def _buffer(self, slot, nbytes):
+        start = self._header_bytes() + slot * self.slot_bytes
+        return self._shm.buf[start:start + nbytes]
+
+    def fits(self, frame):
+        return frame.nbytes <= self.slot_bytes
+
+    def write(self, frame, rects=(), meta=None, leases=1, timeout=1.0):
+        # copies the frame in once; None when it does not fit or every slot stays leased past the timeout
+        if not self.fits(frame):
+            return None
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            while True:
+                free = np.flatnonzero(self._header[:, 0] == 0)
+                if len(free):
+                    break
+                self.waits += 1
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self._condition.wait(remaining):
+                    return None
+            slot = int(free[0])
+            self._header[slot, 0] = leases
+            self._header[slot, 1] += 1
+            generation = int(self._header[slot, 1])
+
+        target = np.ndarray(frame.shape, dtype=frame.dtype, buffer=self._buffer(slot, frame.nbytes))
+        target[...] = frame
+        self.writes += 1
+        return FrameDescriptor(slot, generation, frame.shape, frame.dtype.str, tuple(rects), meta)
+
+    def view(self, descriptor):
+        # zero-copy array over the slot; only valid while the caller holds a lease
+        if self._header[descriptor.slot, 1] != descriptor.generation:
+            raise RuntimeError(f"Stale frame descriptor {descriptor}")
+        dtype = np.dtype(descriptor.dtype)
+        nbytes = int(np.prod(descriptor.shape)) * dtype.itemsize
+        return np.ndarray(descriptor.shape, dtype=dtype, buffer=self._buffer(descriptor.slot, nbytes))
+
+    def crops(self, descriptor):
+        frame = self.view(descriptor)
+        return [frame[y:y + h, x:x + w] for x, y, w, h in descriptor.rects]
+
+    def retain(self, descriptor, count=1):
+        with self._condition:
+            if self._header[descriptor.slot, 1] != descriptor.generation or self._header[descriptor.slot, 0] <= 0:
+                raise RuntimeError(f"Retain on a released frame {descriptor}")
+            self._header[descriptor.slot, 0] += count
+
+    def release(self, descriptor):
+        with self._condition:
+            if self._header[descriptor.slot, 1] != descriptor.generation:
+                log.warning("Release of a stale frame descriptor %s", descriptor)
+                return
+            self._header[descriptor.slot, 0] -= 1
+            if self._header[descriptor.slot, 0] <= 0:
+                self._header[descriptor.slot, 0] = 0
+                self._condition.notify_all()
+
+    def leased(self):
+        return int(np.count_nonzero(self._header[:, 0]))
+
+    def close(self):
+        self._header = None
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
+
+
+def _worker_loop(handle, target, jobs, results):
+    pool = SharedFramePool.attach(handle)
+    try:
+        while True:
+            descriptor = jobs.get()
+            if descriptor is None:
+                break
+            try:
+                result = target(pool.crops(descriptor), descriptor.meta)
+            except Exception as e:
+                result = e
+            finally:
+                pool.release(descriptor)
+            results.put((descriptor.meta, result))
+    finally:
+        pool.close()
+
+
+class FrameWorkerPool:
+    # worker processes that read crops straight out of shared memory; target(crops, meta) must be module level
+    def __init__(self, target, processes=2, slots=4, slot_bytes=16 << 20):
+        context = mp.get_context("spawn")
+        self.pool = SharedFramePool(slots, slot_bytes, context=context)
+        self.jobs = context.Queue()
+        self.results = context.Queue()
+        self.processes = [
+            context.Process(target=_worker_loop, args=(self.pool.handle, target, self.jobs, self.results),
+                            name=f"FrameWorker-{i}", daemon=True)
+            for i in range(processes)
+        ]
+        for process in self.processes:
+            process.start()
+
+    def submit(self, frame, rects, meta=None, timeout=1.0):
+        descriptor = self.pool.write(frame, rects, meta, timeout=timeout)
+        if descriptor is None:
+            return False
+        self.jobs.put(descriptor)
+        return True
+
+    def result(self, timeout=None):
+        # (meta, result or the worker's exception)
+        try:
+            return self.results.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self, timeout=5.0):
+        for _ in self.processes:
+            self.jobs.put(None)
+        for process in self.processes:
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+        self.pool.close()
+
+
+def read_odds_cells(crops, meta=None):
+    # worker target: each process loads its own OCR instance on first use
+    import extract_text
+
+    return [extract_text.get_odds_data(crop) for crop in crops]
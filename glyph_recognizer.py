@@ -0,0 +1,183 @@
+import re
+import threading
+import cv2
+import numpy as np
+from detect_block import _runs
+from ocr_policy import to_gray
+
+VALUE_PATTERN = re.compile(r'^\d+\.\d{2}$')
+DIGITS = "0123456789"
+GLYPH_SIZE = (12, 20)
+
+
+def binarize(image):
+    _, binary = cv2.threshold(to_gray(image), 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    # text is the minority colour whatever the theme; it ends up white
+    if cv2.countNonZero(binary) > binary.size // 2:
+        binary = cv2.bitwise_not(binary)
+    binary[[0, -1], :] = 0
+    binary[:, [0, -1]] = 0
+    return binary
+
+
+def segment_value(image, word_gap=0.5):
+    # glyph boxes (x0, x1, y0, y1) of the rightmost word, which is the value half of an odds cell
+    binary = binarize(image)
+    rows = np.flatnonzero(binary.any(axis=1))
+    if not len(rows):
+        return binary, []
+    text_height = rows[-1] - rows[0] + 1
+
+    starts, ends = _runs(binary.any(axis=0), 1)
+    if not len(starts):
+        return binary, []
+    gap_limit = max(2, word_gap * text_height)
+    first = len(starts) - 1
+    while first > 0 and starts[first] - ends[first - 1] < gap_limit:
+        first -= 1
+
+    glyphs = []
+    for x0, x1 in zip(starts[first:], ends[first:]):
+        ys = np.flatnonzero(binary[:, x0:x1].any(axis=1))
+        glyphs.append((x0, x1, ys[0], ys[-1] + 1))
+    return binary, glyphs
+
+
+class GlyphRecognizer:
+    def __init__(self, min_confidence=0.9, min_samples=3, learn_confidence=0.97, dot_ratio=0.45, min_margin=0.05):
+        self.min_confidence = min_confidence
+        self.min_samples = min_samples
+        self.learn_confidence = learn_confidence
+        self.dot_ratio = dot_ratio
+        self.min_margin = min_margin
+        self._lock = threading.Lock()
+        self._sums = {}
+        self._counts = {}
+        self._templates = None
+        self.reads = 0
+        self.hits = 0
+        self.learned = 0
+
+    @property
+    def ready(self):
+        return all(self._counts.get(char, 0) >= self.min_samples for char in DIGITS)
+
+    def clear(self):
+        with self._lock:
+            self._sums = {}
+            self._counts = {}
+            self._templates = None
+
+    def _features(self, binary, glyphs):
+        # None stands for the decimal point, told apart by its height rather than its shape
+        top = min(glyph[2] for glyph in glyphs)
+        bottom = max(glyph[3] for glyph in glyphs)
+        height = bottom - top
+        features = []
+        for x0, x1, y0, y1 in glyphs:
+            if y1 - y0 < self.dot_ratio * height and y0 >= top + height / 2:
+                features.append(None)
+                continue
+            patch = cv2.resize(binary[top:bottom, x0:x1], GLYPH_SIZE, interpolation=cv2.INTER_AREA)
+            vector = patch.astype(np.float32).ravel()
+            vector -= vector.mean()
+            norm = np.linalg.norm(vector)
+            features.append(vector / norm if norm else vector)
+        return features
+
+    def learn(self, image, text, confidence):
+        if confidence < self.learn_confidence or not VALUE_PATTERN.match(text or ""):
+            return False
+        binary, glyphs = segment_value(image)
+        if len(glyphs) != len(text):
+            return False
+        features = self._features(binary, glyphs)
+        if any((char == ".") != (feature is None) for char, feature in zip(text, features)):
+            return False
+
+        with self._lock:
+            for char, feature in zip(text, features):
+                if feature is None:
+                    continue
+                if char in self._sums:
+                    self._sums[char] += feature
+                else:
+                    self._sums[char] = feature.copy()
+                self._counts[char] = self._counts.get(char, 0) + 1
+            self._templates = None
+            self.learned += 1
+        return True
+
+    def _template_matrix(self):
+        with self._lock:
+            if self._templates is None:
+                chars = sorted(self._sums)
+                matrix = np.stack([self._sums[char] for char in chars])
+                matrix /= np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-6)
+                self._templates = (chars, matrix)
+            return self._templates
+
+    def read(self, image):
+        # (text, confidence) of a template read, or None when PaddleOCR has to read the cell
+        if not self.ready:
+            return None
+        self.reads += 1
+        binary, glyphs = segment_value(image)
+        if not 4 <= len(glyphs) <= 8:
+            return None
+
+        chars, matrix = self._template_matrix()
+        text = []
+        confidence = 1.0
+        for feature in self._features(binary, glyphs):
+            if feature is None:
+                text.append(".")
+                continue
+            scores = matrix @ feature
+            order = np.argsort(scores)
+            best = scores[order[-1]]
+            # a near tie between two digits (3/8, 1/7) is not a read
+            if len(order) > 1 and best - scores[order[-2]] < self.min_margin:
+                return None
+            text.append(chars[order[-1]])
+            confidence = min(confidence, float(best))
+
+        text = "".join(text)
+        if confidence < self.min_confidence or not VALUE_PATTERN.match(text):
+            return None
+        self.hits += 1
+        return text, confidence
+
+    def summary(self):
+        if not self.reads:
+            return f"Glyph reads: - ({self.learned} cells learned)"
+        return (f"Glyph reads: {self.hits} of {self.reads} ({self.hits * 100.0 / self.reads:.0f}%), "
+                f"{self.learned} cells learned")
+
+
+class LabelMemory:
+    # option label per cell position of a market layout, reused once PaddleOCR confirmed it a few times
+    def __init__(self, confirmations=2):
+        self.confirmations = confirmations
+        self._labels = {}
+        self._lock = threading.Lock()
+
+    def get(self, layout_key, count, position):
+        with self._lock:
+            entry = self._labels.get((layout_key, count, position))
+        if entry is not None and entry[1] >= self.confirmations:
+            return entry[0]
+        return None
+
+    def learn(self, layout_key, count, position, label):
+        key = (layout_key, count, position)
+        with self._lock:
+            entry = self._labels.get(key)
+            if entry is not None and entry[0] == label:
+                self._labels[key] = (label, entry[1] + 1)
+            else:
+                self._labels[key] = (label, 1)
+
+    def clear(self):
+        with self._lock:
+            self._labels.clear()
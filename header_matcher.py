@@ -0,0 +1,111 @@
+import re
+import unicodedata
+from difflib import SequenceMatcher
+from functools import lru_cache
+
+NUMBER_PATTERN = re.compile(r'\d+(?:,\d+)?')
+WHITESPACE_PATTERN = re.compile(r'\s+')
+
+
+class HeaderEntry:
+    __slots__ = ("index", "header", "normalized", "numbers", "text", "sorted_full", "sorted_text")
+
+    def __init__(self, index, header, normalized, sort_key):
+        self.index = index
+        self.header = header
+        self.normalized = normalized
+        self.numbers = tuple(NUMBER_PATTERN.findall(normalized))
+        self.text = NUMBER_PATTERN.sub('', normalized).strip()
+        self.sorted_full = sort_key(normalized)
+        self.sorted_text = sort_key(self.text)
+
+
+class HeaderMatcher:
+    def __init__(self, headers, corrector=None, cache_size=2048):
+        self.headers = list(headers)
+        self.corrector = corrector
+        self.entries = []
+        self.buckets = {}
+
+        # imported on first use, the matcher is only built once headers are loaded
+        from fuzzywuzzy import fuzz, utils
+        self._ratio = fuzz.ratio
+        self._full_process = utils.full_process
+
+        for index, header in enumerate(self.headers):
+            normalized = self.clean(unicodedata.normalize('NFC', header))
+            entry = HeaderEntry(index, header, normalized, self.sort_key)
+            self.entries.append(entry)
+            self.buckets.setdefault(entry.numbers, []).append(entry)
+
+        self._match_cached = lru_cache(maxsize=cache_size)(self._match)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def sort_key(self, text):
+        # what fuzz.token_sort_ratio compares, so scoring the precomputed keys with fuzz.ratio gives the same result
+        return " ".join(sorted(self._full_process(text, force_ascii=True).split()))
+
+    def correct(self, text):
+        if not text:
+            return ""
+        return self.corrector(text) if self.corrector else text
+
+    def clean(self, text):
+        if not text:
+            return ""
+        text = WHITESPACE_PATTERN.sub(' ', text.strip()).lower()
+        return self.correct(text)
+
+    def match(self, extracted_text, threshold=95):
+        if not self.entries or not extracted_text:
+            return None
+        return self._match_cached(extracted_text, threshold)
+
+    def clear_cache(self):
+        self._match_cached.cache_clear()
+
+    def cache_info(self):
+        return self._match_cached.cache_info()
+
+    def _match(self, extracted_text, threshold):
+        corrected = self.clean(extracted_text)
+
+        extracted_numbers = tuple(NUMBER_PATTERN.findall(corrected))
+        if extracted_numbers:
+            bucket = self.buckets.get(extracted_numbers)
+            if not bucket:
+                return None
+
+            remaining_text = NUMBER_PATTERN.sub('', corrected).strip()
+            sorted_remaining = self.sort_key(remaining_text)
+
+            best_entry, best_score = None, -1
+            for entry in bucket:
+                score = self._ratio(sorted_remaining, entry.sorted_text)
+                if score > best_score:
+                    best_entry, best_score = entry, score
+            if best_score >= threshold:
+                return best_entry.header
+
+            for entry in bucket:
+                similarity = SequenceMatcher(None, remaining_text, entry.text).ratio() * 100
+                if similarity >= threshold:
+                    return entry.header
+
+        sorted_corrected = self.sort_key(corrected)
+        best_entry, best_score = None, -1
+        for entry in self.entries:
+            score = self._ratio(sorted_corrected, entry.sorted_full)
+            if score > best_score:
+                best_entry, best_score = entry, score
+        if best_score >= threshold:
+            return best_entry.header
+
+        for entry in self.entries:
+            similarity = SequenceMatcher(None, corrected, entry.text).ratio() * 100
+            if similarity >= threshold:
+                return entry.header
+
+        return None
@@ -0,0 +1,233 @@
+import base64
+import copy
+import hashlib
+import json
+import os
+import queue
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+import cv2
+from app_logging import get_logger
+
+log = get_logger("llm_resolver")
+
+DEFAULT_BASE_URL = "https://api.openai.com/v1"
+
+PROMPTS = {
+    "header": (
+        "Each image is a section header cropped from a Turkish betting site. "
+        "For every image pick the header from the candidate list that it shows, "
+        "or null if none matches. Candidates: {candidates}. "
+        'Answer with JSON: {{"results": [<header or null>, ...]}} in image order.'
+    ),
+    "odds": (
+        "Each image is one odds cell cropped from a Turkish betting site, "
+        "showing an option label and a decimal odd. "
+        "For every image read the label and the odd exactly as printed. "
+        'Answer with JSON: {{"results": [{{"option": <text or null>, "value": <"1.85" or null>}}, ...]}} in image order.'
+    ),
+}
+
+
+def crop_key(kind, image):
+    digest = hashlib.sha1(image.tobytes())
+    digest.update(repr(image.shape).encode())
+    return f"{kind}:{digest.hexdigest()}"
+
+
+def encode_image(image):
+    ok, buffer = cv2.imencode(".png", image)
+    if not ok:
+        raise ValueError("crop could not be encoded")
+    return "data:image/png;base64," + base64.b64encode(buffer.tobytes()).decode("ascii")
+
+
+class LLMResolver:
+    def __init__(self, api_key="", base_url=DEFAULT_BASE_URL, model="gpt-4o-mini", cache_path="llm_cache.json",
+                 batch_size=8, max_concurrency=2, linger=0.5, timeout=30.0, queue_size=256, dispatch=None):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip("/")
+        self.model = model
+        self.cache_path = cache_path
+        self.batch_size = batch_size
+        self.linger = linger
+        self.timeout = timeout
+        self.dispatch = dispatch or (lambda fn: fn())
+        self.requests_sent = 0
+        self.cache_hits = 0
+        self.dropped = 0
+
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._cache = self._load_cache()
+        self._waiters = {}
+        self._dirty = False
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="LLMResolver")
+        self._thread = threading.Thread(target=self._run, name="LLMResolverBatcher", daemon=True)
+        self._thread.start()
+
+    @property
+    def enabled(self):
+        return bool(self.api_key)
+
+    def set_api_key(self, api_key):
+        self.api_key = api_key or ""
+
+    def _load_cache(self):
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return {}
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as file:
+                return json.load(file)
+        except Exception as e:
+            log.warning("LLM cache load error: %s", e)
+            return {}
+
+    def save_cache(self):
+        with self._lock:
+            if not self._dirty or not self.cache_path:
+                return
+            data = dict(self._cache)
+            self._dirty = False
+        try:
+            tmp_path = self.cache_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as file:
+                json.dump(data, file, ensure_ascii=False)
+            os.replace(tmp_path, self.cache_path)
+        except Exception as e:
+            log.error("LLM cache save error: %s", e)
+
+    def resolve_header(self, image, candidates, callback):
+        return self._submit("header", image, tuple(candidates), callback)
+
+    def resolve_odds(self, image, callback):
+        return self._submit("odds", image, (), callback)
+
+    def _submit(self, kind, image, candidates, callback):
+        # callback(result) runs through dispatch; result is None when the crop could not be resolved
+        if image is None or image.size == 0 or not self.enabled:
+            return False
+
+        key = crop_key(kind, image)
+        with self._lock:
+            cached = key in self._cache
+            if cached:
+                self.cache_hits += 1
+                # a copy, so the callback can neither hold the lock nor edit the cache
+                result = copy.deepcopy(self._cache[key])
+            else:
+                waiters = self._waiters.get(key)
+                if waiters is not None:
+                    waiters.append(callback)
+                    return True
+                self._waiters[key] = [callback]
+        if cached:
+            self.dispatch(lambda: callback(result))
+            return True
+
+        try:
+            self._queue.put_nowait((kind, key, image.copy(), candidates))
+        except queue.Full:
+            with self._lock:
+                self._waiters.pop(key, None)
+                self.dropped += 1
+            log.warning("LLM resolver queue is full, crop dropped")
+            return False
+        return True
+
+    def close(self, timeout=5.0):
+        self._queue.put(None)
+        self._thread.join(timeout)
+        # requests still in flight are abandoned, their crops are simply asked again next run
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self.save_cache()
+
+    def _run(self):
+        pending = {}
+        deadline = None
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = False
+
+            if item is None:
+                for (kind, candidates), batch in pending.items():
+                    self._executor.submit(self._send, kind, candidates, batch)
+                return
+
+            if item:
+                kind, key, image, candidates = item
+                batch = pending.setdefault((kind, candidates), [])
+                batch.append((key, image))
+                if deadline is None:
+                    deadline = time.monotonic() + self.linger
+                if len(batch) >= self.batch_size:
+                    self._executor.submit(self._send, kind, candidates, pending.pop((kind, candidates)))
+
+            if deadline is not None and time.monotonic() >= deadline:
+                for (kind, candidates), batch in pending.items():
+                    self._executor.submit(self._send, kind, candidates, batch)
+                pending = {}
+                deadline = None
+            elif not pending:
+                deadline = None
+
+    def _send(self, kind, candidates, batch):
+        results = [None] * len(batch)
+        try:
+            results = self._request(kind, candidates, [image for _, image in batch])
+        except Exception as e:
+            log.error("LLM request error: %s", e)
+
+        with self._lock:
+            callbacks = []
+            for (key, _), result in zip(batch, results):
+                if result is not None:
+                    self._cache[key] = result
+                    self._dirty = True
+                callbacks.append((self._waiters.pop(key, []), result))
+        self.save_cache()
+
+        for waiters, result in callbacks:
+            for callback in waiters:
+                self.dispatch(lambda callback=callback, result=copy.deepcopy(result): callback(result))
+
+    def _request(self, kind, candidates, images):
+        content = [{"type": "text", "text": PROMPTS[kind].format(candidates=json.dumps(list(candidates), ensure_ascii=False))}]
+        for image in images:
+            content.append({"type": "image_url", "image_url": {"url": encode_image(image), "detail": "low"}})
+        payload = {
+            "model": self.model,
+            "temperature": 0,
+            "response_format": {"type": "json_object"},
+            "messages": [{"role": "user", "content": content}],
+        }
+        request = urllib.request.Request(
+            f"{self.base_url}/chat/completions",
+            data=json.dumps(payload).encode("utf-8"),
+            headers={"Content-Type": "application/json", "Authorization": f"Bearer {self.api_key}"},
+            method="POST",
+        )
+        self.requests_sent += 1
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                body = json.loads(response.read().decode("utf-8"))
+        except urllib.error.HTTPError as e:
+            raise RuntimeError(f"HTTP {e.code}: {e.read()[:200]!r}") from e
+
+        answer = json.loads(body["choices"][0]["message"]["content"])
+        results = list(answer.get("results") or [])[:len(images)]
+        results += [None] * (len(images) - len(results))
+        return [self._validate(kind, candidates, result) for result in results]
+
+    def _validate(self, kind, candidates, result):
+        if kind == "header":
+            return result if result in candidates else None
+        if not isinstance(result, dict) or result.get("value") is None:
+            return None
+        return {"option": result.get("option"), "value": str(result["value"]).strip()}
@@ -1,30 +1,69 @@
+import time
+STARTUP_BEGIN = time.perf_counter()
+
 import tkinter as tk
 from tkinter import ttk, messagebox
 import ttkbootstrap as tb
 from datetime import datetime
 from PIL import Image, ImageTk
 import threading
+import multiprocessing
 from tkinter import Menu
 import numpy as np
 import cv2
-import time
 import mss
 import queue
 from detect_block import BlockDetector
+from frame_trace import FrameClock, LatencyStats
+from frame_pipeline import FramePipeline
+from memory_budget import MemoryBudget, nbytes
+from sampling_profiler import SamplingProfiler
+from virtual_table import VirtualTable
+from header_matcher import HeaderMatcher
+from ocr_corrections import CorrectionEngine
+from session_store import SessionStore
+from columnar_export import ColumnarExporter
+from export_engine import ExportEngine, safe_filename
+from llm_resolver import LLMResolver
+from ocr_policy import ReadPolicy, cell_confidence, upscale_sharpen
+from odds_validator import OddsValidator
+from glyph_recognizer import GlyphRecognizer, LabelMemory
+from crop_recorder import CropRecorder
+from odds_record import (MarketCatalog, OddsRecord, UNKNOWN_ID, build_record, format_odds,
+                         merge_records, parse_odds_text, parse_value)
+from array import array
+import app_config
 import extract_text
+from app_logging import get_logger, setup_logging, shutdown_logging
 import hashlib
+import math
+import weakref
 from collections import deque
-import gc
 import re
-import csv
-import openpyxl
-from difflib import SequenceMatcher
-from fuzzywuzzy import fuzz
-from fuzzywuzzy import process
 from tkinter import filedialog
 import json
 import random
-import unicodedata
+
+log = get_logger("main")
+
+class FrameJob:
+    # one settled frame on its way through the pipeline; crops and thresholds are keyed by id() of the region dict
+    __slots__ = ("image", "headers", "blocks", "block_height", "trace", "header_images", "block_images", "thresholds",
+                 "emitted", "resolved", "__weakref__")
+
+    def __init__(self, image, headers, blocks, block_height, trace):
+        self.image = image
+        self.headers = headers
+        self.blocks = blocks
+        self.block_height = block_height
+        self.trace = trace
+        self.header_images = {}
+        self.block_images = {}
+        self.thresholds = {}
+        self.emitted = []
+        # (block, header) once the LLM named a header OCR could not match
+        self.resolved = None
+
 
 class ThreadSafeImage:
     def __init__(self):
@@ -40,6 +79,8 @@ class ThreadSafeImage:
             return self._image
 
 class MainUI:
+    ROW_FLUSH_INTERVAL_MS = 50
+
     def __init__(self, root):
         self.root = root
         self.root.title("MAKCOLIK SCRAPER v1.0")
@@ -76,10 +117,8 @@ class MainUI:
         self.scroll_threshold = 5000
         self.scroll_text_id = None
         
-        self.block_detection_thread = None
         self.first_original_image = None
         self.frame_processed = False
-        self.block_detection_lock = threading.Lock()
         self.ocr_lock = threading.Lock()
         self.ui_lock = threading.Lock()
 
@@ -106,22 +145,113 @@ class MainUI:
         self.detected_image = None
 
         self.orphan_blocks = deque(maxlen=2)
+        self.first_trace = None
+
+        self.frame_clock = FrameClock()
+        self.memory = MemoryBudget(app_config.get("memory_caps_mb", {}))
+        self.profiler = None
+        self.pipeline = FramePipeline([
+            ("detect", self._detect_stage, 1),
+            ("segment", self._segment_stage, 2),
+            ("ocr", self._ocr_stage, 2),
+            ("match", self._match_stage, 4),
+        ])
+        self.latency_stats = LatencyStats()
+        self.row_records = {}
+        self.pending_rows = deque()
+        self.pending_rows_lock = threading.Lock()
+        self.row_flush_scheduled = False
+
+        self.session_id = None
+        self.store = SessionStore(app_config.app_path(app_config.get("session_db", "sessions.db")))
         
         self.api_key = tk.StringVar()
         self.headers_config = []
         self.headers = []
-        self.bet_options_order = []
+        self.header_matcher = None
+        self.corrections = CorrectionEngine()
+        self.catalog = MarketCatalog()
+        self.export_engine = ExportEngine(self.store, dispatch=lambda fn: self.root.after(0, fn))
+        self.read_policy = ReadPolicy(
+            extract_text.get_odds_data, threshold=app_config.get("ocr_confidence_threshold", 0.9)
+        )
+        self.llm_confidence_threshold = app_config.get("llm_confidence_threshold", 0.6)
+        self.glyphs = None
+        self.label_memory = LabelMemory()
+        if app_config.get("glyph_recognizer", True):
+            self.glyphs = GlyphRecognizer(min_confidence=app_config.get("glyph_confidence_threshold", 0.9))
+        self.crop_recorder = None
+        if app_config.get("record_crops", False):
+            self.crop_recorder = CropRecorder(
+                app_config.app_path(app_config.get("crop_dir", "crops")),
+                max_crops=app_config.get("record_crops_max", 5000),
+            )
+        self.validator = OddsValidator(self.catalog, confidence_threshold=self.read_policy.threshold)
+        self.llm_resolver = LLMResolver(
+            base_url=app_config.get("llm_base_url"),
+            model=app_config.get("llm_model"),
+            cache_path=app_config.app_path(app_config.get("llm_cache", "llm_cache.json")),
+            batch_size=app_config.get("llm_batch_size", 8),
+            max_concurrency=app_config.get("llm_max_concurrency", 2),
+            timeout=app_config.get("llm_timeout_seconds", 30.0),
+            # callbacks only hand work on: cells to the table, headers to the pipeline's OCR stage
+            dispatch=lambda fn: self.root.after(0, fn),
+        )
+        self.columnar_exporter = None
+        if app_config.get("columnar_export", True):
+            self.columnar_exporter = ColumnarExporter(
+                self.store,
+                self.catalog,
+                app_config.export_path(app_config.get("columnar_export_dir", "matches")),
+                flush_interval=app_config.get("columnar_flush_seconds", 30.0),
+            )
         self.scroll_value = tk.IntVar(value=5000)
         self.date_time = tk.StringVar(value=datetime.now().strftime("%Y-%m-%d %H:%M"))
         self.team_name = tk.StringVar()
         self.match_score = tk.StringVar()
         self.status_text = tk.StringVar(value="Status: 0/4 ROI selected, ready to configure.")
+        self.latency_text = tk.StringVar(value=self.latency_stats.summary())
+        self.pipeline_text = tk.StringVar(value="")
+        self.ocr_status_text = tk.StringVar(value="OCR: loading models...")
         
         self._shutdown = False
         
         self.setup_ui()
+        self.restore_session()
         self.update_preview_images()
         self.update_result_images_from_queue()
+        self.root.after_idle(self.report_startup)
+        self.root.after(int(app_config.get("memory_report_seconds", 300) * 1000), self.report_memory)
+        self.start_ocr_warmup()
+
+    def report_startup(self):
+        log.info("Window ready in %.0f ms", (time.perf_counter() - STARTUP_BEGIN) * 1000)
+
+    def report_memory(self):
+        if self._shutdown:
+            return
+        log.info(self.memory.summary())
+        self.root.after(int(app_config.get("memory_report_seconds", 300) * 1000), self.report_memory)
+
+    def start_ocr_warmup(self):
+        threading.Thread(target=self._ocr_warmup, name="OCRWarmup", daemon=True).start()
+
+    def _ocr_warmup(self):
+        try:
+            with self.ocr_lock:
+                elapsed = extract_text.warm_up()
+            since_start = time.perf_counter() - STARTUP_BEGIN
+            log.info("OCR models ready in %.1f s (%.1f s after start)", elapsed, since_start)
+            status, color = f"OCR: ready ({elapsed:.1f} s)", "green"
+        except Exception as e:
+            log.exception("OCR warm-up error: %s", e)
+            status, color = "OCR: failed to load models", "red"
+        if not self._shutdown:
+            self.root.after(0, lambda: self._set_ocr_status(status, color))
+
+    def _set_ocr_status(self, status, color):
+        self.ocr_status_text.set(status)
+        self.ocr_status_label.configure(foreground=color)
         
     def setup_ui(self):
         self.root.grid_rowconfigure(0, weight=4)
@@ -277,6 +407,12 @@ class MainUI:
                                      font=("Arial", 9))
         self.status_label.pack(anchor="w")
 
+        self.ocr_status_label = ttk.Label(status_frame,
+                                         textvariable=self.ocr_status_text,
+                                         foreground="orange",
+                                         font=("Arial", 9))
+        self.ocr_status_label.pack(anchor="w")
+
     def update_config_status(self):
         config_count = sum([
             self.roi_coordinates is not None,
@@ -308,82 +444,95 @@ class MainUI:
         right_frame.grid_rowconfigure(0, weight=1)
         right_frame.grid_columnconfigure(0, weight=1)
         
-        columns = ("id", "header", "odds")
+        columns = ("id", "header", "odds", "frame", "latency")
         
-        self.tree = ttk.Treeview(right_frame, columns=columns, show="headings")
+        self.table = VirtualTable(right_frame, columns)
+        self.tree = self.table.tree
         
         self.tree.heading("id", text="ID")
         self.tree.heading("header", text="Header")
         self.tree.heading("odds", text="Odds")
+        self.tree.heading("frame", text="Frame")
+        self.tree.heading("latency", text="Latency (ms)")
         
         self.tree.column("id", width=20, anchor="center")
         self.tree.column("header", width=100, anchor="w")
         self.tree.column("odds", width=200, anchor="w")
+        self.tree.column("frame", width=40, anchor="center")
+        self.tree.column("latency", width=60, anchor="e")
         
-        v_scrollbar = ttk.Scrollbar(right_frame, orient="vertical", command=self.tree.yview)
         h_scrollbar = ttk.Scrollbar(right_frame, orient="horizontal", command=self.tree.xview)
-        self.tree.configure(yscrollcommand=v_scrollbar.set, xscrollcommand=h_scrollbar.set)
+        self.tree.configure(xscrollcommand=h_scrollbar.set)
         
         self.tree.grid(row=0, column=0, sticky="nsew")
-        v_scrollbar.grid(row=0, column=1, sticky="ns")
+        self.table.v_scrollbar.grid(row=0, column=1, sticky="ns")
         h_scrollbar.grid(row=1, column=0, sticky="ew")
         
         self.tree.bind("<Double-1>", self.on_double_click)
         self.tree.bind("<Button-3>", self.show_context_menu)
         
         self.create_context_menu()
-        self.add_placeholder_data()
     
     def show_context_menu(self, event):
-        item = self.tree.identify_row(event.y)
-        if item:
-            self.tree.selection_set(item)
+        key = self.table.identify_row(event.y)
+        if key is not None:
+            # a right click inside a multi-row selection acts on all of it
+            if key not in self.table.selection():
+                self.table.selection_set(key)
             self.context_menu.post(event.x_root, event.y_root)
             
     def delete_selected_row(self):
-        selected_items = self.tree.selection()
+        selected_items = self.table.selection()
         if not selected_items:
             messagebox.showwarning("Warning", "Please select a row to delete")
             return
         
         if messagebox.askyesno("Confirm Delete", "Are you sure you want to delete the selected row?"):
-            for item in selected_items:
-                self.tree.delete(item)
+            self.table.delete_rows(selected_items)
+            for market_id in selected_items:
+                self.row_records.pop(market_id, None)
+                self.store.delete_market(market_id)
             messagebox.showinfo("Success", "Row deleted successfully")
 
     def clear_selected_row(self):
-        selected_items = self.tree.selection()
+        selected_items = self.table.selection()
         if not selected_items:
             messagebox.showwarning("Warning", "Please select a row to clear")
             return
         
         if messagebox.askyesno("Confirm Clear", "Are you sure you want to clear the selected row data?"):
-            for item in selected_items:
-                current_values = list(self.tree.item(item, 'values'))
-                new_values = [current_values[0], "", ""]
-                self.tree.item(item, values=new_values)
+            for market_id in selected_items:
+                current_values = list(self.table.values(market_id))
+                new_values = [current_values[0], "", ""] + current_values[3:]
+                self.table.update_row(market_id, new_values)
+                record = OddsRecord(UNKNOWN_ID, "")
+                self.row_records[market_id] = record
+                self.store.update_market(market_id, record=record)
             messagebox.showinfo("Success", "Row cleared successfully")
 
     def add_new_row(self):
         self.data_counter += 1
-        new_row = (str(self.data_counter), "", "")
-        self.tree.insert("", "end", values=new_row)
-        
-        children = self.tree.get_children()
-        if children:
-            self.tree.see(children[-1])
+        new_row = (str(self.data_counter), "", "", "", "")
+        record = OddsRecord(UNKNOWN_ID, "")
+        market_id = self.store.add_market(self._ensure_session(), self.data_counter, record)
+        self.row_records[market_id] = record
+        self.table.append_rows([(market_id, new_row)])
+        self.table.see_end()
         
         messagebox.showinfo("Success", "New row added successfully")
 
     def clear_all_rows(self):
-        if not self.tree.get_children():
+        if not len(self.table):
             messagebox.showwarning("Warning", "Table is already empty")
             return
         
         if messagebox.askyesno("Confirm Clear All", 
                             "Are you sure you want to clear ALL rows?\nThis cannot be undone!"):
-            for item in self.tree.get_children():
-                self.tree.delete(item)
+            self.discard_pending_rows()
+            self.table.clear()
+            self.row_records.clear()
+            if self.session_id is not None:
+                self.store.clear_session(self.session_id)
             
             self.data_counter = 0
             self.current_id = 1
@@ -398,11 +547,45 @@ class MainUI:
         self.context_menu.add_command(label="Add New Row", command=self.add_new_row)
         self.context_menu.add_separator()
         self.context_menu.add_command(label="Clear All Rows", command=self.clear_all_rows)
+        self.context_menu.add_separator()
+        self.context_menu.add_command(
+            label=f"Profile for {app_config.get('profile_seconds', 30)} s", command=self.start_profiling
+        )
+
+    def start_profiling(self):
+        if self.profiler is not None and self.profiler.running:
+            messagebox.showinfo("Profiler", "A profile is already being recorded")
+            return
+        seconds = app_config.get("profile_seconds", 30)
+        self.profiler = SamplingProfiler(interval=app_config.get("profile_interval_ms", 10) / 1000.0)
+        self.profiler.start(seconds, on_done=self._profile_done)
+        self.status_text.set(f"Status: Profiling for {seconds} s...")
+
+    def _profile_done(self, profiler):
+        # runs on the profiler thread; writing the files there keeps the UI responsive
+        try:
+            paths = profiler.write(app_config.export_path(app_config.get("profile_dir", "profiles")))
+            message, error = f"Profile saved:\n{paths[0]}\n{paths[1]}", None
+        except Exception as e:
+            log.error("Profile write error: %s", e)
+            message, error = None, str(e)
+        if self._shutdown:
+            return
+        self.root.after(0, lambda: messagebox.showerror("Profiler", f"Profile could not be saved: {error}")
+                        if error else messagebox.showinfo("Profiler", message))
 
     def setup_bottom_panel(self):
         bottom_frame = ttk.Frame(self.root)
         bottom_frame.grid(row=1, column=0, columnspan=2, sticky="ew", padx=5, pady=(0, 5))
         
+        ttk.Label(bottom_frame,
+                  textvariable=self.latency_text,
+                  font=("Arial", 9)).pack(side="left", padx=5)
+
+        ttk.Label(bottom_frame,
+                  textvariable=self.pipeline_text,
+                  font=("Arial", 9)).pack(side="left", padx=5)
+        
         export_frame = ttk.Frame(bottom_frame)
         export_frame.pack(side="right")
         
@@ -457,13 +640,9 @@ class MainUI:
             try:
                 with mss.mss() as sct:
                     sct_img = sct.grab(self.logo_monitor)
-                    logo = np.array(sct_img)
-                    self.logo = cv2.cvtColor(logo, cv2.COLOR_BGRA2BGR)
-                    h, w = self.logo.shape[:2]
-                    self.logo_hist = self.calculate_hist(self.logo)
-                    self.detector = BlockDetector(min_area=20000, logo_hist=self.logo_hist, logo_size=(h, w))
+                    self.set_logo(cv2.cvtColor(np.array(sct_img), cv2.COLOR_BGRA2BGR))
             except Exception as e:
-                print(f"Logo selection error: {e}")
+                log.error("Logo selection error: %s", e)
                 return
 
             self.update_config_status()
@@ -471,6 +650,12 @@ class MainUI:
             self.status_text.set(status_text + " Logo selected.")
             self.frame_processed = False       
         
+    def set_logo(self, logo):
+        self.logo = logo
+        h, w = self.logo.shape[:2]
+        self.logo_hist = self.calculate_hist(self.logo)
+        self.detector = BlockDetector(min_area=20000, logo_hist=self.logo_hist, logo_size=(h, w))
+
     def select_team_roi(self):
         self.team_coordinates = self.create_roi_selector("Select Team Region")
         if self.extract_team_names():
@@ -498,18 +683,7 @@ class MainUI:
         try:
             with open(file_path, 'r', encoding='utf-8') as file:
                 data = json.load(file)
-                if "headers" not in data:
-                    raise ValueError("The JSON file does not contain the expected 'headers' key.")
-                
-                def _get_bet_options(header: str):
-                    for item in data["headers"]:
-                        if item["header"] == header:
-                            return item["options"]
-                    return []
-                
-                self.headers_config = data["headers"]
-                self.headers = [item["header"] for item in data["headers"]]
-                self.bet_options_order = _get_bet_options("İlk Yarı / Maç Skoru")
+                self.apply_headers(data)
                 messagebox.showinfo("Success", f"Headers are loaded: {file_path}")
 
         except FileNotFoundError:
@@ -521,6 +695,85 @@ class MainUI:
         except Exception as e:
             messagebox.showerror("Error", f"An unexpected error occurred: {str(e)}")
             
+    def apply_headers(self, data):
+        if "headers" not in data:
+            raise ValueError("The JSON file does not contain the expected 'headers' key.")
+
+        self.headers_config = data["headers"]
+        self.headers = [item["header"] for item in data["headers"]]
+        self.corrections.load(data.get("corrections"), self.headers + [
+            option for item in data["headers"] for option in item.get("options", ())
+        ])
+        self.rebuild_header_matcher()
+        self.catalog = MarketCatalog(self.headers_config)
+        self.validator.catalog = self.catalog
+        self.label_memory.clear()
+        if self.columnar_exporter is not None:
+            self.columnar_exporter.set_catalog(self.catalog)
+
+    def rebuild_header_matcher(self):
+        self.header_matcher = HeaderMatcher(self.headers, corrector=self.corrections.apply_folded)
+
+    def _ensure_session(self):
+        if self.session_id is None:
+            self.session_id = self.store.start_session(self.current_team_names, self.scores, self.current_match_score)
+        return self.session_id
+
+    def complete_session(self):
+        log.info(self.read_policy.summary())
+        log.info(self.validator.summary())
+        if self.glyphs is not None:
+            log.info(self.glyphs.summary())
+        log.info(self.pipeline.summary())
+        log.info(self.memory.summary())
+        if self.session_id is not None and self.columnar_exporter is not None:
+            self.columnar_exporter.submit(self.session_id)
+
+    def restore_session(self):
+        try:
+            session = self.store.latest_session()
+            if session is None:
+                return
+            markets = self.store.markets(session["id"])
+            if not markets:
+                return
+
+            self.session_id = session["id"]
+            self.current_team_names = session["teams"]
+            self.current_match_score = session["score_text"]
+            if session["full_time_score"]:
+                self.scores = [session["full_time_score"], session["first_half_score"]]
+            if self.current_team_names:
+                self.team_name.set(self.current_team_names)
+                self.team_entry.configure(style="Normal.TEntry")
+            if self.current_match_score:
+                self.match_score.set(self.current_match_score)
+
+            rows = []
+            for market in markets:
+                latency = market["latency_ms"]
+                record = market["record"]
+                rows.append((
+                    market["id"],
+                    (
+                        market["row_no"],
+                        market["header"],
+                        format_odds(record),
+                        market["frame_id"] if market["frame_id"] is not None else "",
+                        f"{latency:.0f}" if latency is not None else "",
+                    )
+                ))
+                self.row_records[market["id"]] = record
+                if len(record):
+                    self.hash_values.add(self.get_record_hash(record))
+            self.table.append_rows(rows)
+
+            self.current_id = markets[-1]["row_no"] + 1
+            self.data_counter = self.current_id - 1
+            log.info("Restored %d rows of session %d (%s)", len(markets), self.session_id, self.current_team_names)
+        except Exception as e:
+            log.exception("Session restore error: %s", e)
+
     def extract_team_names(self):
         if not (self.team_coordinates and self.team_coordinates['width'] > 0 and self.team_coordinates['height'] > 0):
             return False
@@ -536,11 +789,10 @@ class MainUI:
         try:
             with mss.mss() as sct:
                 sct_img = sct.grab(self.team_roi_monitor)
-                team_name_image = np.array(sct_img)
-                self.team_name_image = cv2.cvtColor(team_name_image, cv2.COLOR_BGRA2RGB)
+                team_name_image = cv2.cvtColor(np.array(sct_img), cv2.COLOR_BGRA2RGB)
 
                 with self.ocr_lock:
-                    texts = extract_text.extract_team_name(self.team_name_image)
+                    texts, _ = extract_text.extract_team_name(team_name_image)
                     def __clean_text__(text):
                         cleaned = re.findall(r'(\d+-\d+)', text.replace(" ", ""))
                         return " | ".join(cleaned)
@@ -552,12 +804,15 @@ class MainUI:
                             self.data_counter = 0
                             self.current_id = 1
                             self.hash_values.clear()
-                            for item in self.tree.get_children():
-                                self.tree.delete(item)
+                            self.discard_pending_rows()
+                            self.table.clear()
+                            self.row_records.clear()
+                            self.complete_session()
+                            self.session_id = self.store.start_session(team_name, self.scores, self.current_match_score)
                             self.team_entry.configure(style="Normal.TEntry") 
                         return True
         except Exception as e:
-            print(f"Team name extraction error: {e}")
+            log.error("Team name extraction error: %s", e)
         return False
 
     def extract_match_scores(self):
@@ -575,11 +830,10 @@ class MainUI:
         try:
             with mss.mss() as sct:
                 sct_img = sct.grab(self.team_roi_monitor)
-                match_scores_image = np.array(sct_img)
-                self.match_scores_image = cv2.cvtColor(match_scores_image, cv2.COLOR_BGRA2RGB)
+                match_scores_image = cv2.cvtColor(np.array(sct_img), cv2.COLOR_BGRA2RGB)
 
                 with self.ocr_lock:
-                    text = extract_text.extract_score_data(self.match_scores_image)
+                    text, _ = extract_text.extract_score_data(match_scores_image)
                     def __clean_text__(text):
                         cleaned = re.findall(r'(\d+-\d+)', text.replace(" ", ""))
                         return " | ".join(cleaned), cleaned
@@ -588,9 +842,11 @@ class MainUI:
                         self.current_match_score = f"{score_text}"
                         self.scores = scores
                         self.match_score.set(self.current_match_score)
+                        if self.session_id is not None:
+                            self.store.update_scores(self.session_id, self.scores, self.current_match_score)
                         return True
         except Exception as e:
-            print(f"Match scores extraction error: {e}")
+            log.error("Match scores extraction error: %s", e)
         return False
 
     def create_roi_selector(self, title="Select Region"):
@@ -667,7 +923,8 @@ class MainUI:
     def submit_api_key(self):
         api_value = self.api_key.get()
         if api_value and api_value != "API KEY = sk-proj-***":
-            print(f"API Key submitted: {api_value}")
+            self.llm_resolver.set_api_key(api_value.strip())
+            log.info("API key submitted, LLM fallback enabled")
             messagebox.showinfo("API Key", f"API Key saved: {api_value[:10]}...")
         else:
             messagebox.showwarning("API Key", "Please enter a valid API key")
@@ -684,7 +941,8 @@ class MainUI:
             self.extract_match_scores()
             self.current_id = 1
             self.hash_values.clear()
-            self.orphan_blocks.clear()
+            self._drop_orphans()
+            self.pipeline.reset_stats()
         
         elif self.is_running and not self.is_paused:
             self.stop_scroll_detection()
@@ -703,108 +961,49 @@ class MainUI:
             self.hash_values.clear()
 
     def export_csv(self):
-        columns = list(self.tree['columns'])
-        if columns and columns[0].lower() in ("id", "index", "#0"):
-            columns = columns[1:]
-
-        final_headers = ['Takımlar', 'İlk Yarı Skoru', 'Mac Sonucu Skoru']
-        for h in self.headers_config:
-            for option in h["options"]:
-                final_headers.append(f"{h['header']} ~ {option}")
-                    
-        row_data = ["-", "-"] + ["-"] * (len(final_headers) - 2)
-        row_data[0] = self.current_team_names
-        row_data[1] = self.scores[1]
-        row_data[2] = self.scores[0]
-
-        for item_id in self.tree.get_children():
-            row = self.tree.item(item_id)['values']
-            if not row:
-                continue
-            header = row[1]
-            odds = row[2]
-            odds_list = re.findall(r'\(([^,]+),\s*([^\)]+)\)', odds)
-            if header in [h["header"] for h in self.headers_config]:
-                values_only = [val.strip() for _, val in odds_list]
-                start_idx = None
-                for i, h in enumerate(self.headers_config):
-                    if h["header"] == header:
-                        start_idx = 3 + sum(len(cfg["options"]) for cfg in self.headers_config[:i])
-                        break
-                if start_idx is not None:
-                    for j, val in enumerate(values_only):
-                        row_data[start_idx + j] = val
-
-        filename = self.current_team_names + "_" + self.date_time.get()
-        safe_name_csv = re.sub(r'[\\/:"*?<>|]+', '_', filename) + ".csv"
-
-        with open(safe_name_csv, "w", newline="", encoding="utf-8-sig") as csvfile:
-            writer = csv.writer(csvfile)
-            writer.writerow(final_headers)
-            writer.writerow(row_data)
-
-        messagebox.showinfo("Export", f"Data has been exported to CSV file: {safe_name_csv}")
+        self._export(".csv", "CSV")
 
     def export_excel(self):
-        
-        columns = list(self.tree['columns'])
-        if columns and columns[0].lower() in ("id", "index", "#0"):
-            columns = columns[1:]
+        self._export(".xlsx", "Excel")
 
-        final_headers = ['Takımlar', 'İlk Yarı Skoru', 'Mac Sonucu Skoru']
-        for h in self.headers_config:
-            for option in h["options"]:
-                final_headers.append(f"{h['header']} ~ {option}")
-                
-        row_data = ["-", "-"] + ["-"] * (len(final_headers) - 2)
-        row_data[0] = self.current_team_names
-        row_data[1] = self.scores[1]
-        row_data[2] = self.scores[0]
-
-        for item_id in self.tree.get_children():
-            row = self.tree.item(item_id)['values']
-            if not row:
-                continue
-            header = row[1]
-            odds = row[2]
-            odds_list = re.findall(r'\(([^,]+),\s*([^\)]+)\)', odds)
-            if header in [h["header"] for h in self.headers_config]:
-                values_only = [val.strip() for _, val in odds_list]
-                start_idx = None
-                for i, h in enumerate(self.headers_config):
-                    if h["header"] == header:
-                        start_idx = 3 + sum(len(cfg["options"]) for cfg in self.headers_config[:i])
-                        break
-                if start_idx is not None:
-                    for j, val in enumerate(values_only):
-                        row_data[start_idx + j] = val
-
-        filename = self.current_team_names + "_" + self.date_time.get()
-        safe_name_excel = re.sub(r'[\\/:"*?<>|]+', '_', filename) + ".xlsx"
-        wb = openpyxl.Workbook()
-        sheet = wb.active
-        sheet.title = "Exported Data"
-
-        for col_num, header in enumerate(final_headers, start=1):
-            sheet.cell(row=1, column=col_num, value=header)
-        for col_num, value in enumerate(row_data, start=1):
-            sheet.cell(row=2, column=col_num, value=value)
-
-        wb.save(safe_name_excel)
-        messagebox.showinfo("Export", f"Data has been exported to Excel file: {safe_name_excel}")
+    def _export(self, extension, label):
+        start_of_day = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0).timestamp()
+        filename = app_config.export_path(safe_filename(self.current_team_names + "_" + self.date_time.get(), extension))
+
+        def on_done(path, count, error):
+            if error is not None:
+                messagebox.showerror("Export", f"{label} export failed: {error}")
+            elif count == 0:
+                messagebox.showwarning("Export", "There is no extracted data to export")
+            else:
+                messagebox.showinfo("Export", f"Data has been exported to {label} file: {path} ({count} matches)")
+
+        self.export_engine.export(filename, self.catalog, [self.session_id], since=start_of_day, on_done=on_done)
         
     def on_double_click(self, event):
-        selection = self.tree.selection()
-        if not selection:
+        key = self.table.identify_row(event.y)
+        if key is None:
             return
             
-        item = selection[0]
+        self.table.selection_set(key)
         column = self.tree.identify_column(event.x)
         
         col_index = int(column.replace('#', '')) - 1
-        values = self.tree.item(item, 'values')
-        self.edit_cell(item, col_index, values)
-        
+        values = self.table.values(key)
+        self.edit_cell(key, col_index, values)
+        
+    def _learn_corrections(self, col_index, original, record):
+        # only what OCR actually read is learned from, the displayed text is already corrected and matched
+        if col_index == 1 and original.ocr_header and record.header != original.header:
+            return self.corrections.learn(original.ocr_header, record.header)
+        if col_index != 2:
+            return []
+        learned = []
+        for ocr_label, old_label, new_label in zip(original.ocr_labels, original.labels, record.labels):
+            if ocr_label and new_label != old_label:
+                learned += self.corrections.learn(ocr_label, new_label)
+        return learned
+
     def edit_cell(self, item, col_index, values):
         edit_window = tk.Toplevel(self.root)
         edit_window.title("Edit Cell")
@@ -818,7 +1017,7 @@ class MainUI:
         y = (self.root.winfo_y() + (self.root.winfo_height() // 2)) - 150
         edit_window.geometry(f"+{x}+{y}")
         
-        columns = ("id", "header", "odds")
+        columns = ("id", "header", "odds", "frame", "latency")
         col_name = columns[col_index]
         
         ttk.Label(edit_window, text=f"Edit {col_name}:").pack(pady=5)
@@ -841,7 +1040,24 @@ class MainUI:
             new_value = text_widget.get("1.0", "end-1c")
             new_values = list(values)
             new_values[col_index] = new_value
-            self.tree.item(item, values=new_values)
+
+            original = self.row_records.get(item) or OddsRecord(UNKNOWN_ID, "")
+            record = original
+            if col_index == 1:
+                record = record.with_header(self.catalog, new_value)
+            elif col_index == 2:
+                record = parse_odds_text(self.catalog, new_values[1], new_value, record.frame_id)
+                record.ocr_header, record.ocr_labels = original.ocr_header, original.ocr_labels
+                new_values[2] = format_odds(record)
+            self.row_records[item] = record
+
+            self.table.update_row(item, new_values)
+            if col_index == 0 and new_value.strip().isdigit():
+                self.store.update_market(item, row_no=int(new_value))
+            elif col_index in (1, 2):
+                self.store.update_market(item, record=record)
+            if self._learn_corrections(col_index, original, record):
+                self.rebuild_header_matcher()
             edit_window.destroy()
         
         ttk.Button(button_frame, text="Save", command=save_edit, 
@@ -868,25 +1084,6 @@ class MainUI:
                 font=("Arial", 9),
                 foreground="gray").pack()
         
-    def add_placeholder_data(self):
-        sample_data = []
-        for data in sample_data:
-            self.tree.insert("", "end", values=data)
-            self.data_counter += 1
-            
-    def add_new_data(self):
-        self.data_counter += 1
-        new_data = (
-            str(self.data_counter),
-            "extracted_data_here",
-            "header_here"
-        )
-        self.tree.insert("", "end", values=new_data)
-        
-        children = self.tree.get_children()
-        if children:
-            self.tree.see(children[-1])
-
     def start_roi_preview(self):
         if not self.roi_coordinates or self.roi_preview_running:
             return
@@ -948,11 +1145,11 @@ class MainUI:
                         time.sleep(1.0 / 15)
                         
                     except Exception as e:
-                        print(f"Capture error: {e}")
+                        log.error("Capture error: %s", e)
                         time.sleep(0.1)
                         
         except Exception as e:
-            print(f"Capture thread error: {e}")
+            log.exception("Capture thread error: %s", e)
 
     def update_preview_images(self):
         if self._shutdown:
@@ -976,13 +1173,28 @@ class MainUI:
                 
                 if self.original_canvas_image and self.original_canvas.winfo_exists():
                     self.original_canvas.itemconfig(self.original_canvas_image, image=photo)
+                self.memory.set("preview", "original", nbytes(photo), self._drop_preview)
                     
         except Exception as e:
-            print(f"Preview update error: {e}")
+            log.error("Preview update error: %s", e)
         
         if self.root.winfo_exists() and not self._shutdown:
             self.root.after(100, self.update_preview_images)
     
+    def _drop_preview(self, key):
+        # runs on the Tk thread; the canvas is blanked so Tk holds no reference to the dropped image either
+        if key == "original":
+            self.original_photo = None
+            canvas, item = self.original_canvas, self.original_canvas_image
+        else:
+            self.detected_photo = None
+            canvas, item = self.detected_canvas, self.detected_canvas_image
+        try:
+            if item and canvas.winfo_exists():
+                canvas.itemconfig(item, image="")
+        except Exception as e:
+            log.error("Preview release error: %s", e)
+
     def stop_roi_preview(self):
         if self.roi_preview_running:
             self.roi_preview_running = False
@@ -996,9 +1208,9 @@ class MainUI:
                 except queue.Empty:
                     break
     
-    def get_hash(self, text: str) -> str:
-        return hashlib.md5(text.encode('utf-8')).hexdigest()
-    
+    def get_record_hash(self, record) -> str:
+        return hashlib.md5(record.value_key()).hexdigest()
+
     def check_processed(self, hash_value):
         return hash_value in self.hash_values
     
@@ -1009,7 +1221,7 @@ class MainUI:
             logo_hist = cv2.normalize(logo_hist, logo_hist, 0, 1, cv2.NORM_MINMAX)
             return logo_hist
         except Exception as e:
-            print(f"Histogram calculation error: {e}")
+            log.error("Histogram calculation error: %s", e)
             return None
     
     def start_scroll_detection(self):
@@ -1036,7 +1248,7 @@ class MainUI:
             return is_scrolling, non_zero_count
             
         except Exception as e:
-            print(f"Scroll detection error: {e}")
+            log.error("Scroll detection error: %s", e)
             return False, 0
     
     def _scroll_detection_loop(self):
@@ -1049,79 +1261,128 @@ class MainUI:
                         if not self.roi_monitor:
                             break
                             
+                        started = time.perf_counter()
                         sct_img = sct.grab(self.roi_monitor)
-                        curr_frame = np.array(sct_img)
-                        
-                        if self.prev_frame is not None:
-                            is_scrolling, diff_count = self.detect_scroll_change(
-                                self.prev_frame, curr_frame
-                            )
-                            
-                            new_status = "Scrolling" if is_scrolling else "Captured"
-
-                            if self.current_scroll_state != new_status:
-                                self.current_scroll_state = new_status
-                                text_color = "orange" if new_status == "Scrolling" else "lime"
-                                
-                                self.root.after(0, lambda s=new_status, c=text_color: 
-                                            self.update_scroll_canvas_text(s, c))
-                            
-                            if is_scrolling:
-                                self.frame_processed = False
-                            else:
-                                if not self.frame_processed and self.logo is not None and self.logo_hist is not None:
-                                    self._trigger_block_detection(curr_frame.copy())
-                                    self.frame_processed = True
-
-                        self.prev_frame = curr_frame.copy()
+                        trace = self.frame_clock.next_trace()
+                        # np.array() already gives a private buffer, no copy needed
+                        self.process_captured_frame(np.array(sct_img), trace, started)
                         time.sleep(0.1)
                         
                     except Exception as e:
                         time.sleep(0.1)
                         
         except Exception as e:
-            print(f"Scroll detection thread error: {e}")
+            log.exception("Scroll detection thread error: %s", e)
+
+    def process_captured_frame(self, curr_frame, trace, started=None):
+        # one BGRA capture of the ROI; the soak harness feeds replayed frames through here too
+        started = started or time.perf_counter()
+        if self.prev_frame is not None:
+            is_scrolling, diff_count = self.detect_scroll_change(
+                self.prev_frame, curr_frame
+            )
 
-    def _trigger_block_detection(self, frame):
-        with self.block_detection_lock:
-            if self.block_detection_thread is None or not self.block_detection_thread.is_alive():
-                self.block_detection_thread = threading.Thread(
-                    target=self._detect_and_show_result, args=(frame.copy(),), daemon=True
-                )
-                self.block_detection_thread.start()
+            new_status = "Scrolling" if is_scrolling else "Captured"
 
-    def _detect_and_show_result(self, frame):
-        try:
-            frame_bgr = cv2.cvtColor(frame, cv2.COLOR_BGRA2BGR)
+            if self.current_scroll_state != new_status:
+                self.current_scroll_state = new_status
+                text_color = "orange" if new_status == "Scrolling" else "lime"
 
-            if frame_bgr is not None and self.logo is not None and self.logo_hist is not None and self.detector is not None:
-                blocks, headers, original_image = self.detector.detect_rectangles(frame_bgr)
-                # top_10_rectangles = self.detector.get_top_n(blocks, 10)
-                
-                height = 0
-                if len(blocks) >= 1:
-                    x, y, w, height = blocks[0]['coordinates']
+                self.root.after(0, lambda s=new_status, c=text_color:
+                            self.update_scroll_canvas_text(s, c))
+
+            if is_scrolling:
+                self.frame_processed = False
+            else:
+                # over the pipeline cap the settled frame waits for the next loop instead of piling up
+                if (not self.frame_processed and self.logo is not None and self.logo_hist is not None
+                        and not self.memory.over("pipeline", curr_frame.nbytes)):
+                    self.pipeline.submit((curr_frame.copy(), trace))
+                    self.frame_processed = True
+
+        self.prev_frame = curr_frame
+        self.memory.set("capture", "prev_frame", curr_frame.nbytes, self._drop_prev_frame)
+        self.pipeline.capture.add(time.perf_counter() - started)
+
+    def _drop_prev_frame(self, key=None):
+        # the next capture is then compared against nothing and only becomes the new reference
+        self.prev_frame = None
 
-                result_image, detected_blocks = self.detector.visualize_results(original_image, blocks, headers)
+    def _detect_stage(self, item):
+        frame, trace = item
+        frame_bgr = cv2.cvtColor(frame, cv2.COLOR_BGRA2BGR)
+        if frame_bgr is None or self.logo is None or self.logo_hist is None or self.detector is None:
+            return None
 
-                try:
-                    self.result_image_queue.put_nowait(result_image)
-                except queue.Full:
-                    try:
-                        self.result_image_queue.get_nowait()
-                        self.result_image_queue.put_nowait(result_image)
-                    except queue.Empty:
-                        pass
-                
-                self.root.after(50, self.extract_team_names)
-                self.root.after(50, self.extract_match_scores)
-                
-                self._process_pairing(original_image, headers, detected_blocks, height)
+        blocks, headers, original_image = self.detector.detect_rectangles(frame_bgr)
 
-        except Exception as e:
-            print(f"Block detection error: {e}")
-            import traceback
-            traceback.print_exc() 
+        height = 0
+        if len(blocks) >= 1:
+            x, y, w, height = blocks[0]['coordinates']
+
+        result_image, detected_blocks = self.detector.visualize_results(original_image, blocks, headers)
+        # the canvas shows at most 270x540, queueing the full annotated frame only holds memory
+        result_image = self._fit_preview(result_image)
+
+        try:
+            self.result_image_queue.put_nowait(result_image)
+        except queue.Full:
+            try:
+                self.result_image_queue.get_nowait()
+                self.result_image_queue.put_nowait(result_image)
+            except queue.Empty:
+                pass
+
+        self.root.after(50, self.extract_team_names)
+        self.root.after(50, self.extract_match_scores)
+
+        job = FrameJob(original_image, headers, detected_blocks, height, trace)
+        self._track_job(job)
+        return job
+
+    def _track_job(self, job):
+        key = id(job)
+        self.memory.set("pipeline", key, nbytes(job.image))
+        weakref.finalize(job, self.memory.discard, "pipeline", key)
+
+    def _fit_preview(self, image, width=270, height=540):
+        h, w = image.shape[:2]
+        scale = min(width / w, height / h)
+        if scale >= 1:
+            return image
+        return cv2.resize(image, (max(1, int(w * scale)), max(1, int(h * scale))), interpolation=cv2.INTER_AREA)
+
+    def _segment_stage(self, job):
+        # everything pairing needs that does not depend on OCR: header crops and the threshold of every block;
+        # the cell grid comes from the layout cache once the header is known, and is segmented only on a miss
+        for header in job.headers:
+            crop = self._header_crop(job.image, header)
+            if crop.size:
+                job.header_images[id(header)] = self._preprocess_odds_block_image(crop)
+        for block in job.blocks:
+            block_image = self._crop_image(job.image, block)
+            if block_image is None or block_image.size == 0:
+                continue
+            job.block_images[id(block)] = block_image
+            job.thresholds[id(block)] = self.detector.threshold_odds(block_image)
+        self.memory.set("pipeline", id(job), nbytes(job.image) + nbytes(job.header_images) + nbytes(job.thresholds))
+        return job
+
+    def _ocr_stage(self, job):
+        if job.resolved is not None:
+            block, header = job.resolved
+            self._emit_block(job.image, block, header, job.trace, job)
+        else:
+            self._process_pairing(job.image, job.headers, job.blocks, job.block_height, job.trace, job)
+        return job if job.emitted else None
+
+    def _match_stage(self, job):
+        for kind, record, cells, trace in job.emitted:
+            if kind == "block":
+                self._match_block(record, cells, trace)
+            else:
+                self.insert_pair_to_treeview(record, trace)
+        return None
 
     def update_result_images_from_queue(self):
         if self._shutdown:
@@ -1160,10 +1421,11 @@ class MainUI:
                     self.detected_placeholder = None
                 
                 self.detected_canvas.itemconfig(self.detected_canvas_image, image=detected_photo)
-                self.detected_photo = detected_photo 
+                self.detected_photo = detected_photo
+                self.memory.set("preview", "detected", nbytes(detected_photo), self._drop_preview)
                 
         except Exception as e:
-            print(f"Result image update error: {e}")
+            log.error("Result image update error: %s", e)
         
         if self.root.winfo_exists() and not self._shutdown:
             self.root.after(50, self.update_result_images_from_queue)
@@ -1182,97 +1444,111 @@ class MainUI:
         
         return image[y:y+h, x:x+w]
     
-    def normalize_text(self, text):
-        if not text:
-            return ""
-        text = text.upper()
-        text = re.sub(r'\s+', '', text)
-        return text
-    
     def _preprocess_odds_block_image(self, odds_block_image):
         if odds_block_image is None or odds_block_image.size == 0:
             return None
             
         try:
-            gray = cv2.cvtColor(odds_block_image, cv2.COLOR_BGR2GRAY)
-            scale_factor = 2
-            height, width = gray.shape[:2]
-            image_resized = cv2.resize(gray, (width*scale_factor, height*scale_factor), interpolation=cv2.INTER_CUBIC)
-            kernel = np.array([[0, -1,  0],
-                               [-1,  5, -1],
-                               [0, -1,  0]])
-            sharpened = cv2.filter2D(image_resized, -1, kernel)
-            return sharpened
+            return upscale_sharpen(odds_block_image)
         except Exception as e:
-            print(f"Preprocessing error: {e}")
+            log.error("Preprocessing error: %s", e)
             return odds_block_image
 
-    def _get_block_odds_text(self, original_image, block):
-        x, y, w, h = block['coordinates']
-                
-        block_image = self._crop_image(original_image, block)
+    def _read_block_odds(self, original_image, block, header, layout_key=None, trace=None, cells=None, job=None,
+                         ocr_header=""):
+        thresholded = None
+        if job is not None and id(block) in job.block_images:
+            block_image = job.block_images[id(block)]
+            thresholded = job.thresholds.get(id(block))
+        else:
+            block_image = self._crop_image(original_image, block)
         if block_image is None or block_image.size == 0:
-            return ""
-            
-        odds_blocks = self.detector.detect_odds_blocks(block_image) if self.detector else []
+            return None
+
+        odds_blocks = self.detector.detect_odds_blocks(block_image, layout_key, thresholded) if self.detector else []
 
-        text_concat = ""
-        odds = ""
-        count = 0
-        num_odds_blocks = len(odds_blocks)
+        option_texts = []
+        ocr_labels = []
+        values = array('d')
+        confidences = array('f')
         
-        for odds_block in odds_blocks:
+        header_id = self.catalog.header_id(header)
+        for position, odds_block in enumerate(odds_blocks):
             odds_block_image = self._crop_image(block_image, odds_block)
             if odds_block_image is None or odds_block_image.size == 0:
                 continue
                 
-            preprocessed = self._preprocess_odds_block_image(odds_block_image)
-            if preprocessed is None:
+            try:
+                option_text, value_text, odds_confidences, stage, ocr_label = self._read_cell(
+                    odds_block_image, header_id, layout_key, len(odds_blocks), position
+                )
+            except Exception as e:
+                log.error("Odds read error: %s", e)
                 continue
-                
-            with self.ocr_lock:
-                odds_texts = extract_text.get_odds_data(preprocessed)
 
-            odds += f"({odds_texts[0]}, {odds_texts[1]})"
+            option_texts.append(option_text)
+            ocr_labels.append(ocr_label)
+            values.append(parse_value(value_text))
+            confidences.append(cell_confidence(odds_confidences))
+            if cells is not None:
+                cells.append((odds_block_image, stage))
+
+        frame_id = trace.frame_id if trace is not None else None
+        return build_record(self.catalog, header, option_texts, values, confidences, frame_id, ocr_header, ocr_labels)
+
+    def _read_cell(self, image, header_id, layout_key, count, position):
+        # full blocks keep their cell layout, so a confirmed label plus a template read of the value skips PaddleOCR
+        if self.glyphs is not None and layout_key is not None:
+            label = self.label_memory.get(layout_key, count, position)
+            if label is not None:
+                glyph_read = self.glyphs.read(image)
+                if glyph_read is not None:
+                    return label, glyph_read[0], [1.0, glyph_read[1]], "glyph", ""
+
+        with self.ocr_lock:
+            odds_texts, odds_confidences, stage = self.read_policy.read(image)
+        option_text = self.corrections.apply(odds_texts[0])
+        if self.crop_recorder is not None:
+            self.crop_recorder.record(image, odds_texts, cell_confidence(odds_confidences))
+
+        if self.glyphs is not None:
+            self.glyphs.learn(image, odds_texts[1], cell_confidence(odds_confidences))
+            if layout_key is not None and self.catalog.option_id(header_id, option_text) >= 0:
+                self.label_memory.learn(layout_key, count, position, option_text)
+        return option_text, odds_texts[1], odds_confidences, stage, odds_texts[0]
+
+    def _header_crop(self, original_image, region):
+        x, y, w, h = region['coordinates']
+        h_img, w_img = original_image.shape[:2]
+        w = int(w * 0.5)
 
-            count += 1
-            if count < num_odds_blocks:
-                odds += ", "
-            
-            if num_odds_blocks > 2:
-                chunk_size = 2 if num_odds_blocks % 2 == 0 and num_odds_blocks % 6 != 0 else 3
-                if count % chunk_size == 0:
-                    odds += "\n"
+        x = max(0, min(x, w_img - 1))
+        y = max(0, min(y, h_img - 1))
+        w = max(1, min(w, w_img - x))
+        h = max(1, min(h, h_img - y))
 
-            text_concat += odds_texts[1]
-        return odds, text_concat
+        return original_image[y:y+h, x:x+w]
 
-    def _get_header_text(self, original_image, region):
+    def _get_header_text(self, original_image, region, job=None):
             try:
-                x, y, w, h = region['coordinates']
-                h_img, w_img = original_image.shape[:2]
-                w = int(w * 0.5)
-
-                x = max(0, min(x, w_img - 1))
-                y = max(0, min(y, h_img - 1))
-                w = max(1, min(w, w_img - x))
-                h = max(1, min(h, h_img - y))
-
-                crop_image = original_image[y:y+h, x:x+w]
-                if crop_image.size == 0:
-                    return ""
-                    
-                pre = self._preprocess_odds_block_image(crop_image)
+                if job is not None and id(region) in job.header_images:
+                    pre = job.header_images[id(region)]
+                else:
+                    crop_image = self._header_crop(original_image, region)
+                    if crop_image.size == 0:
+                        return ""
+                    pre = self._preprocess_odds_block_image(crop_image)
                 if pre is None:
                     return ""
                     
-                text = extract_text.extract_block_data(pre)
+                text, confidence = extract_text.extract_block_data(pre)
+                log.debug("Header read %r (confidence %.2f)", text, confidence)
                 return text
             except Exception as e:
-                print(f"Error during text extraction: {e}")
+                log.error("Error during text extraction: %s", e)
                 return ""
 
-    def _process_pairing(self, original_image, headers, blocks, block_height):
+    def _process_pairing(self, original_image, headers, blocks, block_height, trace=None, job=None):
         num_headers = len(headers)
         num_blocks = len(blocks)
 
@@ -1283,20 +1559,15 @@ class MainUI:
         
         if 150 < block_height < 200:
             if num_blocks >= 1: # medium block
-                b_text, b_odds = self._get_block_odds_text(original_image, blocks[0])
                 h_text = "Unknown"
+                ocr_header = ""
                 if num_headers == 1:
-                    h_text = self._get_header_text(original_image, headers[0])
-                    h_text = self.match_headers(h_text)
+                    ocr_header = self._get_header_text(original_image, headers[0], job)
+                    h_text = self.match_headers(ocr_header)
                     if h_text is None:
+                        self._resolve_header_later(original_image, headers[0], blocks[0], trace)
                         return
-
-                normalized = self.normalize_text(b_odds)
-                hash_val = self.get_hash(normalized)
-
-                if not self.check_processed(hash_val):
-                    self.hash_values.add(hash_val)
-                    self.insert_pair_to_treeview(h_text, b_text)
+                if self._emit_block(original_image, blocks[0], h_text, trace, job, ocr_header) is not False:
                     return
         
         if 400 < block_height:
@@ -1304,36 +1575,46 @@ class MainUI:
                 block = blocks[0]
                 bx, by, bw, bh = block['coordinates']
                 h_text = "İlk Yarı / Maç Skoru"
+                ocr_header = ""
                 if num_headers >= 1: 
                     header = headers[num_headers - 1]
                     hy = header['coordinates'][1]
 
                     if hy < by:
-                        h_text = self._get_header_text(original_image, header)
-                        h_text = self.match_headers(h_text)
+                        ocr_header = self._get_header_text(original_image, header, job)
+                        h_text = self.match_headers(ocr_header)
                         if h_text is None:
                             return
                 
                 if by > 10 and by + bh > self.roi_coordinates['height'] - 10:
-                    self.orphan_blocks.append(block)
-                    self.first_original_image = original_image
-                    print(f"first block has been added. {by}, {by + bh}, {self.roi_coordinates['height']}")
+                    # only the block is needed for the merge, not the whole frame
+                    block_image = self._crop_image(original_image, block).copy()
+                    self.orphan_blocks.append({'coordinates': (0, 0, block_image.shape[1], block_image.shape[0]),
+                                               'area': block['area']})
+                    self.first_original_image = block_image
+                    self.first_trace = trace
+                    self.memory.set("orphans", "first", block_image.nbytes, self._drop_orphans)
+                    log.debug("first block has been added. %d, %d, %d", by, by + bh, self.roi_coordinates['height'])
                     return
                 elif by < 10 and by + bh < self.roi_coordinates['height'] - 10:
-                    print(f"last block has been added. {len(self.orphan_blocks)} {by}, {by + bh}, {self.roi_coordinates['height']}")
+                    log.debug("last block has been added. %d %d, %d, %d", len(self.orphan_blocks), by, by + bh, self.roi_coordinates['height'])
                     num = len(self.orphan_blocks)
                     if num >= 1:
 
                         first_block = self.orphan_blocks[num - 1]
                         last_block = block
-                        print(f"2 blocks are merged.")
-                        str1, _ = self._get_block_odds_text(self.first_original_image, first_block)
-                        str2, _ = self._get_block_odds_text(original_image, last_block)
-
-                        combined_str = f"{str1}, {str2}"
-                        normalized = self.sort_bet_options(combined_str)
-                        self.insert_pair_to_treeview(h_text, normalized)
-                        self.orphan_blocks.clear()
+                        log.debug("2 blocks are merged.")
+                        first_record = self._read_block_odds(self.first_original_image, first_block, h_text, trace=self.first_trace)
+                        last_record = self._read_block_odds(original_image, last_block, h_text, trace=trace, job=job,
+                                                            ocr_header=ocr_header)
+
+                        record = merge_records(self.catalog, h_text, [first_record, last_record])
+                        log.debug("Sorted odds: %d", len(record))
+                        if job is not None:
+                            job.emitted.append(("record", record, None, self.first_trace or trace))
+                        else:
+                            self.insert_pair_to_treeview(record, self.first_trace or trace)
+                        self._drop_orphans()
                         return            
                         
         used_blocks = set()
@@ -1346,36 +1627,200 @@ class MainUI:
                 by = block['coordinates'][1]
 
                 if by > hy:
-                    h_text = self._get_header_text(original_image, header)
-                    print(f"{h_text}")
-                    h_text = self.match_headers(h_text)
+                    ocr_header = self._get_header_text(original_image, header, job)
+                    log.debug("Header text: %s", ocr_header)
+                    h_text = self.match_headers(ocr_header)
                     if h_text is None:
+                        self._resolve_header_later(original_image, header, block, trace)
+                        return
+                    if self._emit_block(original_image, block, h_text, trace, job, ocr_header) is None:
                         return
-                    b_text, b_odds = self._get_block_odds_text(original_image, block)
-                    normalized = self.normalize_text(b_odds)
-                    hash_val = self.get_hash(normalized)
-                    
-                    if not self.check_processed(hash_val):
-                        self.hash_values.add(hash_val)
-                        self.insert_pair_to_treeview(h_text, b_text)
                     
                     used_blocks.add(i)
                     break
             
-    def insert_pair_to_treeview(self, header_text, odds_text):
-        if not self._shutdown:
-            self.root.after(0, lambda: self._insert_pair(header_text, odds_text))
+    def _drop_orphans(self, key=None):
+        self.orphan_blocks.clear()
+        self.first_original_image = None
+        self.memory.discard("orphans", "first")
 
-    def _insert_pair(self, header_text, odds_text):
-        try:
-            self.tree.insert(
-                "",
-                "end",
-                values=(self.current_id, header_text, odds_text)
+    def _emit_block(self, original_image, block, header, trace=None, job=None, ocr_header=""):
+        # None when the block could not be read, False when it was already inserted
+        cells = []
+        record = self._read_block_odds(original_image, block, header, header, trace, cells, job, ocr_header)
+        if record is None:
+            return None
+        if job is not None:
+            # validation and de-duplication run in the match stage; this check only steers pairing
+            job.emitted.append(("block", record, cells, trace))
+            return not self.check_processed(self.get_record_hash(record))
+        return self._match_block(record, cells, trace)
+
+    def _match_block(self, record, cells, trace=None):
+        record = self._validate_record(record, cells)
+
+        hash_val = self.get_record_hash(record)
+        if self.check_processed(hash_val):
+            return False
+        self.hash_values.add(hash_val)
+        unresolved = [
+            (position, cells[position][0]) for position in range(len(record))
+            if math.isnan(record.values[position]) or record.confidences[position] < self.llm_confidence_threshold
+        ]
+        self.insert_pair_to_treeview(record, trace, unresolved)
+        return True
+
+    def _validate_record(self, record, cells):
+        suspects = self.validator.check(record)
+        if not suspects:
+            return record
+
+        option_texts = list(record.labels)
+        ocr_labels = list(record.ocr_labels)
+        values = array('d', record.values)
+        confidences = array('f', record.confidences)
+        for position in suspects:
+            crop, stage = cells[position]
+            try:
+                with self.ocr_lock:
+                    result = self.read_policy.read(crop, skip=(stage,))
+            except Exception as e:
+                log.error("Odds re-read error: %s", e)
+                continue
+            if result is None:
+                continue
+            odds_texts, odds_confidences, _ = result
+            if odds_texts[0] != '-':
+                option_texts[position] = self.corrections.apply(odds_texts[0])
+                if position < len(ocr_labels):
+                    ocr_labels[position] = odds_texts[0]
+            values[position] = parse_value(odds_texts[1])
+            confidences[position] = cell_confidence(odds_confidences)
+
+        reread = build_record(self.catalog, record.header, option_texts, values, confidences, record.frame_id,
+                              record.ocr_header, ocr_labels)
+        if not self.validator.suspects(reread):
+            self.validator.mark_fixed()
+            return reread
+
+        # still implausible after one re-read: keep the first read, mark the suspects doubtful
+        log.debug("Implausible odds kept for %s at %s", record.header, suspects)
+        confidences = array('f', record.confidences)
+        for position in suspects:
+            confidences[position] = 0.0
+        return OddsRecord(record.header_id, record.header, record.option_ids, record.labels, record.values,
+                          confidences, record.frame_id, record.ocr_header, record.ocr_labels)
+
+    def _resolve_header_later(self, original_image, header_region, block, trace=None):
+        if not self.llm_resolver.enabled or not self.catalog.headers:
+            return
+        crop = self._header_crop(original_image, header_region)
+
+        def on_header(header):
+            # the block goes back through the OCR and match stages like any other, never read here
+            if header is None or self._shutdown:
+                return
+            log.info("LLM resolved header: %s", header)
+            job = FrameJob(original_image, [], [block], block['coordinates'][3], trace)
+            job.resolved = (block, header)
+            self._track_job(job)
+            self._queue_resolved_block(job)
+
+        self.llm_resolver.resolve_header(crop, self.catalog.headers, on_header)
+
+    def _queue_resolved_block(self, job, attempts=50):
+        # runs on the Tk thread, so a busy pipeline is retried later instead of waited for
+        if self._shutdown:
+            return
+        if self.pipeline.inject("ocr", job):
+            return
+        if attempts:
+            self.root.after(100, lambda: self._queue_resolved_block(job, attempts - 1))
+        else:
+            log.warning("Pipeline busy, LLM resolved block for %s dropped", job.resolved[1])
+
+    def _resolve_cells_later(self, market_id, unresolved):
+        if not self.llm_resolver.enabled:
+            return
+        for position, crop in unresolved:
+            self.llm_resolver.resolve_odds(
+                crop, lambda result, position=position: self._apply_resolved_cell(market_id, position, result)
             )
-            self.current_id += 1
-        except Exception as e:
-            print(f"Insert pair error: {e}")
+
+    def _apply_resolved_cell(self, market_id, position, result):
+        record = self.row_records.get(market_id)
+        if result is None or record is None or position >= len(record) or self._shutdown:
+            return
+        value = parse_value(result["value"])
+        if math.isnan(value):
+            return
+
+        labels = list(record.labels)
+        if record.option_ids[position] < 0 and result.get("option"):
+            labels[position] = self.corrections.apply(result["option"])
+        values = array('d', record.values)
+        values[position] = value
+        record = build_record(self.catalog, record.header, labels, values, record.confidences, record.frame_id,
+                              record.ocr_header, record.ocr_labels)
+
+        self.row_records[market_id] = record
+        self.hash_values.add(self.get_record_hash(record))
+        current_values = self.table.values(market_id)
+        if current_values is not None:
+            self.table.update_row(market_id, (current_values[0], current_values[1], format_odds(record)) + tuple(current_values[3:]))
+        self.store.update_market(market_id, record=record)
+        log.debug("LLM resolved cell %d of market %d: %s", position, market_id, result["value"])
+
+    def insert_pair_to_treeview(self, record, trace=None, unresolved=None):
+        if self._shutdown:
+            return
+        with self.pending_rows_lock:
+            self.pending_rows.append((record, trace, unresolved))
+            if self.row_flush_scheduled:
+                return
+            self.row_flush_scheduled = True
+        self.root.after(self.ROW_FLUSH_INTERVAL_MS, self._flush_pending_rows)
+
+    def discard_pending_rows(self):
+        with self.pending_rows_lock:
+            self.pending_rows.clear()
+
+    def _flush_pending_rows(self):
+        with self.pending_rows_lock:
+            batch = list(self.pending_rows)
+            self.pending_rows.clear()
+            self.row_flush_scheduled = False
+        if not batch:
+            return
+
+        rows = []
+        session_id = self._ensure_session()
+        for record, trace, unresolved in batch:
+            try:
+                rows.append(self._insert_pair(session_id, record, trace, unresolved))
+            except Exception as e:
+                log.error("Insert pair error: %s", e)
+        self.table.append_rows(rows)
+        self.latency_text.set(self.latency_stats.summary())
+        self.pipeline_text.set(self.pipeline.summary())
+
+    def _insert_pair(self, session_id, record, trace=None, unresolved=None):
+        frame_id = ""
+        latency = ""
+        latency_ms = None
+        if trace is not None:
+            latency_ms = trace.age_ms()
+            self.latency_stats.add(latency_ms)
+            frame_id = trace.frame_id
+            latency = f"{latency_ms:.0f}"
+
+        market_id = self.store.add_market(session_id, self.current_id, record, trace, latency_ms)
+        self.row_records[market_id] = record
+        if unresolved:
+            self._resolve_cells_later(market_id, unresolved)
+        values = (self.current_id, record.header, format_odds(record), frame_id, latency)
+        self.current_id += 1
+        return market_id, values
 
     def update_scroll_canvas_text(self, status, color):
         try:
@@ -1384,7 +1829,7 @@ class MainUI:
                                             text=status, 
                                             fill=color)
         except Exception as e:
-            print(f"Canvas text update error: {e}")
+            log.error("Canvas text update error: %s", e)
 
     def stop_scroll_detection(self):
         if self.scroll_detection_running:
@@ -1403,8 +1848,14 @@ class MainUI:
         if messagebox.askyesno("Exit", "Are you sure you want to exit?"):
             self.roi_preview_running = False
             self.scroll_detection_running = False
-            
-            gc.collect()
+            self.pipeline.stop()
+            self._flush_pending_rows()
+            self.complete_session()
+            if self.columnar_exporter is not None:
+                self.columnar_exporter.close()
+            self.llm_resolver.close()
+            self.store.close()
+
             self.root.after(200, self.root.destroy)
         else:
             self._shutdown = False
@@ -1412,121 +1863,15 @@ class MainUI:
                 self.root.after(300, self.start_roi_preview)
                 self.root.after(300, self.start_scroll_detection)
 
-    def apply_ocr_corrections(self, text):
-        if not text:
-            return ""
-        corrections = {
-            'ılk': 'ilk',
-            '1lk': 'İlk',
-            'ilk': 'İlk',
-            'Ilk': 'İlk', 
-            'Mac': 'Maç',
-            'Maq': 'Maç',
-            'mac': 'maç',
-            'maq': 'maç',
-            'Sans': 'Şans',
-            'sans': 'şans',
-            'Cifte': 'Çifte',
-            'Cift': 'Çift',
-            'cifte': 'çifte',
-            'Yari': 'Yarı',
-            'Yarl': 'Yarı',
-            'yari': 'yarı',
-            '$ans': 'şans',
-            'karsilikli': 'Karşılıklı',
-            'Araligi': 'Aralığı',
-            'Karsilikll': 'Karşılıklı',
-            'üst': 'Üst',
-            'Us0': 'Üst',
-            'Ost': 'Üst',
-            '0st': 'Üst',
-        }
-
-        for wrong, correct in corrections.items():
-            text = text.replace(wrong, correct)
-
-        return text
-
-    def clean_turkish(self, text):
-        if not text:
-            return ""
-        text = self.apply_ocr_corrections(text)
-
-        import re
-        text = re.sub(r'\s+', ' ', text.strip())
-        
-        return text.lower()
-
     def match_headers(self, extracted_text, threshold=95):
-        if len(self.headers) == 0:
+        if self.header_matcher is None:
             return None
-
-        cleaned = self.clean_turkish(extracted_text)
-        corrected = self.apply_ocr_corrections(cleaned)
-        normalized_headers = [self.normalize_unicode(header) for header in self.headers]
-        extracted_numbers = re.findall(r'\d+(?:,\d+)?', cleaned)
-        if extracted_numbers:
-            for header in normalized_headers:
-                header_numbers = re.findall(r'\d+(?:,\d+)?', header)
-                if extracted_numbers == header_numbers:
-                    remaining_text = re.sub(r'\d+(?:,\d+)?', '', corrected).strip()
-                    header_text = re.sub(r'\d+(?:,\d+)?', '', header).strip()
-
-                    best_match = process.extractOne(remaining_text, [header_text], scorer=fuzz.token_sort_ratio)
-                    if best_match and best_match[1] >= threshold:
-                        matched_index = normalized_headers.index(header)
-                        original_header = self.headers[matched_index]
-                        return original_header
-                    similarity = SequenceMatcher(None, remaining_text, header_text).ratio() * 100
-                    if similarity >= threshold:
-                        matched_index = normalized_headers.index(header)
-                        original_header = self.headers[matched_index]
-                        return original_header
-                    break
-            else:
-                return None
-        best_match = process.extractOne(corrected, normalized_headers, scorer=fuzz.token_sort_ratio)
-        
-        if best_match and best_match[1] >= threshold:
-            matched_index = normalized_headers.index(best_match[0])
-            original_header = self.headers[matched_index]
-            return original_header
-        for header in normalized_headers:
-            header_text = re.sub(r'\d+(?:,\d+)?', '', header).strip()
-            similarity = SequenceMatcher(None, corrected, header_text).ratio() * 100
-            if similarity >= threshold:
-                matched_index = normalized_headers.index(header)
-                original_header = self.headers[matched_index]
-                return original_header
-
-        return None
-
-    def normalize_unicode(self, text):
-        text = unicodedata.normalize('NFC', text)
-        return self.clean_turkish(text)
-    
-    def sort_bet_options(self, odds_text):
-        pattern = r'\(([^,]+),\s*([\d.]+)\)'
-        matches = re.findall(pattern, odds_text)
-
-        data_dict = {}
-        for match in matches:
-            key = re.sub(r'\s+', ' ', match[0].strip().replace('/', ' / '))
-            if key != "- / -":
-                data_dict[key] = float(match[1])
-
-        sorted_data = []
-        for bet_key in self.bet_options_order:
-            if bet_key in data_dict:
-                sorted_data.append((bet_key, data_dict[bet_key]))
-
-        sorted_odds = ', '.join(f"({k}, {v:.2f})" for k, v in sorted_data)
-        print(f"Sorted odds: {len(sorted_data)}")
-        return sorted_odds
+        return self.header_matcher.match(extracted_text, threshold)
 
 
 def main():
-    print("Starting Makcolik Odds Scraper...")
+    setup_logging()
+    log.info("Starting Makcolik Odds Scraper...")
     
     root = tb.Window()
     app = MainUI(root)
@@ -1534,11 +1879,14 @@ def main():
     try:
         root.mainloop()
     except KeyboardInterrupt:
-        print("Application interrupted")
+        log.info("Application interrupted")
     except Exception as e:
-        print(f"Application error: {e}")
+        log.exception("Application error: %s", e)
     finally:
-        print("Application closed")
+        log.info("Application closed")
+        shutdown_logging()
 
 if __name__ == "__main__":
+    # frame workers are spawned processes; the frozen build must not start another window in them
+    multiprocessing.freeze_support()
     main()
\ No newline at end of file
@@ -0,0 +1,145 @@
+import os
+import sys
+import threading
+from collections import OrderedDict
+import numpy as np
+from app_logging import get_logger
+
+log = get_logger("memory_budget")
+
+MB = 1024 * 1024
+
+
+def nbytes(obj):
+    if obj is None:
+        return 0
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes
+    if isinstance(obj, (list, tuple)):
+        return sum(nbytes(item) for item in obj)
+    if isinstance(obj, dict):
+        return sum(nbytes(item) for item in obj.values())
+    if hasattr(obj, "size") and hasattr(obj, "getbands"):
+        width, height = obj.size
+        return width * height * len(obj.getbands())
+    if hasattr(obj, "width") and hasattr(obj, "height"):
+        # PhotoImage: Tk keeps a 32-bit copy
+        return obj.width() * obj.height() * 4
+    return 0
+
+
+def process_rss():
+    # resident set size in bytes, without psutil so it also works in the frozen build
+    try:
+        if sys.platform == "win32":
+            import ctypes
+            from ctypes import wintypes
+
+            class Counters(ctypes.Structure):
+                _fields_ = [
+                    ("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD),
+                    ("PeakWorkingSetSize", ctypes.c_size_t), ("WorkingSetSize", ctypes.c_size_t),
+                    ("QuotaPeakPagedPoolUsage", ctypes.c_size_t), ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t), ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                    ("PagefileUsage", ctypes.c_size_t), ("PeakPagefileUsage", ctypes.c_size_t),
+                ]
+
+            counters = Counters()
+            counters.cb = ctypes.sizeof(Counters)
+            process = ctypes.windll.kernel32.GetCurrentProcess()
+            ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb)
+            return counters.WorkingSetSize
+        with open("/proc/self/statm", "r") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except Exception:
+        try:
+            import resource
+            # ru_maxrss is the peak, in KB on Linux and bytes on macOS
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            return peak if sys.platform == "darwin" else peak * 1024
+        except Exception:
+            return 0
+
+
+class MemoryBudget:
+    # bytes held per subsystem; past a subsystem's cap its oldest evictable entries are dropped
+    def __init__(self, caps_mb=None):
+        self.caps = {name: int(mb * MB) for name, mb in (caps_mb or {}).items()}
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.peaks = {}
+        self.evictions = {}
+
+    def set(self, subsystem, key, size, on_evict=None):
+        evicted = []
+        with self._lock:
+            entries = self._entries.setdefault(subsystem, OrderedDict())
+            entries.pop(key, None)
+            entries[key] = (size, on_evict)
+            total = sum(entry[0] for entry in entries.values())
+            cap = self.caps.get(subsystem)
+            if cap is not None:
+                # the new entry itself goes too when it alone does not fit
+                for old_key in list(entries):
+                    if total <= cap:
+                        break
+                    old_size, callback = entries[old_key]
+                    if callback is None:
+                        continue
+                    del entries[old_key]
+                    total -= old_size
+                    evicted.append((old_key, callback))
+                    self.evictions[subsystem] = self.evictions.get(subsystem, 0) + 1
+            self.peaks[subsystem] = max(self.peaks.get(subsystem, 0), total)
+        # callbacks run outside the lock, they usually discard() in turn
+        for old_key, callback in evicted:
+            try:
+                callback(old_key)
+            except Exception as e:
+                log.error("Memory eviction error in %s: %s", subsystem, e)
+
+    def discard(self, subsystem, key):
+        with self._lock:
+            entries = self._entries.get(subsystem)
+            if entries is not None:
+                entries.pop(key, None)
+
+    def clear(self, subsystem):
+        with self._lock:
+            self._entries.pop(subsystem, None)
+
+    def usage(self, subsystem):
+        with self._lock:
+            return sum(entry[0] for entry in self._entries.get(subsystem, {}).values())
+
+    def over(self, subsystem, extra=0):
+        # a subsystem holding nothing always admits one entry, however large
+        cap = self.caps.get(subsystem)
+        usage = self.usage(subsystem)
+        return cap is not None and usage > 0 and usage + extra > cap
+
+    def report(self):
+        with self._lock:
+            names = sorted(set(self._entries) | set(self.caps))
+            rows = []
+            for name in names:
+                entries = self._entries.get(name, {})
+                rows.append({
+                    "subsystem": name,
+                    "bytes": sum(entry[0] for entry in entries.values()),
+                    "entries": len(entries),
+                    "peak": self.peaks.get(name, 0),
+                    "cap": self.caps.get(name),
+                    "evictions": self.evictions.get(name, 0),
+                })
+        return rows
+
+    def summary(self):
+        parts = []
+        for row in self.report():
+            cap = f"/{row['cap'] / MB:.0f}" if row["cap"] is not None else ""
+            part = f"{row['subsystem']} {row['bytes'] / MB:.1f}{cap} MB (peak {row['peak'] / MB:.1f}"
+            if row["evictions"]:
+                part += f", {row['evictions']} dropped"
+            parts.append(part + ")")
+        return f"Memory: RSS {process_rss() / MB:.0f} MB | " + " | ".join(parts)
@@ -0,0 +1,179 @@
+import glob
+import json
+import os
+import platform
+import subprocess
+import sys
+import app_config
+import rec_quantization
+from app_logging import get_logger
+
+log = get_logger("ocr_backend")
+
+BACKENDS = ("paddle", "onnx")
+ONNX_MODELS = ("det", "rec", "cls")
+PADDLE_MODEL_ROOT = os.path.join(os.path.expanduser("~"), ".paddleocr", "whl")
+PROFILE_FILE = "ocr_profile.json"
+PROFILE_KEYS = ("threads", "workers", "rec_batch_num", "enable_mkldnn")
+
+
+def base_options(threads=8):
+    return dict(
+        use_angle_cls=True,
+        lang='tr',
+        show_log=False,
+        cpu_threads=threads,
+        enable_mkldnn=True,
+        det_db_score_mode="slow",
+        det_limit_side_len=5880,
+        det_db_box_thresh=0.1,
+        det_db_thresh=0.1,
+        rec_batch_num=16,
+        det_db_unclip_ratio=2,
+        max_text_length=200,
+        drop_score=0.1,
+    )
+
+
+def machine_id():
+    return f"{platform.node()}|{platform.machine()}|{platform.processor()}|{os.cpu_count()}"
+
+
+def load_profile(backend=None):
+    # settings the autotuner found best on this machine; a profile copied from another machine is ignored
+    if not app_config.get("ocr_profile", True):
+        return {}
+    path = app_config.app_path(PROFILE_FILE)
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            profile = json.load(file)
+    except Exception as e:
+        log.error("OCR profile load error: %s", e)
+        return {}
+    if profile.get("machine") != machine_id():
+        log.info("OCR profile was tuned on another machine, ignoring it")
+        return {}
+    if backend is not None and profile.get("backend") != backend:
+        return {}
+    return {key: profile["settings"][key] for key in PROFILE_KEYS if key in profile.get("settings", {})}
+
+
+def save_profile(backend, settings, results):
+    path = app_config.app_path(PROFILE_FILE)
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump({"machine": machine_id(), "backend": backend, "settings": settings, "results": results}, file, indent=4)
+    return path
+
+
+def onnx_model_paths(model_dir):
+    return {name: os.path.join(model_dir, f"{name}.onnx") for name in ONNX_MODELS}
+
+
+def session_options(threads, inter_threads=1):
+    import onnxruntime as ort
+
+    options = ort.SessionOptions()
+    options.intra_op_num_threads = threads
+    options.inter_op_num_threads = inter_threads
+    options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    return options
+
+
+def rec_precision_for(model_dir):
+    if not app_config.get("ocr_rec_int8", False):
+        return "fp32"
+    allowed = rec_quantization.int8_allowed(model_dir, app_config.get("int8_max_accuracy_drop", 0.005))
+    return "int8" if allowed else "fp32"
+
+
+def create_ocr(backend=None, threads=None, rec_precision=None, **overrides):
+    # both backends share PaddleOCR's pre- and post-processing, only the predictors differ
+    from paddleocr import PaddleOCR
+
+    backend = backend or app_config.get("ocr_backend", "paddle")
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown OCR backend: {backend}")
+    profile = load_profile(backend)
+    threads = threads or profile.get("threads") or app_config.get("ocr_threads", 8)
+
+    options = base_options(threads)
+    for key in ("rec_batch_num", "enable_mkldnn"):
+        if key in profile:
+            options[key] = profile[key]
+    if backend == "onnx":
+        model_dir = app_config.app_path(app_config.get("onnx_model_dir", "models/onnx"))
+        paths = onnx_model_paths(model_dir)
+        rec_precision = rec_precision or rec_precision_for(model_dir)
+        if rec_precision == "int8":
+            paths["rec"] = rec_quantization.int8_paths(model_dir)[0]
+        missing = [path for path in paths.values() if not os.path.exists(path)]
+        if missing:
+            raise FileNotFoundError(f"ONNX models missing, run 'python ocr_bench.py export': {missing}")
+        options.update(
+            use_onnx=True,
+            enable_mkldnn=False,
+            det_model_dir=paths["det"],
+            rec_model_dir=paths["rec"],
+            cls_model_dir=paths["cls"],
+        )
+    options.update(overrides)
+
+    ocr = PaddleOCR(**options)
+    if backend == "onnx":
+        tune_onnx_sessions(ocr, options, threads, app_config.get("onnx_inter_op_threads", 1))
+    log.info("OCR backend %s loaded with %d threads (rec %s)", backend, threads, rec_precision or "fp32")
+    return ocr
+
+
+def tune_onnx_sessions(ocr, options, threads, inter_threads=1):
+    # PaddleOCR builds its onnxruntime sessions with default options; rebuild them with ours
+    import onnxruntime as ort
+
+    predictors = (
+        ("det", getattr(ocr, "text_detector", None)),
+        ("rec", getattr(ocr, "text_recognizer", None)),
+        ("cls", getattr(ocr, "text_classifier", None)),
+    )
+    for name, predictor in predictors:
+        if predictor is None:
+            continue
+        predictor.predictor = ort.InferenceSession(
+            options[f"{name}_model_dir"],
+            sess_options=session_options(threads, inter_threads),
+            providers=["CPUExecutionProvider"],
+        )
+
+
+def find_paddle_model(kind, root=PADDLE_MODEL_ROOT):
+    # the inference model PaddleOCR downloaded for this kind, e.g. ~/.paddleocr/whl/rec/latin/latin_PP-OCRv3_rec_infer
+    candidates = sorted(glob.glob(os.path.join(root, kind, "**", "inference.pdmodel"), recursive=True))
+    if not candidates:
+        raise FileNotFoundError(f"No downloaded paddle {kind} model under {root}, start the app once first")
+    if len(candidates) > 1:
+        log.warning("Several %s models found, using %s", kind, candidates[-1])
+    return os.path.dirname(candidates[-1])
+
+
+def export_onnx(model_dir=None, opset=11):
+    model_dir = app_config.app_path(model_dir or app_config.get("onnx_model_dir", "models/onnx"))
+    os.makedirs(model_dir, exist_ok=True)
+    for kind, path in onnx_model_paths(model_dir).items():
+        source = find_paddle_model(kind)
+        subprocess.run(
+            [
+                sys.executable, "-m", "paddle2onnx.command",
+                "--model_dir", source,
+                "--model_filename", "inference.pdmodel",
+                "--params_filename", "inference.pdiparams",
+                "--save_file", path,
+                "--opset_version", str(opset),
+                "--enable_onnx_checker", "True",
+            ],
+            check=True,
+        )
+        log.info("Exported %s model %s to %s", kind, source, path)
+    return model_dir
+
@@ -0,0 +1,268 @@
+import argparse
+import itertools
+import os
+import sys
+import threading
+import time
+import app_config
+import extract_text
+import ocr_backend
+import rec_quantization
+from app_logging import get_logger, setup_logging, shutdown_logging
+from crop_recorder import load_crops
+from frame_trace import LatencyStats
+from ocr_policy import DEFAULT_STAGES
+
+log = get_logger("ocr_bench")
+
+STAGES = dict(DEFAULT_STAGES)
+
+
+def edit_distance(a, b):
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        previous = current
+    return previous[-1]
+
+
+def evaluate(ocr, crops, stage="upscale", warmup=3):
+    # reads every crop like the app does and scores it against the recorded texts
+    preprocess = STAGES[stage]
+    images = [preprocess(image) for image, _ in crops]
+    for image in images[:warmup]:
+        extract_text.get_odds_data(image, ocr)
+
+    latency = LatencyStats()
+    reads = []
+    started = time.perf_counter()
+    for image in images:
+        t0 = time.perf_counter()
+        texts, _ = extract_text.get_odds_data(image, ocr)
+        latency.add((time.perf_counter() - t0) * 1000.0)
+        reads.append(texts)
+    elapsed = time.perf_counter() - started
+
+    pct = latency.percentiles()
+    result = score(crops, reads)
+    result.update(
+        crops_per_sec=len(crops) / elapsed if elapsed else 0.0,
+        p50_ms=pct[50],
+        p95_ms=pct[95],
+    )
+    return result
+
+
+def score(crops, reads):
+    chars = errors = exact_values = 0
+    for (_, expected), texts in zip(crops, reads):
+        reference = "|".join(expected)
+        chars += len(reference)
+        errors += edit_distance(reference, "|".join(texts))
+        exact_values += texts[1] == expected[1]
+    return {
+        "crops": len(crops),
+        "char_accuracy": 1.0 - errors / max(chars, 1),
+        "value_accuracy": exact_values / max(len(crops), 1),
+        "reads": reads,
+    }
+
+
+def parallel_throughput(instances, images):
+    # one thread per OCR instance, each reading its share of the crops like a pipeline worker would
+    workers = len(instances)
+    chunks = [list(range(i, len(images), workers)) for i in range(workers)]
+    reads = [None] * len(images)
+
+    def run(ocr, indices):
+        for index in indices:
+            reads[index] = extract_text.get_odds_data(images[index], ocr)[0]
+
+    threads = [threading.Thread(target=run, args=(ocr, indices)) for ocr, indices in zip(instances, chunks)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    return len(images) / elapsed if elapsed else 0.0, reads
+
+
+def format_result(name, result):
+    return (f"{name:<12} acc {result['char_accuracy'] * 100:6.2f}%  values {result['value_accuracy'] * 100:6.2f}%  "
+            f"{result['crops_per_sec']:7.1f} crops/s  p50 {result['p50_ms']:.1f} ms  p95 {result['p95_ms']:.1f} ms")
+
+
+def agreement(a, b):
+    return sum(x[1] == y[1] for x, y in zip(a["reads"], b["reads"])) / max(len(a["reads"]), 1)
+
+
+def recorded_crops(args):
+    crops = load_crops(args.crops, args.limit)
+    if not crops:
+        print(f"No recorded crops in {args.crops}, enable record_crops and run a session first")
+    return crops
+
+
+def compare(args):
+    crops = recorded_crops(args)
+    if not crops:
+        return 1
+
+    results = {}
+    for backend in args.backends:
+        ocr = ocr_backend.create_ocr(backend, threads=args.threads)
+        results[backend] = evaluate(ocr, crops, args.stage)
+        print(format_result(backend, results[backend]))
+    if len(results) == 2:
+        first, second = results.values()
+        print(f"value agreement between backends: {agreement(first, second) * 100:.2f}%")
+    return 0
+
+
+def model_dir():
+    return app_config.app_path(app_config.get("onnx_model_dir", "models/onnx"))
+
+
+def quantize(args):
+    crops = recorded_crops(args)
+    if not crops:
+        return 1
+    ocr = ocr_backend.create_ocr("onnx", rec_precision="fp32")
+    inputs = rec_quantization.collect_rec_inputs(ocr, crops, args.calibration_lines)
+    fp32_path = ocr_backend.onnx_model_paths(model_dir())["rec"]
+    print(rec_quantization.quantize_rec(fp32_path, model_dir(), inputs))
+    print("run 'python ocr_bench.py eval-int8' before enabling ocr_rec_int8")
+    return 0
+
+
+def eval_int8(args):
+    crops = recorded_crops(args)
+    if not crops:
+        return 1
+    results = {}
+    for precision in ("fp32", "int8"):
+        ocr = ocr_backend.create_ocr("onnx", threads=args.threads, rec_precision=precision)
+        results[precision] = evaluate(ocr, crops, args.stage)
+        print(format_result(precision, results[precision]))
+
+    report = rec_quantization.write_report(model_dir(), results["fp32"], results["int8"], args.max_drop)
+    speedup = report["int8_crops_per_sec"] / max(report["fp32_crops_per_sec"], 1e-9)
+    print(f"value agreement: {agreement(results['fp32'], results['int8']) * 100:.2f}%  speedup x{speedup:.2f}")
+    print("INT8 recognizer " + ("PASSED" if report["passed"] else "FAILED") +
+          f" the accuracy gate (max drop {args.max_drop * 100:.2f}%)")
+    return 0 if report["passed"] else 2
+
+
+def sweep_grid(backend, cores, threads_options=None, workers_options=None, batch_options=None):
+    threads_options = threads_options or sorted({t for t in (1, 2, 4, 6, 8, 12, 16, 24, 32) if t <= cores} | {cores})
+    workers_options = workers_options or [w for w in (1, 2, 3, 4, 6, 8) if w <= cores]
+    batch_options = batch_options or [1, 6, 16]
+    mkldnn_options = [True, False] if backend == "paddle" else [False]
+    for threads, batch, mkldnn in itertools.product(threads_options, batch_options, mkldnn_options):
+        # oversubscribing the cores only measures contention
+        workers = [w for w in workers_options if w * threads <= cores]
+        if workers:
+            yield threads, batch, mkldnn, workers
+
+
+def autotune(args):
+    crops = recorded_crops(args)
+    if not crops:
+        return 1
+    backend = args.backend or app_config.get("ocr_backend", "paddle")
+    cores = os.cpu_count() or 4
+    images = [STAGES[args.stage](image) for image, _ in crops]
+
+    results = []
+    for threads, batch, mkldnn, workers_options in sweep_grid(
+            backend, cores, args.threads, args.workers, args.batch):
+        # instances are reused across worker counts, only building them is expensive
+        instances = [
+            ocr_backend.create_ocr(backend, threads=threads, rec_batch_num=batch, enable_mkldnn=mkldnn)
+            for _ in range(max(workers_options))
+        ]
+        for ocr in instances:
+            for image in images[:3]:
+                extract_text.get_odds_data(image, ocr)
+        for workers in workers_options:
+            crops_per_sec, reads = parallel_throughput(instances[:workers], images)
+            accuracy = score(crops, reads)["char_accuracy"]
+            settings = {"threads": threads, "workers": workers, "rec_batch_num": batch, "enable_mkldnn": mkldnn}
+            results.append({"settings": settings, "crops_per_sec": crops_per_sec, "char_accuracy": accuracy})
+            print(f"threads {threads:>2}  workers {workers}  batch {batch:>2}  mkldnn {str(mkldnn):<5}  "
+                  f"{crops_per_sec:7.1f} crops/s  acc {accuracy * 100:6.2f}%")
+        del instances
+
+    # a faster setting that reads worse is not an improvement
+    best_accuracy = max(r["char_accuracy"] for r in results)
+    eligible = [r for r in results if r["char_accuracy"] >= best_accuracy - args.max_drop]
+    best = max(eligible, key=lambda r: r["crops_per_sec"])
+    path = ocr_backend.save_profile(backend, best["settings"], sorted(results, key=lambda r: -r["crops_per_sec"]))
+    print(f"best: {best['settings']} at {best['crops_per_sec']:.1f} crops/s, saved to {path}")
+    return 0
+
+
+def export(args):
+    print(ocr_backend.export_onnx(args.model_dir, args.opset))
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="OCR backend tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+    default_crops = app_config.app_path(app_config.get("crop_dir", "crops"))
+
+    command = commands.add_parser("export", help="export the downloaded paddle models to ONNX")
+    command.add_argument("--model-dir", default=None)
+    command.add_argument("--opset", type=int, default=11)
+    command.set_defaults(run=export)
+
+    command = commands.add_parser("compare", help="accuracy and latency of OCR backends on recorded crops")
+    command.add_argument("--crops", default=default_crops)
+    command.add_argument("--backends", nargs="+", default=list(ocr_backend.BACKENDS), choices=ocr_backend.BACKENDS)
+    command.add_argument("--stage", default="upscale", choices=sorted(STAGES))
+    command.add_argument("--threads", type=int, default=None)
+    command.add_argument("--limit", type=int, default=None)
+    command.set_defaults(run=compare)
+
+    command = commands.add_parser("quantize", help="build an INT8 recognizer calibrated on recorded crops")
+    command.add_argument("--crops", default=default_crops)
+    command.add_argument("--limit", type=int, default=None)
+    command.add_argument("--calibration-lines", type=int, default=300)
+    command.set_defaults(run=quantize)
+
+    command = commands.add_parser("eval-int8", help="score the INT8 recognizer against FP32 and record the gate")
+    command.add_argument("--crops", default=default_crops)
+    command.add_argument("--stage", default="upscale", choices=sorted(STAGES))
+    command.add_argument("--threads", type=int, default=None)
+    command.add_argument("--limit", type=int, default=None)
+    command.add_argument("--max-drop", type=float, default=app_config.get("int8_max_accuracy_drop", 0.005))
+    command.set_defaults(run=eval_int8)
+
+    command = commands.add_parser("autotune", help="sweep OCR threads, workers, batch size and MKL-DNN on this machine")
+    command.add_argument("--crops", default=default_crops)
+    command.add_argument("--backend", default=None, choices=ocr_backend.BACKENDS)
+    command.add_argument("--stage", default="upscale", choices=sorted(STAGES))
+    command.add_argument("--limit", type=int, default=200)
+    command.add_argument("--threads", type=int, nargs="+", default=None)
+    command.add_argument("--workers", type=int, nargs="+", default=None)
+    command.add_argument("--batch", type=int, nargs="+", default=None)
+    command.add_argument("--max-drop", type=float, default=0.005)
+    command.set_defaults(run=autotune)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    setup_logging()
+    try:
+        return args.run(args)
+    finally:
+        shutdown_logging()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,201 @@
+import json
+import os
+import re
+import threading
+from difflib import SequenceMatcher
+import app_config
+from app_logging import get_logger
+
+log = get_logger("ocr_corrections")
+
+DEFAULT_CORRECTIONS = {
+    'ılk': 'ilk',
+    '1lk': 'İlk',
+    'ilk': 'İlk',
+    'Ilk': 'İlk',
+    'Mac': 'Maç',
+    'Maq': 'Maç',
+    'mac': 'maç',
+    'maq': 'maç',
+    'Sans': 'Şans',
+    'sans': 'şans',
+    'Cifte': 'Çifte',
+    'Cift': 'Çift',
+    'cifte': 'çifte',
+    'Yari': 'Yarı',
+    'Yarl': 'Yarı',
+    'yari': 'yarı',
+    '$ans': 'şans',
+    'karsilikli': 'Karşılıklı',
+    'Araligi': 'Aralığı',
+    'Karsilikll': 'Karşılıklı',
+    'üst': 'Üst',
+    'Us0': 'Üst',
+    'Ost': 'Üst',
+    '0st': 'Üst',
+}
+
+LEARNED_CORRECTIONS_FILE = "learned_corrections.json"
+TOKEN_PATTERN = re.compile(r'[\w$]+')
+
+
+def _trie(words):
+    trie = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = True
+
+    def build(node):
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch != ""]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        # greedy optional tail keeps leftmost-longest semantics ("Cifte" before "Cift")
+        return "(?:" + body + ")?" if "" in node else body
+
+    return build(trie)
+
+
+def _trie_pattern(words, bounded=()):
+    # bounded words only match as whole tokens, the rest anywhere in the text
+    parts = []
+    if bounded:
+        parts.append(r"(?<![\w$])(?:" + _trie(bounded) + r")(?![\w$])")
+    free = [word for word in words if word not in bounded]
+    if free:
+        parts.append(_trie(free))
+    return re.compile("|".join(parts)) if parts else None
+
+
+def _resolve(corrections):
+    # sequential str.replace let earlier results feed later rules ('ılk' -> 'ilk' -> 'İlk');
+    # fold those chains into the table so one pass gives the same output
+    items = list(corrections.items())
+    resolved = {}
+    for i, (wrong, correct) in enumerate(items):
+        for later_wrong, later_correct in items[i + 1:]:
+            correct = correct.replace(later_wrong, later_correct)
+        if wrong != correct:
+            resolved[wrong] = correct
+    return resolved
+
+
+class CorrectionEngine:
+    def __init__(self, corrections=None, learned_path=LEARNED_CORRECTIONS_FILE, vocabulary=()):
+        self._lock = threading.Lock()
+        # next to the executable like the other runtime files, not wherever the app was started from
+        self.learned_path = app_config.app_path(learned_path) if learned_path else None
+        self.base = dict(DEFAULT_CORRECTIONS if corrections is None else corrections)
+        self.vocabulary = self._vocabulary(vocabulary)
+        self.learned = self._load_learned()
+        self._compile()
+
+    def _load_learned(self):
+        if not self.learned_path or not os.path.exists(self.learned_path):
+            return {}
+        try:
+            with open(self.learned_path, 'r', encoding='utf-8') as file:
+                data = json.load(file)
+                return {str(k): str(v) for k, v in data.items()}
+        except Exception as e:
+            log.error("Learned corrections load error: %s", e)
+            return {}
+
+    def _save_learned(self):
+        if not self.learned_path:
+            return
+        try:
+            with open(self.learned_path, 'w', encoding='utf-8') as file:
+                json.dump(self.learned, file, ensure_ascii=False, indent=4)
+        except Exception as e:
+            log.error("Learned corrections save error: %s", e)
+
+    @staticmethod
+    def _vocabulary(texts):
+        return {token.casefold() for text in texts for token in TOKEN_PATTERN.findall(text or "")}
+
+    def _compile(self):
+        # a learned pair whose wrong side is a catalog word would rewrite correct reads; kept on disk, not applied
+        learned = {wrong: correct for wrong, correct in self.learned.items() if wrong.casefold() not in self.vocabulary}
+        table = _resolve({**self.base, **learned})
+
+        folded = {}
+        for wrong, correct in table.items():
+            key = wrong.lower()
+            value = correct.lower()
+            if key != value and key not in folded:
+                folded[key] = value
+
+        # learned pairs come from single tokens, so they only replace whole tokens
+        bounded = set(learned) - set(self.base)
+        folded_bounded = {wrong.lower() for wrong in bounded} - {wrong.lower() for wrong in self.base}
+        pattern = _trie_pattern(table, bounded)
+        folded_pattern = _trie_pattern(folded, folded_bounded)
+
+        with self._lock:
+            self._table = table
+            self._pattern = pattern
+            self._folded = folded
+            self._folded_pattern = folded_pattern
+
+    def load(self, corrections, vocabulary=None):
+        self.base = dict(DEFAULT_CORRECTIONS if corrections is None else corrections)
+        if vocabulary is not None:
+            self.vocabulary = self._vocabulary(vocabulary)
+        self._compile()
+
+    def apply(self, text):
+        if not text:
+            return ""
+        pattern, table = self._pattern, self._table
+        if pattern is None:
+            return text
+        return pattern.sub(lambda m: table[m.group(0)], text)
+
+    def apply_folded(self, text):
+        if not text:
+            return ""
+        pattern, table = self._folded_pattern, self._folded
+        if pattern is None:
+            return text
+        return pattern.sub(lambda m: table[m.group(0)], text)
+
+    def learn(self, ocr_text, new_text):
+        # ocr_text must be what OCR read, before any correction; learning from a corrected label would
+        # turn a user's change of option (MS1 -> MS2) into a rule
+        old_tokens = TOKEN_PATTERN.findall(ocr_text or "")
+        new_tokens = TOKEN_PATTERN.findall(new_text or "")
+        if not old_tokens or not new_tokens:
+            return []
+
+        pairs = []
+        matcher = SequenceMatcher(None, old_tokens, new_tokens, autojunk=False)
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            if tag != 'replace' or (i2 - i1) != (j2 - j1):
+                continue
+            for wrong, correct in zip(old_tokens[i1:i2], new_tokens[j1:j2]):
+                if not self._is_confusion(wrong, correct):
+                    continue
+                if self._table.get(wrong) == correct or self.learned.get(wrong) == correct:
+                    continue
+                pairs.append((wrong, correct))
+
+        if pairs:
+            for wrong, correct in pairs:
+                self.learned[wrong] = correct
+            self._compile()
+            self._save_learned()
+        return pairs
+
+    def _is_confusion(self, wrong, correct):
+        if wrong == correct or len(wrong) < 2:
+            return False
+        # a catalog word read where another was meant is a different option, not a misread
+        if wrong.casefold() in self.vocabulary:
+            return False
+        # odds values change legitimately between reads, only letter-bearing tokens are confusions
+        if not any(ch.isalpha() for ch in correct):
+            return False
+        return SequenceMatcher(None, wrong.lower(), correct.lower()).ratio() >= 0.5
@@ -0,0 +1,99 @@
+import math
+import threading
+import cv2
+import numpy as np
+
+MISSING_CONFIDENCE = 0.0
+
+SHARPEN_KERNEL = np.array([[0, -1, 0],
+                           [-1, 5, -1],
+                           [0, -1, 0]])
+
+
+def to_gray(image):
+    if image.ndim == 2:
+        return image
+    return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+
+
+def upscale_sharpen(image, scale=2):
+    gray = to_gray(image)
+    height, width = gray.shape[:2]
+    resized = cv2.resize(gray, (width * scale, height * scale), interpolation=cv2.INTER_CUBIC)
+    return cv2.filter2D(resized, -1, SHARPEN_KERNEL)
+
+
+def upscale_binarize(image, scale=3):
+    gray = to_gray(image)
+    height, width = gray.shape[:2]
+    resized = cv2.resize(gray, (width * scale, height * scale), interpolation=cv2.INTER_CUBIC)
+    _, binary = cv2.threshold(resized, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    # keep dark text on a light background whatever the theme of the site
+    if cv2.countNonZero(binary) < binary.size // 2:
+        binary = cv2.bitwise_not(binary)
+    return binary
+
+
+DEFAULT_STAGES = (
+    ("gray", to_gray),
+    ("upscale", upscale_sharpen),
+    ("binarize", upscale_binarize),
+)
+
+
+def cell_confidence(confidences):
+    # the value decides a cell, a missing option label is normal for single-text cells
+    value = confidences[1] if len(confidences) > 1 else MISSING_CONFIDENCE
+    return MISSING_CONFIDENCE if value is None or math.isnan(value) else value
+
+
+class ReadPolicy:
+    def __init__(self, reader, threshold=0.9, stages=DEFAULT_STAGES):
+        self.reader = reader
+        self.threshold = threshold
+        self.stages = tuple(stages)
+        self._lock = threading.Lock()
+        self.cells = 0
+        self.reads = 0
+        self.accepted = {name: 0 for name, _ in self.stages}
+        self.below_threshold = 0
+
+    def read(self, image, skip=()):
+        # returns (texts, confidences, stage) of the best read, escalating only while below threshold
+        best = None
+        reads = 0
+        for name, preprocess in self.stages:
+            if name in skip:
+                continue
+            texts, confidences = self.reader(preprocess(image))
+            reads += 1
+            confidence = cell_confidence(confidences)
+            if best is None or confidence > best[3]:
+                best = (texts, confidences, name, confidence)
+            if confidence >= self.threshold:
+                break
+        if best is None:
+            return None
+
+        with self._lock:
+            self.cells += 1
+            self.reads += reads
+            self.accepted[best[2]] += 1
+            if best[3] < self.threshold:
+                self.below_threshold += 1
+        return best[0], best[1], best[2]
+
+    def reset_stats(self):
+        with self._lock:
+            self.cells = 0
+            self.reads = 0
+            self.accepted = {name: 0 for name, _ in self.stages}
+            self.below_threshold = 0
+
+    def summary(self):
+        with self._lock:
+            if not self.cells:
+                return "OCR reads/cell: -"
+            shares = ", ".join(f"{name} {count * 100.0 / self.cells:.0f}%" for name, count in self.accepted.items())
+            return (f"OCR reads/cell: {self.reads / self.cells:.2f} ({shares}, "
+                    f"low {self.below_threshold * 100.0 / self.cells:.0f}%, n={self.cells})")
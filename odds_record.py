@@ -0,0 +1,184 @@
+import math
+import re
+from array import array
+
+UNKNOWN_ID = -1
+MISSING = float("nan")
+ODDS_PAIR_PATTERN = re.compile(r'\(([^,]+),\s*([^\)]+)\)')
+
+
+def _option_key(text):
+    return re.sub(r'\s+', '', text or "").casefold()
+
+
+def parse_value(text):
+    try:
+        return float((text or "").strip())
+    except ValueError:
+        return MISSING
+
+
+def format_value(value):
+    return "-" if math.isnan(value) else f"{value:.2f}"
+
+
+class MarketCatalog:
+    def __init__(self, headers_config=()):
+        self.headers = [item["header"] for item in headers_config]
+        self.options = [tuple(item["options"]) for item in headers_config]
+        # complete markets list mutually exclusive, exhaustive outcomes, so their implied probabilities sum to ~1
+        self.complete = [bool(item.get("complete", False)) for item in headers_config]
+        self.overround = [tuple(item["overround"]) if item.get("overround") else None for item in headers_config]
+        self.header_ids = {header: i for i, header in enumerate(self.headers)}
+        self._option_ids = [
+            {_option_key(option): j for j, option in enumerate(options)} for options in self.options
+        ]
+        self.offsets = []
+        self.column_names = []
+        for header, options in zip(self.headers, self.options):
+            self.offsets.append(len(self.column_names))
+            self.column_names.extend(f"{header} ~ {option}" for option in options)
+
+    def __len__(self):
+        return len(self.headers)
+
+    def header_id(self, header):
+        return self.header_ids.get(header, UNKNOWN_ID)
+
+    def option_id(self, header_id, option_text):
+        if header_id < 0:
+            return UNKNOWN_ID
+        return self._option_ids[header_id].get(_option_key(option_text), UNKNOWN_ID)
+
+    def option_label(self, header_id, option_id):
+        return self.options[header_id][option_id]
+
+    def fill_values(self, row, records, start=0, missing=None):
+        # row is a flat list laid out as column_names, shifted by start
+        for record in records:
+            header_id = self.header_id(record.header)
+            if header_id < 0:
+                continue
+            offset = start + self.offsets[header_id]
+            for j in range(len(record)):
+                # by label, the stored id may come from an older catalog; an unmatched label has no column
+                col = self.option_id(header_id, record.labels[j])
+                if col < 0:
+                    continue
+                value = record.values[j]
+                row[offset + col] = missing if math.isnan(value) else value
+        return row
+
+
+class OddsRecord:
+    __slots__ = ("header_id", "header", "option_ids", "labels", "values", "confidences", "frame_id", "ocr_header",
+                 "ocr_labels")
+
+    def __init__(self, header_id, header, option_ids=None, labels=(), values=None, confidences=None, frame_id=None,
+                 ocr_header="", ocr_labels=()):
+        self.header_id = header_id
+        self.header = header
+        self.option_ids = option_ids if option_ids is not None else array('h')
+        self.labels = tuple(labels)
+        self.values = values if values is not None else array('d')
+        self.confidences = confidences if confidences is not None else array('f', [MISSING] * len(self.values))
+        self.frame_id = frame_id
+        # what OCR read before corrections and catalog matching, empty when the record did not come from OCR
+        self.ocr_header = ocr_header
+        self.ocr_labels = tuple(ocr_labels)
+
+    def __len__(self):
+        return len(self.values)
+
+    @property
+    def confidence(self):
+        known = [c for c in self.confidences if not math.isnan(c)]
+        return min(known) if known else MISSING
+
+    def value_key(self):
+        return self.values.tobytes()
+
+    def with_header(self, catalog, header):
+        return build_record(catalog, header, self.labels, self.values, self.confidences, self.frame_id,
+                            self.ocr_header, self.ocr_labels)
+
+    def __repr__(self):
+        return f"OddsRecord(header={self.header!r}, cells={len(self)}, frame_id={self.frame_id})"
+
+
+def build_record(catalog, header, option_texts, values, confidences=None, frame_id=None, ocr_header="", ocr_labels=()):
+    header_id = catalog.header_id(header)
+    option_ids = array('h')
+    labels = []
+    for text in option_texts:
+        option_id = catalog.option_id(header_id, text)
+        option_ids.append(option_id)
+        labels.append(catalog.option_label(header_id, option_id) if option_id >= 0 else (text or "-"))
+    values = values if isinstance(values, array) else array('d', values)
+    if confidences is not None and not isinstance(confidences, array):
+        confidences = array('f', confidences)
+    return OddsRecord(header_id, header, option_ids, labels, values, confidences, frame_id, ocr_header, ocr_labels)
+
+
+def parse_odds_text(catalog, header, odds_text, frame_id=None):
+    pairs = ODDS_PAIR_PATTERN.findall(odds_text or "")
+    return build_record(
+        catalog,
+        header,
+        [opt.strip() for opt, _ in pairs],
+        [parse_value(val) for _, val in pairs],
+        frame_id=frame_id,
+    )
+
+
+def merge_records(catalog, header, records):
+    # later reads win for an option; unknown options cannot be placed and are dropped
+    header_id = catalog.header_id(header)
+    merged = {}
+    frame_id = None
+    ocr_header = ""
+    for record in records:
+        if record is None:
+            continue
+        frame_id = record.frame_id if frame_id is None else frame_id
+        ocr_header = ocr_header or record.ocr_header
+        for position, text in enumerate(record.labels):
+            value = record.values[position]
+            if math.isnan(value):
+                continue
+            option_id = catalog.option_id(header_id, text)
+            if option_id >= 0:
+                ocr_label = record.ocr_labels[position] if position < len(record.ocr_labels) else ""
+                merged[option_id] = (value, record.confidences[position], ocr_label)
+
+    ordered = sorted(merged.items())
+    return OddsRecord(
+        header_id,
+        header,
+        array('h', [option_id for option_id, _ in ordered]),
+        [catalog.option_label(header_id, option_id) for option_id, _ in ordered],
+        array('d', [value for _, (value, _, _) in ordered]),
+        array('f', [conf for _, (_, conf, _) in ordered]),
+        frame_id,
+        ocr_header,
+        [ocr_label for _, (_, _, ocr_label) in ordered],
+    )
+
+
+def format_odds(record):
+    if record is None or not len(record):
+        return ""
+
+    count = len(record)
+    chunk_size = 0
+    if count > 2:
+        chunk_size = 2 if count % 2 == 0 and count % 6 != 0 else 3
+
+    parts = []
+    for position in range(count):
+        parts.append(f"({record.labels[position]}, {format_value(record.values[position])})")
+        if position < count - 1:
+            parts.append(", ")
+        if chunk_size and (position + 1) % chunk_size == 0:
+            parts.append("\n")
+    return "".join(parts)
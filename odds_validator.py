@@ -0,0 +1,69 @@
+import math
+import threading
+from app_logging import get_logger
+
+log = get_logger("odds_validator")
+
+
+class OddsValidator:
+    def __init__(self, catalog, min_odds=1.01, max_odds=1000.0, overround=(0.98, 1.40), confidence_threshold=0.9):
+        self.catalog = catalog
+        self.min_odds = min_odds
+        self.max_odds = max_odds
+        self.overround = overround
+        self.confidence_threshold = confidence_threshold
+        self._lock = threading.Lock()
+        self.checked = 0
+        self.flagged = 0
+        self.fixed = 0
+
+    def check(self, record):
+        suspects = self.suspects(record)
+        with self._lock:
+            self.checked += 1
+            if suspects:
+                self.flagged += 1
+        return suspects
+
+    def suspects(self, record):
+        # positions worth one more read; empty when the market looks plausible or cannot be judged
+        header_id = self.catalog.header_id(record.header)
+        if header_id < 0 or not len(record):
+            return []
+
+        suspects = set()
+        seen = set()
+        for position in range(len(record)):
+            value = record.values[position]
+            option_id = record.option_ids[position]
+            if not math.isnan(value) and not self.min_odds <= value <= self.max_odds:
+                suspects.add(position)
+            if option_id < 0 or option_id in seen:
+                suspects.add(position)
+            seen.add(option_id)
+
+        num_options = len(self.catalog.options[header_id])
+        if (not suspects and self.catalog.complete[header_id] and len(record) == num_options
+                and len(seen) == num_options and not any(math.isnan(v) for v in record.values)):
+            low, high = self.catalog.overround[header_id] or self.overround
+            implied = sum(1.0 / value for value in record.values)
+            if not low <= implied <= high:
+                # the sum cannot tell which odd is wrong; doubtful cells are the likely culprits, else the whole market
+                doubtful = [
+                    position for position in range(len(record))
+                    if not record.confidences[position] >= self.confidence_threshold
+                ]
+                suspects.update(doubtful or range(len(record)))
+                log.debug("Overround %.3f out of bounds for %s", implied, record.header)
+        return sorted(suspects)
+
+    def mark_fixed(self):
+        with self._lock:
+            self.fixed += 1
+
+    def summary(self):
+        with self._lock:
+            if not self.checked:
+                return "Odds validation: -"
+            return (f"Odds validation: {self.flagged} of {self.checked} markets flagged "
+                    f"({self.flagged * 100.0 / self.checked:.1f}%), {self.fixed} fixed by a re-read")
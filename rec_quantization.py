@@ -0,0 +1,121 @@
+import hashlib
+import json
+import os
+import numpy as np
+from app_logging import get_logger
+
+log = get_logger("rec_quantization")
+
+INT8_MODEL = "rec.int8.onnx"
+INT8_REPORT = "rec.int8.json"
+
+
+def int8_paths(model_dir):
+    return os.path.join(model_dir, INT8_MODEL), os.path.join(model_dir, INT8_REPORT)
+
+
+def file_digest(path):
+    digest = hashlib.sha1()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def collect_rec_inputs(ocr, crops, limit=300):
+    # the recognizer sees text lines cut out by the detector, so calibrate on exactly those
+    from paddleocr.tools.infer.utility import get_rotate_crop_image
+
+    recognizer = ocr.text_recognizer
+    inputs = []
+    for image, _ in crops:
+        boxes, _ = ocr.text_detector(image)
+        for box in boxes if boxes is not None else []:
+            line = get_rotate_crop_image(image, np.array(box, dtype=np.float32))
+            height, width = line.shape[:2]
+            if not height or not width:
+                continue
+            norm = recognizer.resize_norm_img(line, width / float(height))
+            inputs.append(norm[np.newaxis, :].astype(np.float32))
+            if len(inputs) >= limit:
+                return inputs
+    return inputs
+
+
+class RecCalibrationReader:
+    def __init__(self, input_name, inputs):
+        self.input_name = input_name
+        self._inputs = iter(inputs)
+
+    def get_next(self):
+        batch = next(self._inputs, None)
+        return None if batch is None else {self.input_name: batch}
+
+
+def quantize_rec(fp32_path, model_dir, inputs):
+    import onnxruntime as ort
+    from onnxruntime.quantization import CalibrationMethod, QuantFormat, QuantType, quantize_static
+    from onnxruntime.quantization.shape_inference import quant_pre_process
+
+    int8_path, report_path = int8_paths(model_dir)
+    prepared_path = os.path.join(model_dir, "rec.prepared.onnx")
+    quant_pre_process(fp32_path, prepared_path)
+
+    input_name = ort.InferenceSession(prepared_path, providers=["CPUExecutionProvider"]).get_inputs()[0].name
+    quantize_static(
+        prepared_path,
+        int8_path,
+        RecCalibrationReader(input_name, inputs),
+        quant_format=QuantFormat.QDQ,
+        per_channel=True,
+        weight_type=QuantType.QInt8,
+        activation_type=QuantType.QUInt8,
+        calibrate_method=CalibrationMethod.Percentile,
+    )
+    os.remove(prepared_path)
+    # a new model invalidates the previous evaluation
+    if os.path.exists(report_path):
+        os.remove(report_path)
+    log.info("Quantized %s to %s with %d calibration lines", fp32_path, int8_path, len(inputs))
+    return int8_path
+
+
+def write_report(model_dir, fp32, int8, max_drop):
+    int8_path, report_path = int8_paths(model_dir)
+    report = {
+        "model_sha1": file_digest(int8_path),
+        "crops": int8["crops"],
+        "fp32_char_accuracy": fp32["char_accuracy"],
+        "int8_char_accuracy": int8["char_accuracy"],
+        "fp32_crops_per_sec": fp32["crops_per_sec"],
+        "int8_crops_per_sec": int8["crops_per_sec"],
+        "max_accuracy_drop": max_drop,
+    }
+    report["passed"] = report["fp32_char_accuracy"] - report["int8_char_accuracy"] <= max_drop
+    with open(report_path, "w", encoding="utf-8") as file:
+        json.dump(report, file, indent=4)
+    return report
+
+
+def int8_allowed(model_dir, max_drop):
+    # only a quantized model whose own evaluation stayed within max_drop of FP32 may be used
+    int8_path, report_path = int8_paths(model_dir)
+    if not os.path.exists(int8_path):
+        return False
+    if not os.path.exists(report_path):
+        log.warning("INT8 recognizer %s has not been evaluated, using FP32", int8_path)
+        return False
+    try:
+        with open(report_path, "r", encoding="utf-8") as file:
+            report = json.load(file)
+        if report["model_sha1"] != file_digest(int8_path):
+            log.warning("INT8 recognizer changed since its evaluation, using FP32")
+            return False
+        drop = report["fp32_char_accuracy"] - report["int8_char_accuracy"]
+    except Exception as e:
+        log.error("INT8 report error: %s", e)
+        return False
+    if drop > max_drop:
+        log.warning("INT8 recognizer loses %.2f%% char accuracy (limit %.2f%%), using FP32", drop * 100, max_drop * 100)
+        return False
+    return True
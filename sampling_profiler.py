@@ -0,0 +1,130 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from app_logging import get_logger
+
+log = get_logger("sampling_profiler")
+
+
+class SamplingProfiler:
+    # samples every thread's stack with sys._current_frames, so it works in the frozen build without any tooling
+    def __init__(self, interval=0.01, max_depth=64):
+        self.interval = interval
+        self.max_depth = max_depth
+        self.stacks = Counter()
+        self.samples = 0
+        self.elapsed = 0.0
+        self._labels = {}
+        self._thread = None
+        self._stop = threading.Event()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def _label(self, code):
+        label = self._labels.get(code)
+        if label is None:
+            label = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+            self._labels[code] = label
+        return label
+
+    def sample(self, own_ident):
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == own_ident:
+                continue
+            codes = []
+            while frame is not None and len(codes) < self.max_depth:
+                codes.append(frame.f_code)
+                frame = frame.f_back
+            # root first, as flamegraph tools expect
+            self.stacks[(names.get(ident, str(ident)),) + tuple(reversed(codes))] += 1
+        self.samples += 1
+
+    def run(self, duration):
+        own_ident = threading.get_ident()
+        started = time.perf_counter()
+        deadline = started + duration
+        while not self._stop.is_set():
+            self.sample(own_ident)
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            self._stop.wait(min(self.interval, remaining))
+        self.elapsed = time.perf_counter() - started
+
+    def start(self, duration, on_done=None):
+        def target():
+            try:
+                self.run(duration)
+            except Exception as e:
+                log.exception("Profiler error: %s", e)
+            if on_done is not None:
+                on_done(self)
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=target, name="SamplingProfiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def collapsed(self):
+        # Brendan Gregg's folded format: "thread;outer;...;leaf count", readable by flamegraph.pl and speedscope
+        lines = []
+        for stack, count in self.stacks.most_common():
+            frames = [stack[0].replace(";", ":")] + [self._label(code).replace(";", ":") for code in stack[1:]]
+            lines.append(";".join(frames) + f" {count}")
+        return lines
+
+    def top_functions(self, limit=30, include_idle=False):
+        # self = samples with the function on top of the stack, total = samples with it anywhere on the stack
+        own = Counter()
+        total = Counter()
+        for stack, count in self.stacks.items():
+            codes = stack[1:]
+            if not codes:
+                continue
+            if not include_idle and self._is_idle(codes[-1]):
+                continue
+            own[codes[-1]] += count
+            for code in set(codes):
+                total[code] += count
+        rows = [(self._label(code), own[code], total[code]) for code, _ in own.most_common(limit)]
+        return rows, sum(own.values())
+
+    def _is_idle(self, code):
+        # threads parked in a wait are sampled too but cost nothing; a bare mainloop frame is Tk waiting for events
+        return code.co_name in ("wait", "get", "sleep", "select", "_wait_for_tstate_lock", "acquire", "poll",
+                                "mainloop")
+
+    def write(self, out_dir):
+        os.makedirs(out_dir, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        folded_path = os.path.join(out_dir, f"profile_{stamp}.folded")
+        summary_path = os.path.join(out_dir, f"profile_{stamp}.txt")
+
+        with open(folded_path, "w", encoding="utf-8") as file:
+            file.write("\n".join(self.collapsed()) + "\n")
+
+        top, busy = self.top_functions()
+        thread_samples = Counter()
+        for stack, count in self.stacks.items():
+            thread_samples[stack[0]] += count
+        with open(summary_path, "w", encoding="utf-8") as file:
+            file.write(f"{self.samples} samples over {self.elapsed:.1f} s "
+                       f"(interval {self.interval * 1000:.0f} ms), {len(thread_samples)} threads\n\n")
+            file.write(f"{'self':>7} {'self%':>6} {'total':>7}  function (waiting threads excluded)\n")
+            for label, own, inclusive in top:
+                share = own * 100.0 / busy if busy else 0.0
+                file.write(f"{own:>7} {share:>5.1f}% {inclusive:>7}  {label}\n")
+            file.write("\nsamples per thread\n")
+            for name, count in thread_samples.most_common():
+                file.write(f"{count:>7}  {name}\n")
+
+        log.info("Profile of %d samples written to %s", self.samples, folded_path)
+        return folded_path, summary_path
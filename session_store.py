@@ -0,0 +1,333 @@
+import itertools
+import os
+import queue
+import sqlite3
+import threading
+import time
+from array import array
+from app_logging import get_logger
+from odds_record import OddsRecord
+
+log = get_logger("session_store")
+
+SCHEMA_VERSION = 3
+
+# statements that bring a store of that version to the next one
+MIGRATIONS = {
+    2: ("ALTER TABLE sessions ADD COLUMN exported_at REAL",),
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    teams TEXT NOT NULL DEFAULT '',
+    score_text TEXT NOT NULL DEFAULT '',
+    full_time_score TEXT NOT NULL DEFAULT '',
+    first_half_score TEXT NOT NULL DEFAULT '',
+    started_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    exported_at REAL
+);
+CREATE TABLE IF NOT EXISTS markets (
+    id INTEGER PRIMARY KEY,
+    session_id INTEGER NOT NULL REFERENCES sessions(id) ON DELETE CASCADE,
+    row_no INTEGER NOT NULL,
+    header_id INTEGER NOT NULL DEFAULT -1,
+    header TEXT NOT NULL DEFAULT '',
+    confidence REAL,
+    frame_id INTEGER,
+    captured_at REAL,
+    latency_ms REAL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_markets_session_header ON markets(session_id, header);
+CREATE INDEX IF NOT EXISTS idx_markets_session_row ON markets(session_id, row_no);
+CREATE TABLE IF NOT EXISTS odds (
+    market_id INTEGER NOT NULL REFERENCES markets(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    option_id INTEGER NOT NULL DEFAULT -1,
+    option TEXT NOT NULL,
+    value REAL,
+    confidence REAL,
+    PRIMARY KEY (market_id, position)
+);
+"""
+
+
+def split_scores(scores):
+    full_time = scores[0] if len(scores) > 0 else ""
+    first_half = scores[1] if len(scores) > 1 else ""
+    return full_time, first_half
+
+
+class SessionStore:
+    def __init__(self, path, max_batch=256, linger=0.05):
+        self.path = path
+        self.max_batch = max_batch
+        self.linger = linger
+        self._queue = queue.Queue()
+        self._read_lock = threading.Lock()
+
+        self._move_incompatible()
+        self._reader = self._connect()
+        self._migrate()
+        self._reader.executescript(SCHEMA)
+        self._reader.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self._reader.commit()
+
+        row = self._reader.execute("SELECT COALESCE(MAX(id), 0) FROM sessions").fetchone()
+        self._session_ids = itertools.count(row[0] + 1)
+        row = self._reader.execute("SELECT COALESCE(MAX(id), 0) FROM markets").fetchone()
+        self._market_ids = itertools.count(row[0] + 1)
+
+        self._writer = threading.Thread(target=self._writer_loop, name="SessionStoreWriter", daemon=True)
+        self._writer.start()
+
+    def _move_incompatible(self):
+        if not os.path.exists(self.path):
+            return
+        conn = sqlite3.connect(self.path)
+        try:
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            tables = conn.execute("SELECT COUNT(*) FROM sqlite_master WHERE type = 'table'").fetchone()[0]
+        finally:
+            conn.close()
+        if not tables or version == SCHEMA_VERSION or self._migratable(version):
+            return
+
+        backup = f"{self.path}.v{version}.bak"
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(self.path + suffix):
+                os.replace(self.path + suffix, backup + suffix)
+        log.warning("Session store schema v%d is outdated, moved to %s", version, backup)
+
+    @staticmethod
+    def _migratable(version):
+        while version in MIGRATIONS:
+            version += 1
+        return version == SCHEMA_VERSION
+
+    def _migrate(self):
+        version = self._reader.execute("PRAGMA user_version").fetchone()[0]
+        while version in MIGRATIONS:
+            for statement in MIGRATIONS[version]:
+                self._reader.execute(statement)
+            version += 1
+            log.info("Session store migrated to schema v%d", version)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        return conn
+
+    def _writer_loop(self):
+        conn = self._connect()
+        # transactions and savepoints are issued explicitly below
+        conn.isolation_level = None
+        running = True
+        while running:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.linger
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                try:
+                    if remaining > 0:
+                        batch.append(self._queue.get(timeout=remaining))
+                    else:
+                        batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            events = []
+            try:
+                conn.execute("BEGIN")
+                for op in batch:
+                    if op is None:
+                        running = False
+                    elif isinstance(op, threading.Event):
+                        events.append(op)
+                    else:
+                        self._apply(conn, op)
+                conn.execute("COMMIT")
+            except Exception as e:
+                log.exception("Session store write error: %s", e)
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+            for event in events:
+                event.set()
+        conn.close()
+
+    def _apply(self, conn, op):
+        # one savepoint per op: a failing op is rolled back on its own, the rest of the batch still commits
+        sql, params = op
+        conn.execute("SAVEPOINT op")
+        try:
+            if isinstance(params, list):
+                conn.executemany(sql, params)
+            else:
+                conn.execute(sql, params)
+        except sqlite3.Error as e:
+            conn.execute("ROLLBACK TO op")
+            shown = f"{len(params)} rows" if isinstance(params, list) else params
+            log.error("Session store op failed: %s | %s | %s", e, sql, shown)
+        finally:
+            conn.execute("RELEASE op")
+
+    def _submit(self, sql, params=()):
+        self._queue.put((sql, params))
+
+    def flush(self, timeout=5.0):
+        event = threading.Event()
+        self._queue.put(event)
+        return event.wait(timeout)
+
+    def close(self):
+        self.flush()
+        self._queue.put(None)
+        self._writer.join(timeout=5.0)
+        with self._read_lock:
+            self._reader.close()
+
+    def start_session(self, teams, scores=(), score_text=""):
+        session_id = next(self._session_ids)
+        full_time, first_half = split_scores(scores)
+        now = time.time()
+        self._submit(
+            "INSERT INTO sessions (id, teams, score_text, full_time_score, first_half_score, started_at, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (session_id, teams or "", score_text or "", full_time, first_half, now, now),
+        )
+        return session_id
+
+    def update_scores(self, session_id, scores, score_text=""):
+        full_time, first_half = split_scores(scores)
+        self._submit(
+            "UPDATE sessions SET score_text = ?, full_time_score = ?, first_half_score = ?, updated_at = ? WHERE id = ?",
+            (score_text or "", full_time, first_half, time.time(), session_id),
+        )
+
+    def add_market(self, session_id, row_no, record, trace=None, latency_ms=None):
+        market_id = next(self._market_ids)
+        frame_id = trace.frame_id if trace is not None else record.frame_id
+        captured_at = trace.captured_at if trace is not None else None
+        self._submit(
+            "INSERT INTO markets (id, session_id, row_no, header_id, header, confidence, frame_id, captured_at, latency_ms, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (market_id, session_id, row_no, record.header_id, record.header or "", _nullable(record.confidence),
+             frame_id, captured_at, latency_ms, time.time()),
+        )
+        self._write_odds(market_id, record)
+        self._touch(session_id)
+        return market_id
+
+    def update_market(self, market_id, row_no=None, record=None):
+        if row_no is not None:
+            self._submit("UPDATE markets SET row_no = ? WHERE id = ?", (row_no, market_id))
+        if record is not None:
+            self._submit(
+                "UPDATE markets SET header_id = ?, header = ?, confidence = ? WHERE id = ?",
+                (record.header_id, record.header or "", _nullable(record.confidence), market_id),
+            )
+            self._submit("DELETE FROM odds WHERE market_id = ?", (market_id,))
+            self._write_odds(market_id, record)
+
+    def mark_exported(self, session_ids, exported_at=None):
+        exported_at = exported_at or time.time()
+        self._submit("UPDATE sessions SET exported_at = ? WHERE id = ?",
+                     [(exported_at, session_id) for session_id in session_ids])
+
+    def delete_market(self, market_id):
+        self._submit("DELETE FROM odds WHERE market_id = ?", (market_id,))
+        self._submit("DELETE FROM markets WHERE id = ?", (market_id,))
+
+    def clear_session(self, session_id):
+        self._submit("DELETE FROM odds WHERE market_id IN (SELECT id FROM markets WHERE session_id = ?)", (session_id,))
+        self._submit("DELETE FROM markets WHERE session_id = ?", (session_id,))
+
+    def _write_odds(self, market_id, record):
+        if len(record):
+            self._submit(
+                "INSERT INTO odds (market_id, position, option_id, option, value, confidence) VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (market_id, i, record.option_ids[i], record.labels[i],
+                     _nullable(record.values[i]), _nullable(record.confidences[i]))
+                    for i in range(len(record))
+                ],
+            )
+
+    def _touch(self, session_id):
+        self._submit("UPDATE sessions SET updated_at = ? WHERE id = ?", (time.time(), session_id))
+
+    def _query(self, sql, params=()):
+        with self._read_lock:
+            return self._reader.execute(sql, params).fetchall()
+
+    SESSION_COLUMNS = ("id", "teams", "score_text", "full_time_score", "first_half_score", "started_at", "updated_at",
+                       "exported_at")
+
+    def latest_session(self):
+        rows = self._query(
+            f"SELECT {', '.join(self.SESSION_COLUMNS)} FROM sessions ORDER BY updated_at DESC, id DESC LIMIT 1"
+        )
+        return dict(zip(self.SESSION_COLUMNS, rows[0])) if rows else None
+
+    def session(self, session_id):
+        rows = self._query(f"SELECT {', '.join(self.SESSION_COLUMNS)} FROM sessions WHERE id = ?", (session_id,))
+        return dict(zip(self.SESSION_COLUMNS, rows[0])) if rows else None
+
+    def session_ids_since(self, timestamp):
+        rows = self._query("SELECT id FROM sessions WHERE started_at >= ? ORDER BY started_at, id", (timestamp,))
+        return [row[0] for row in rows]
+
+    def markets(self, session_id):
+        rows = self._query(
+            "SELECT id, row_no, header_id, header, frame_id, latency_ms "
+            "FROM markets WHERE session_id = ? ORDER BY row_no, id",
+            (session_id,),
+        )
+        records = self._records(session_id)
+        keys = ("id", "row_no", "header_id", "header", "frame_id", "latency_ms")
+        markets = []
+        for row in rows:
+            market = dict(zip(keys, row))
+            record = records.get(market["id"])
+            if record is None:
+                record = OddsRecord(market["header_id"], market["header"], frame_id=market["frame_id"])
+            market["record"] = record
+            markets.append(market)
+        return markets
+
+    def session_records(self, session_id):
+        return [market["record"] for market in self.markets(session_id)]
+
+    def _records(self, session_id):
+        rows = self._query(
+            "SELECT m.id, m.header_id, m.header, m.frame_id, o.option_id, o.option, o.value, o.confidence "
+            "FROM markets m JOIN odds o ON o.market_id = m.id "
+            "WHERE m.session_id = ? ORDER BY m.id, o.position",
+            (session_id,),
+        )
+        records = {}
+        for market_id, header_id, header, frame_id, option_id, option, value, confidence in rows:
+            record = records.get(market_id)
+            if record is None:
+                record = records[market_id] = [header_id, header, frame_id, array('h'), [], array('d'), array('f')]
+            record[3].append(option_id)
+            record[4].append(option)
+            record[5].append(_missing(value))
+            record[6].append(_missing(confidence))
+        return {
+            market_id: OddsRecord(header_id, header, option_ids, labels, values, confidences, frame_id)
+            for market_id, (header_id, header, frame_id, option_ids, labels, values, confidences) in records.items()
+        }
+
+
+def _nullable(value):
+    # NaN marks a missing read in records, NULL in the database
+    return None if value is None or value != value else value
+
+
+def _missing(value):
+    return float("nan") if value is None else value
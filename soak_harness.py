@@ -0,0 +1,286 @@
+import argparse
+import glob
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import cv2
+import numpy as np
+import app_config
+from app_logging import get_logger, setup_logging, shutdown_logging
+from memory_budget import MB, process_rss
+
+log = get_logger("soak_harness")
+
+CAPTURE_INTERVAL = 0.1
+
+
+def load_frames(frame_dir, limit=None):
+    # recorded ROI captures, replayed in file name order
+    paths = sorted(glob.glob(os.path.join(frame_dir, "*.png")))[:limit]
+    frames = []
+    for path in paths:
+        image = cv2.imread(path, cv2.IMREAD_UNCHANGED)
+        if image is None:
+            continue
+        if image.ndim == 2:
+            image = cv2.cvtColor(image, cv2.COLOR_GRAY2BGRA)
+        elif image.shape[2] == 3:
+            image = cv2.cvtColor(image, cv2.COLOR_BGR2BGRA)
+        frames.append(image)
+    return frames
+
+
+def scroll_frames(page, height, step=120):
+    # synthetic session: a ROI-sized window scrolled down a tall page screenshot
+    page = cv2.cvtColor(page, cv2.COLOR_BGR2BGRA) if page.shape[2] == 3 else page
+    tops = list(range(0, max(1, page.shape[0] - height + 1), step))
+    return [np.ascontiguousarray(page[top:top + height]) for top in tops]
+
+
+def feed(app, frames, hold, speedup, stop, counters):
+    # every frame is shown `hold` times so the scroll detector sees it settle, like a user pausing on it
+    interval = CAPTURE_INTERVAL / speedup
+    while not stop.is_set():
+        for frame in frames:
+            for _ in range(hold):
+                if stop.is_set():
+                    return
+                started = time.perf_counter()
+                app.process_captured_frame(frame.copy(), app.frame_clock.next_trace(), started)
+                counters["frames"] += 1
+                time.sleep(max(0.0, interval - (time.perf_counter() - started)))
+        counters["loops"] += 1
+
+
+def take_sample(app, started, counters, previous):
+    now = time.perf_counter()
+    ocr = next(stage.stats for stage in app.pipeline.stages if stage.name == "ocr")
+    match = next(stage.stats for stage in app.pipeline.stages if stage.name == "match")
+    sample = {
+        "t": now - started,
+        "frames": counters["frames"],
+        "loops": counters["loops"],
+        "processed": match.items,
+        "ocr_busy": ocr.busy,
+        "ocr_items": ocr.items,
+        "rss_mb": process_rss() / MB,
+        "threads": threading.active_count(),
+        "hash_values": len(app.hash_values),
+        "orphan_blocks": len(app.orphan_blocks),
+        "row_records": len(app.row_records),
+        "pending_rows": len(app.pending_rows),
+        "result_queue": app.result_image_queue.qsize(),
+        "pipeline_queues": sum(app.pipeline.queue_sizes().values()),
+        "pipeline_mb": app.memory.usage("pipeline") / MB,
+    }
+    dt = sample["t"] - previous["t"] if previous else sample["t"]
+    if previous and dt > 0:
+        sample["fps"] = (sample["processed"] - previous["processed"]) / dt
+        items = sample["ocr_items"] - previous["ocr_items"]
+        sample["ocr_ms"] = (sample["ocr_busy"] - previous["ocr_busy"]) * 1000.0 / items if items else None
+    else:
+        sample["fps"] = None
+        sample["ocr_ms"] = None
+    return sample
+
+
+def slope_per_hour(samples, key):
+    points = [(s["t"], s[key]) for s in samples if s.get(key) is not None]
+    if len(points) < 3:
+        return 0.0
+    t, v = np.array(points, dtype=np.float64).T
+    if np.ptp(t) == 0:
+        return 0.0
+    return float(np.polyfit(t / 3600.0, v, 1)[0])
+
+
+def window_mean(samples, key, start, end):
+    values = [s[key] for s in samples[start:end] if s.get(key) is not None]
+    return float(np.mean(values)) if values else None
+
+
+def drift_report(samples, warmup, limits):
+    # compares the first and last quarter after warm-up; a replay repeats itself, so anything that keeps growing leaks
+    measured = [s for s in samples if s["t"] >= warmup]
+    report = {"samples": len(measured), "flags": [], "metrics": {}}
+    if len(measured) < 8:
+        report["flags"].append("too few samples after warm-up for a drift verdict")
+        return report
+
+    quarter = len(measured) // 4
+    keys = ("fps", "ocr_ms", "rss_mb", "threads", "hash_values", "orphan_blocks", "row_records",
+            "pending_rows", "result_queue", "pipeline_queues", "pipeline_mb")
+    for key in keys:
+        first = window_mean(measured, key, 0, quarter)
+        last = window_mean(measured, key, -quarter, None)
+        report["metrics"][key] = {"first": first, "last": last, "per_hour": slope_per_hour(measured, key)}
+
+    metrics = report["metrics"]
+
+    def change(key):
+        first, last = metrics[key]["first"], metrics[key]["last"]
+        if first is None or last is None or first == 0:
+            return 0.0
+        return (last - first) / first
+
+    if change("fps") < -limits["max_fps_drop"]:
+        report["flags"].append(f"throughput dropped {-change('fps') * 100:.0f}%")
+    if change("ocr_ms") > limits["max_latency_growth"]:
+        report["flags"].append(f"OCR latency grew {change('ocr_ms') * 100:.0f}%")
+    if metrics["rss_mb"]["per_hour"] > limits["max_rss_mb_per_hour"]:
+        report["flags"].append(f"RSS grows {metrics['rss_mb']['per_hour']:.1f} MB/h")
+    if metrics["threads"]["last"] > metrics["threads"]["first"] + 1:
+        report["flags"].append(f"thread count grew from {metrics['threads']['first']:.0f} "
+                               f"to {metrics['threads']['last']:.0f}")
+    for key in ("hash_values", "row_records", "orphan_blocks"):
+        if metrics[key]["last"] > metrics[key]["first"] * 1.05 + 1:
+            report["flags"].append(f"{key} keeps growing ({metrics[key]['first']:.0f} -> {metrics[key]['last']:.0f})")
+    for key in ("pending_rows", "pipeline_queues", "result_queue", "pipeline_mb"):
+        if metrics[key]["last"] > metrics[key]["first"] + 1:
+            report["flags"].append(f"{key} backs up ({metrics[key]['first']:.1f} -> {metrics[key]['last']:.1f})")
+    return report
+
+
+def configure(args, work_dir):
+    # keep the soak run away from the user's session database and exports
+    config = app_config.get_config()
+    config.update(
+        session_db=os.path.join(work_dir, "soak.db"),
+        export_dir=os.path.join(work_dir, "exports"),
+        columnar_export=False,
+        record_crops=False,
+        llm_cache=os.path.join(work_dir, "llm_cache.json"),
+        memory_report_seconds=args.sample_seconds * 10,
+    )
+
+
+def run(args):
+    if args.frames:
+        frames = load_frames(args.frames, args.limit)
+    else:
+        page = cv2.imread(args.page, cv2.IMREAD_COLOR)
+        frames = scroll_frames(page, args.roi_height, args.step) if page is not None else []
+    if not frames:
+        print("No frames to replay, pass --frames with ROI screenshots or --page with a page screenshot")
+        return 1
+    logo = cv2.imread(args.logo, cv2.IMREAD_COLOR)
+    if logo is None:
+        print(f"Cannot read logo {args.logo}")
+        return 1
+
+    work_dir = tempfile.mkdtemp(prefix="soak_")
+    configure(args, work_dir)
+
+    import ttkbootstrap as tb
+    from main import MainUI
+
+    root = tb.Window()
+    root.withdraw()
+    app = MainUI(root)
+    with open(args.headers, "r", encoding="utf-8") as file:
+        app.apply_headers(json.load(file))
+    app.set_logo(logo)
+    height, width = frames[0].shape[:2]
+    app.roi_coordinates = {"x1": 0, "y1": 0, "x2": width, "y2": height, "width": width, "height": height}
+
+    stop = threading.Event()
+    counters = {"frames": 0, "loops": 0}
+    samples = []
+    started = time.perf_counter()
+    deadline = started + args.minutes * 60
+
+    def sample_loop():
+        previous = None
+        while not stop.wait(args.sample_seconds):
+            previous = take_sample(app, started, counters, previous)
+            samples.append(previous)
+            log.info("soak t=%.0fs fps=%s rss=%.0fMB threads=%d hashes=%d queues=%d",
+                     previous["t"], f"{previous['fps']:.2f}" if previous["fps"] is not None else "-",
+                     previous["rss_mb"], previous["threads"], previous["hash_values"], previous["pipeline_queues"])
+            if time.perf_counter() >= deadline:
+                stop.set()
+                root.after(0, finish)
+
+    def finish():
+        app._shutdown = True
+        app.pipeline.stop()
+        app._flush_pending_rows()
+        app.llm_resolver.close()
+        app.store.close()
+        root.destroy()
+
+    # models load before the clock starts, the warm-up is not what a soak run measures
+    app._ocr_warmup()
+    threading.Thread(target=feed, args=(app, frames, args.hold, args.speedup, stop, counters),
+                     name="SoakFeed", daemon=True).start()
+    threading.Thread(target=sample_loop, name="SoakSample", daemon=True).start()
+    root.mainloop()
+
+    limits = {
+        "max_fps_drop": args.max_fps_drop,
+        "max_latency_growth": args.max_latency_growth,
+        "max_rss_mb_per_hour": args.max_rss_mb_per_hour,
+    }
+    report = drift_report(samples, args.warmup_seconds, limits)
+    report.update(
+        frames=len(frames),
+        loops=counters["loops"],
+        frames_fed=counters["frames"],
+        minutes=args.minutes,
+        speedup=args.speedup,
+        pipeline=app.pipeline.summary(),
+        memory=app.memory.summary(),
+    )
+    with open(args.report, "w", encoding="utf-8") as file:
+        json.dump({"report": report, "samples": samples}, file, indent=2)
+
+    for key, metric in report["metrics"].items():
+        first = "-" if metric["first"] is None else f"{metric['first']:.2f}"
+        last = "-" if metric["last"] is None else f"{metric['last']:.2f}"
+        print(f"{key:<16} first {first:>10}  last {last:>10}  {metric['per_hour']:+.2f}/h")
+    print(report["pipeline"])
+    print(report["memory"])
+    if report["flags"]:
+        print("DRIFT: " + "; ".join(report["flags"]))
+    else:
+        print("no drift detected")
+    print(f"report written to {args.report}")
+    return 2 if report["flags"] else 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Replay frames through the scraper for hours and report drift")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--frames", help="directory of recorded ROI screenshots (*.png)")
+    source.add_argument("--page", help="tall page screenshot to scroll through synthetically")
+    parser.add_argument("--roi-height", type=int, default=1000)
+    parser.add_argument("--step", type=int, default=120)
+    parser.add_argument("--logo", required=True, help="logo crop used to find the blocks")
+    parser.add_argument("--headers", default=app_config.app_path("header_lib.json"))
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--minutes", type=float, default=120)
+    parser.add_argument("--speedup", type=float, default=1.0, help="capture loop speed relative to real time")
+    parser.add_argument("--hold", type=int, default=3, help="captures per frame, so it settles")
+    parser.add_argument("--sample-seconds", type=float, default=30)
+    parser.add_argument("--warmup-seconds", type=float, default=300)
+    parser.add_argument("--max-fps-drop", type=float, default=0.10)
+    parser.add_argument("--max-latency-growth", type=float, default=0.20)
+    parser.add_argument("--max-rss-mb-per-hour", type=float, default=20.0)
+    parser.add_argument("--report", default="soak_report.json")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    setup_logging()
+    try:
+        return run(args)
+    finally:
+        shutdown_logging()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,42 @@
+import logging
+from app_logging import RateLimitFilter
+
+
+def record(msg, *args, level=logging.INFO):
+    return logging.LogRecord("makcolik.test", level, __file__, 1, msg, args, None)
+
+
+def test_templates_with_args_are_throttled_per_template():
+    rate_limit = RateLimitFilter(interval=60)
+    assert rate_limit.filter(record("Odds read error: %s", "a"))
+    assert not rate_limit.filter(record("Odds read error: %s", "b"))
+    assert rate_limit.filter(record("Header read %r", "a"))
+
+
+def test_info_messages_without_args_pass():
+    rate_limit = RateLimitFilter(interval=60)
+    for i in range(3):
+        assert rate_limit.filter(record(f"frame {i} done"))
+    assert len(rate_limit._last) == 0
+
+
+def test_repeated_errors_are_throttled_and_counted():
+    rate_limit = RateLimitFilter(interval=60, error_interval=60)
+    first = record("Preview update error: %s", "boom", level=logging.ERROR)
+    assert rate_limit.filter(first)
+    for _ in range(4):
+        assert not rate_limit.filter(record("Preview update error: %s", "boom", level=logging.ERROR))
+    assert rate_limit.filter(record("Pipeline busy", level=logging.WARNING))
+    assert not rate_limit.filter(record("Pipeline busy", level=logging.WARNING))
+
+    rate_limit._last = {key: last - 61 for key, last in rate_limit._last.items()}
+    again = record("Preview update error: %s", "boom", level=logging.ERROR)
+    assert rate_limit.filter(again)
+    assert again.getMessage() == "Preview update error: boom [4 similar suppressed]"
+
+
+def test_keys_are_capped():
+    rate_limit = RateLimitFilter(interval=60, max_keys=8)
+    for i in range(100):
+        assert rate_limit.filter(record(f"template {i}: %s", i))
+    assert len(rate_limit._last) <= 8
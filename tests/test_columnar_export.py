@@ -0,0 +1,56 @@
+import sqlite3
+import pytest
+
+pq = pytest.importorskip("pyarrow.parquet")
+
+from columnar_export import ColumnarExporter
+from odds_record import MarketCatalog, build_record
+from session_store import SessionStore
+
+CATALOG = MarketCatalog([{"header": "Maç Sonucu", "options": ["1", "X", "2"]}])
+
+
+def exported_rows(root):
+    return sum(pq.read_table(str(path)).num_rows for path in root.rglob("*.parquet"))
+
+
+def test_session_is_exported_once_across_restarts(tmp_path):
+    db, root = str(tmp_path / "sessions.db"), tmp_path / "matches"
+    store = SessionStore(db)
+    session_id = store.start_session("A - B")
+    store.add_market(session_id, 1, build_record(CATALOG, "Maç Sonucu", ["1", "X", "2"], [2.1, 3.2, 3.4]))
+    exporter = ColumnarExporter(store, CATALOG, str(root))
+    exporter.submit(session_id)
+    exporter.submit(session_id)
+    assert exporter.flush()
+    exporter.close()
+    store.close()
+
+    # restart: the restored session is completed again on close
+    store = SessionStore(db)
+    exporter = ColumnarExporter(store, CATALOG, str(root))
+    exporter.submit(store.latest_session()["id"])
+    assert exporter.flush()
+    exporter.close()
+    assert store.session(session_id)["exported_at"] is not None
+    store.close()
+    assert exported_rows(root) == 1
+
+
+def test_v2_store_is_migrated_not_moved(tmp_path):
+    db = str(tmp_path / "sessions.db")
+    conn = sqlite3.connect(db)
+    conn.executescript(
+        "CREATE TABLE sessions (id INTEGER PRIMARY KEY, teams TEXT NOT NULL DEFAULT '', "
+        "score_text TEXT NOT NULL DEFAULT '', full_time_score TEXT NOT NULL DEFAULT '', "
+        "first_half_score TEXT NOT NULL DEFAULT '', started_at REAL NOT NULL, updated_at REAL NOT NULL);"
+        "INSERT INTO sessions (id, teams, started_at, updated_at) VALUES (7, 'A - B', 1, 1);"
+        "PRAGMA user_version = 2;"
+    )
+    conn.close()
+    store = SessionStore(db)
+    try:
+        assert store.session(7)["teams"] == "A - B"
+        assert store.session(7)["exported_at"] is None
+    finally:
+        store.close()
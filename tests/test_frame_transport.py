@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+from frame_transport import FrameWorkerPool, SharedFramePool
+
+
+def crop_sums(crops, meta=None):
+    # worker target, imported by name in the spawned process
+    return [int(crop.sum()) for crop in crops]
+
+
+def frame(value, shape=(64, 96, 3)):
+    return np.full(shape, value, dtype=np.uint8)
+
+
+def test_worker_reads_crops_and_releases_its_lease():
+    workers = FrameWorkerPool(crop_sums, processes=1, slots=2, slot_bytes=1 << 16)
+    try:
+        image = frame(0)
+        image[10:20, 30:40] = 2
+        rects = [(30, 10, 10, 10), (0, 0, 5, 5)]
+        # one lease for the worker, one kept here: the slot must stay taken after the worker is done
+        descriptor = workers.pool.write(image, rects, meta="first", leases=2)
+        workers.jobs.put(descriptor)
+        assert workers.result(timeout=30) == ("first", [600, 0])
+        assert workers.pool.leased() == 1
+        assert workers.pool.crops(descriptor)[0].sum() == 600
+        workers.pool.release(descriptor)
+        assert workers.pool.leased() == 0
+
+        assert workers.submit(frame(1), [(0, 0, 2, 2)], meta="second")
+        assert workers.result(timeout=30) == ("second", [12])
+        assert workers.pool.leased() == 0
+    finally:
+        workers.close()
+
+
+def test_full_pool_times_out_until_a_slot_is_released():
+    pool = SharedFramePool(slots=2, slot_bytes=1 << 16)
+    try:
+        first = pool.write(frame(1))
+        second = pool.write(frame(2))
+        assert pool.write(frame(3), timeout=0.05) is None
+        assert pool.waits >= 1
+        assert pool.write(np.zeros((1 << 17,), dtype=np.uint8)) is None
+
+        pool.release(first)
+        third = pool.write(frame(3), timeout=0.05)
+        assert third is not None and third.slot == first.slot
+        assert pool.view(second).max() == 2 and pool.view(third).max() == 3
+    finally:
+        pool.close()
+
+
+def test_stale_descriptors_are_rejected():
+    pool = SharedFramePool(slots=1, slot_bytes=1 << 16)
+    try:
+        old = pool.write(frame(1))
+        pool.release(old)
+        new = pool.write(frame(2))
+        assert new.slot == old.slot and new.generation == old.generation + 1
+
+        with pytest.raises(RuntimeError):
+            pool.view(old)
+        with pytest.raises(RuntimeError):
+            pool.retain(old)
+        # releasing a stale descriptor must not drop the new frame's lease
+        pool.release(old)
+        assert pool.leased() == 1
+        assert pool.view(new).max() == 2
+    finally:
+        pool.close()
@@ -0,0 +1,78 @@
+import json
+import os
+from difflib import SequenceMatcher
+import pytest
+
+fuzz = pytest.importorskip("fuzzywuzzy.fuzz")
+process = pytest.importorskip("fuzzywuzzy.process")
+
+from header_matcher import HeaderMatcher, NUMBER_PATTERN
+from ocr_corrections import CorrectionEngine
+
+LIBRARY = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "header_lib.json")
+FOLD = str.maketrans("çÇşŞıİüÜğĞöÖ", "cCsSiIuUgGoO")
+# reads that came back wrong when the keys were split on \W+ instead of going through full_process
+REPORTED = ["2,5 Alt/Ust", "1.Yari 0,5 Alt/Ust", "MaI Sonucu", "eifte Şans", "1ıYarı 2,5 Alt/Üst"]
+
+
+def library_matcher():
+    # built the way apply_headers builds it
+    with open(LIBRARY, "r", encoding="utf-8") as file:
+        data = json.load(file)
+    corrections = CorrectionEngine(data.get("corrections"), learned_path=None)
+    return HeaderMatcher([entry["header"] for entry in data["headers"]], corrector=corrections.apply_folded)
+
+
+def ocr_reads(headers):
+    reads = list(REPORTED)
+    for header in headers:
+        folded = header.translate(FOLD)
+        reads += [header, header.lower(), header.upper(), folded, folded.lower(),
+                  header.replace("ı", "l"), header.replace(" ", ""), header.replace(".", ". "),
+                  header.replace("/", " "), header[1:], header[:-1], "  " + header + " |"]
+        reads += [header[:i] + header[i + 1:] for i in range(len(header))]
+    return reads
+
+
+def reference_match(matcher, extracted_text, threshold=95):
+    # the matcher's candidates, scored per call with fuzz.token_sort_ratio as before the keys were precomputed
+    corrected = matcher.clean(extracted_text)
+    extracted_numbers = tuple(NUMBER_PATTERN.findall(corrected))
+    if extracted_numbers:
+        bucket = matcher.buckets.get(extracted_numbers)
+        if not bucket:
+            return None
+        remaining_text = NUMBER_PATTERN.sub('', corrected).strip()
+        best = process.extractOne(remaining_text, [entry.text for entry in bucket], scorer=fuzz.token_sort_ratio)
+        if best and best[1] >= threshold:
+            return bucket[[entry.text for entry in bucket].index(best[0])].header
+        for entry in bucket:
+            if SequenceMatcher(None, remaining_text, entry.text).ratio() * 100 >= threshold:
+                return entry.header
+
+    normalized = [entry.normalized for entry in matcher.entries]
+    best = process.extractOne(corrected, normalized, scorer=fuzz.token_sort_ratio)
+    if best and best[1] >= threshold:
+        return matcher.entries[normalized.index(best[0])].header
+    for entry in matcher.entries:
+        if SequenceMatcher(None, corrected, entry.text).ratio() * 100 >= threshold:
+            return entry.header
+    return None
+
+
+def test_matches_per_call_token_sort_ratio_on_library():
+    matcher = library_matcher()
+    mismatches = [
+        (read, matcher.match(read), reference_match(matcher, read))
+        for read in ocr_reads(matcher.headers)
+        if matcher.match(read) != reference_match(matcher, read)
+    ]
+    assert mismatches == []
+
+
+def test_reported_reads_still_match():
+    matcher = library_matcher()
+    assert matcher.match("2,5 Alt/Ust") == "2,5 Alt/Üst"
+    assert matcher.match("1.Yari 0,5 Alt/Ust") == "1.Yarı 0,5 Alt/Üst"
+    for read in REPORTED:
+        assert matcher.match(read) is not None
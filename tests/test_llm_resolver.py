@@ -0,0 +1,117 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+import numpy as np
+import pytest
+from llm_resolver import LLMResolver
+
+
+class MockChatServer(HTTPServer):
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), MockChatHandler)
+        self.batches = []
+
+
+class MockChatHandler(BaseHTTPRequestHandler):
+    # answers every odds image with value "1.<n>", n being the image's position in the batch
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        images = [part for part in payload["messages"][0]["content"] if part["type"] == "image_url"]
+        self.server.batches.append(len(images))
+        results = [{"option": "MS1", "value": f"1.{index + 10}"} for index in range(len(images))]
+        body = json.dumps({"choices": [{"message": {"content": json.dumps({"results": results})}}]}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = MockChatServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def crop(seed):
+    return np.full((20, 40, 3), seed, np.uint8)
+
+
+def make_resolver(server, tmp_path, **kwargs):
+    return LLMResolver(
+        api_key="test", base_url=f"http://127.0.0.1:{server.server_port}/v1",
+        cache_path=str(tmp_path / "llm_cache.json"), batch_size=4, linger=0.2, **kwargs
+    )
+
+
+def resolve_all(resolver, crops, timeout=10):
+    results = {}
+    done = threading.Event()
+
+    def callback(index):
+        def on_result(result):
+            results[index] = result
+            if len(results) == len(crops):
+                done.set()
+        return on_result
+
+    for index, image in enumerate(crops):
+        assert resolver.resolve_odds(image, callback(index))
+    assert done.wait(timeout)
+    return results
+
+
+def test_batches_requests_and_caches_results(server, tmp_path):
+    resolver = make_resolver(server, tmp_path)
+    results = resolve_all(resolver, [crop(i) for i in range(6)])
+    assert all(result is not None and result["option"] == "MS1" for result in results.values())
+    assert sorted(server.batches, reverse=True) == [4, 2]
+
+    sent = sum(server.batches)
+    resolve_all(resolver, [crop(i) for i in range(6)])
+    assert sum(server.batches) == sent
+    assert resolver.cache_hits == 6
+    resolver.close()
+
+    # the cache survives a restart
+    reloaded = make_resolver(server, tmp_path)
+    resolve_all(reloaded, [crop(0)])
+    assert sum(server.batches) == sent
+    reloaded.close()
+
+
+def test_cache_hit_callback_runs_without_the_lock(server, tmp_path):
+    resolver = make_resolver(server, tmp_path)
+    resolve_all(resolver, [crop(1)])
+
+    seen = {}
+
+    def callback(result):
+        # a callback that does real work must not block other submitters
+        acquired = resolver._lock.acquire(blocking=False)
+        if acquired:
+            resolver._lock.release()
+        seen["unlocked"] = acquired
+        result["value"] = "changed"
+
+    assert resolver.resolve_odds(crop(1), callback)
+    assert seen["unlocked"]
+    # callbacks get copies, the cached answer stays intact
+    assert resolve_all(resolver, [crop(1)])[0]["value"] != "changed"
+    resolver.close()
+
+
+def test_dispatch_receives_every_callback(server, tmp_path):
+    dispatched = []
+    resolver = make_resolver(server, tmp_path, dispatch=lambda fn: (dispatched.append(fn), fn()))
+    resolve_all(resolver, [crop(i) for i in range(3)])
+    resolve_all(resolver, [crop(0)])
+    assert len(dispatched) == 4
+    resolver.close()
@@ -0,0 +1,28 @@
+import json
+from ocr_corrections import CorrectionEngine
+
+VOCABULARY = ["MS ve Karşılıklı Gol", "MS1 & Var", "MS1 & Yok", "MSX & Var", "MSX & Yok", "MS2 & Var", "MS2 & Yok"]
+
+
+def test_label_edits_are_not_learned(tmp_path):
+    engine = CorrectionEngine(learned_path=str(tmp_path / "learned.json"), vocabulary=VOCABULARY)
+    assert engine.learn("MS1 & Var", "MS2 & Var") == []
+    assert engine.learn("MSX", "MS1") == []
+    assert engine.apply("MS1 & Var") == "MS1 & Var"
+
+
+def test_learned_pairs_replace_whole_tokens_only(tmp_path):
+    engine = CorrectionEngine(learned_path=str(tmp_path / "learned.json"), vocabulary=VOCABULARY)
+    assert engine.learn("MSl & Var", "MS1 & Var") == [("MSl", "MS1")]
+    assert engine.apply("MSl & Var") == "MS1 & Var"
+    assert engine.apply("MSlX & Var") == "MSlX & Var"
+    assert engine.apply_folded("msl & var") == "ms1 & var"
+
+
+def test_vocabulary_disables_stored_label_pairs(tmp_path):
+    path = tmp_path / "learned.json"
+    path.write_text(json.dumps({"MS1": "MS2"}), encoding="utf-8")
+    assert CorrectionEngine(learned_path=str(path)).apply("MS1 & Var") == "MS2 & Var"
+    engine = CorrectionEngine(learned_path=str(path))
+    engine.load(None, VOCABULARY)
+    assert engine.apply("MS1 & Var") == "MS1 & Var"
@@ -0,0 +1,17 @@
+from odds_record import MarketCatalog, build_record
+
+CATALOG = MarketCatalog([
+    {"header": "Çifte Şans", "options": ["1-X", "1-2", "X-2"]},
+    {"header": "Maç Sonucu", "options": ["1", "X", "2"]},
+])
+
+
+def test_unmatched_option_never_takes_a_column():
+    record = build_record(CATALOG, "Maç Sonucu", ["X", "Xx?"], [1.5, 9.9])
+    assert list(record.option_ids) == [1, -1]
+    assert CATALOG.fill_values([None] * 6, [record]) == [None, None, None, None, 1.5, None]
+
+
+def test_values_land_in_their_option_column():
+    record = build_record(CATALOG, "Maç Sonucu", ["2", "1", "X"], [3.4, 2.1, float("nan")])
+    assert CATALOG.fill_values([None] * 6, [record], missing="-") == [None, None, None, 2.1, "-", 3.4]
@@ -0,0 +1,54 @@
+import numpy as np
+from detect_block import BlockDetector
+
+
+def block_image(rows, width=1000, height=None):
+    # rows: [(y, h, [(x, w), ...])] of grey odds cells on a white block, with white "digits" inside each cell
+    height = height or max(y + h for y, h, _ in rows) + 20
+    image = np.full((height, width, 3), 255, dtype=np.uint8)
+    for y, h, cells in rows:
+        for x, w in cells:
+            image[y:y + h, x:x + w] = 228
+            image[y + h // 3:y + 2 * h // 3, x + 10:x + 18] = 255
+            image[y + h // 3:y + 2 * h // 3, x + w - 18:x + w - 10] = 255
+    return image
+
+
+def segment(image, segmenter):
+    detector = BlockDetector(segmenter=segmenter)
+    x_start, thresh = detector.threshold_odds(image)
+    return [block['coordinates'] for block in detector._segment(thresh, x_start)]
+
+
+def expected(rows):
+    return [(x, y, w, h) for y, h, cells in rows for x, w in cells]
+
+
+def test_regular_grid_matches_contours_in_row_major_order():
+    rows = [(10, 40, [(420, 180), (610, 180), (800, 180)]), (60, 40, [(420, 180), (610, 180), (800, 180)])]
+    image = block_image(rows)
+    projection = segment(image, "projection")
+    assert projection == expected(rows)
+    assert sorted(projection) == sorted(segment(image, "contour"))
+
+
+def test_rows_with_different_cell_counts():
+    rows = [
+        (10, 40, [(420, 180), (610, 180), (800, 180)]),
+        (60, 45, [(420, 275), (705, 275)]),
+        (115, 40, [(420, 560)]),
+    ]
+    image = block_image(rows)
+    projection = segment(image, "projection")
+    assert projection == expected(rows)
+    assert sorted(projection) == sorted(segment(image, "contour"))
+
+
+def test_order_is_row_major_and_repeatable():
+    # cells of one row at slightly different heights still come back left to right
+    rows = [(12, 40, [(800, 180)]), (10, 42, [(420, 180)]), (11, 40, [(610, 180)]), (70, 40, [(610, 180), (420, 180)])]
+    image = block_image(rows)
+    first = segment(image, "projection")
+    assert first == segment(image, "projection")
+    assert [cell[0] for cell in first] == [420, 610, 800, 420, 610]
+    assert sorted(first) == sorted(segment(image, "contour"))
@@ -0,0 +1,24 @@
+from odds_record import MarketCatalog, build_record
+from session_store import SessionStore
+
+CATALOG = MarketCatalog([{"header": "Maç Sonucu", "options": ["1", "X", "2"]}])
+
+
+def test_failed_op_does_not_roll_back_its_batch(tmp_path):
+    store = SessionStore(str(tmp_path / "sessions.db"), linger=0.5)
+    try:
+        session_id = store.start_session("A - B")
+        first = store.add_market(session_id, 1, build_record(CATALOG, "Maç Sonucu", ["1", "X", "2"], [2.1, 3.2, 3.4]))
+        # same primary key again: fails inside the same batch as the writes around it
+        store._submit("INSERT INTO markets (id, session_id, row_no, created_at) VALUES (?, ?, ?, ?)",
+                      (first, session_id, 9, 0.0))
+        second = store.add_market(session_id, 2, build_record(CATALOG, "Maç Sonucu", ["1", "2"], [1.5, 5.0]))
+        assert store.flush()
+
+        markets = store.markets(session_id)
+        assert [market["id"] for market in markets] == [first, second]
+        assert [market["row_no"] for market in markets] == [1, 2]
+        assert list(markets[0]["record"].values) == [2.1, 3.2, 3.4]
+        assert len(markets[1]["record"]) == 2
+    finally:
+        store.close()
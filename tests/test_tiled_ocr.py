@@ -0,0 +1,91 @@
+import threading
+import numpy as np
+from tiled_ocr import TiledReader, merge_words
+
+WORDS = [(10, 50 + i * 70, 200, 80 + i * 70, f"line{i}") for i in range(60)] + [(1180, 300, 1380, 330, "abcdefghij")]
+EXPECTED = [f"line{i}" for i in range(4)] + ["abcdefghij"] + [f"line{i}" for i in range(4, 60)]
+# touching odds on one line, around the tiles' core boundary and next to a word crossing a tile edge
+ODDS_LINE = [(700, 4300, 800, 4330, "1.50"), (798, 4300, 900, 4330, "2.30"), (1098, 4300, 1200, 4330, "3.40"),
+             (1198, 4300, 1300, 4330, "4.10")]
+
+
+class FakeOCR:
+    # reads the words visible in a crop; pixel (0, 0) of the crop carries its origin in the page
+    words = WORDS
+
+    def ocr(self, image):
+        h, w = image.shape[:2]
+        y0, x0 = int(image[0, 0, 0]), int(image[0, 0, 1])
+        words = []
+        for a, b, c, d, text in self.words:
+            ca, cb, cc, cd = max(a, x0), max(b, y0), min(c, x0 + w), min(d, y0 + h)
+            if ca < cc and cb < cd:
+                first = int((ca - a) / (c - a) * len(text))
+                last = int(np.ceil((cc - a) / (c - a) * len(text)))
+                box = [[ca - x0, cb - y0], [cc - x0, cb - y0], [cc - x0, cd - y0], [ca - x0, cd - y0]]
+                words.append([box, (text[first:last], 0.99)])
+        return [words]
+
+
+def page(height=4400, width=1600):
+    ys, xs = np.mgrid[0:height, 0:width]
+    return np.stack([ys, xs, xs], -1).astype(np.uint16)
+
+
+class OddsLineOCR(FakeOCR):
+    words = WORDS + ODDS_LINE
+
+
+def read_with_timeout(reader, image, timeout=10, ocr_class=FakeOCR):
+    result = {}
+    thread = threading.Thread(target=lambda: result.update(words=reader.read(image, ocr_class())), daemon=True)
+    thread.start()
+    thread.join(timeout)
+    assert not thread.is_alive(), "tiled read deadlocked"
+    return [text for text, _ in result["words"]]
+
+
+def test_parallel_tiles_match_single_pass():
+    reader = TiledReader(FakeOCR, tile_size=1280, overlap=96, workers=3, memory_mb=1024)
+    assert reader.workers == 3
+    assert read_with_timeout(reader, page()) == EXPECTED
+
+
+def test_single_worker_reads_all_tiles_on_caller_instance():
+    created = []
+    reader = TiledReader(lambda: created.append(1) or FakeOCR(), tile_size=1280, overlap=96, workers=1)
+    assert read_with_timeout(reader, page()) == EXPECTED
+    assert not created
+
+
+def test_memory_cap_reducing_workers_to_one():
+    reader = TiledReader(FakeOCR, tile_size=1280, overlap=96, workers=4, memory_mb=200)
+    assert reader.workers == 1
+    assert read_with_timeout(reader, page()) == EXPECTED
+    # a second read must not wait on instances the first one held
+    assert read_with_timeout(reader, page()) == EXPECTED
+
+
+def test_failing_factory_falls_back_to_caller_instance():
+    def factory():
+        raise RuntimeError("no models")
+
+    reader = TiledReader(factory, tile_size=1280, overlap=96, workers=3)
+    assert read_with_timeout(reader, page()) == EXPECTED
+    assert reader.workers == 1
+
+
+def test_touching_words_are_not_joined():
+    assert [w[4] for w in merge_words([(0, 0, 100, 30, "1.50", .9), (98, 0, 200, 30, "2.30", .9)])] == ["1.50", "2.30"]
+    # from different tiles, but neither box ends on a tile edge
+    tiles = [(0, 0, 1280, 1280), (0, 320, 1280, 1600)]
+    words = [(700, 0, 800, 30, "1.50", .9, tiles[0]), (798, 0, 900, 30, "0.30", .9, tiles[1])]
+    assert [w[4] for w in merge_words(words)] == ["1.50", "0.30"]
+    # the same word cut by tile 0's right edge is joined with its piece from tile 1
+    words = [(1200, 0, 1280, 30, "abcd", .9, tiles[0]), (1250, 0, 1400, 30, "cdefgh", .8, tiles[1])]
+    assert [w[4] for w in merge_words(words)] == ["abcdefgh"]
+
+
+def test_adjacent_odds_on_one_line_stay_separate():
+    reader = TiledReader(OddsLineOCR, tile_size=1280, overlap=96, workers=2)
+    assert read_with_timeout(reader, page(), ocr_class=OddsLineOCR) == EXPECTED + ["1.50", "2.30", "3.40", "4.10"]
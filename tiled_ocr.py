@@ -0,0 +1,179 @@
+import math
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from app_logging import get_logger
+
+log = get_logger("tiled_ocr")
+
+# rough peak of the DB detector per input pixel (input tensor plus backbone and FPN feature maps)
+DET_BYTES_PER_PIXEL = 80
+# a box edge this close to its tile's edge was cut by it
+SEAM_TOLERANCE = 2
+
+
+def tile_starts(length, tile, overlap):
+    if length <= tile:
+        return [0]
+    step = max(1, tile - overlap)
+    starts = list(range(0, length - tile, step))
+    starts.append(length - tile)
+    return starts
+
+
+def tile_spans(length, tile, overlap):
+    # (start, end, core_start, core_end); cores split each overlap in the middle, so they cover the length once
+    # even where the last tile is pulled back and overlaps its neighbour by more than overlap
+    starts = tile_starts(length, tile, overlap)
+    ends = [min(length, start + tile) for start in starts]
+    spans = []
+    for i, (start, end) in enumerate(zip(starts, ends)):
+        core_start = (start + ends[i - 1]) // 2 if i > 0 else 0
+        core_end = (starts[i + 1] + end) // 2 if i + 1 < len(starts) else length
+        spans.append((start, end, core_start, core_end))
+    return spans
+
+
+def tile_grid(height, width, tile, overlap):
+    # (y0, x0, y1, x1) of each tile plus its core, the part a box centre must fall in for the tile to own it
+    tiles = []
+    for y0, y1, core_y0, core_y1 in tile_spans(height, tile, overlap):
+        for x0, x1, core_x0, core_x1 in tile_spans(width, tile, overlap):
+            tiles.append(((y0, x0, y1, x1), (core_y0, core_x0, core_y1, core_x1)))
+    return tiles
+
+
+def box_bounds(box):
+    points = np.asarray(box, dtype=np.float32)
+    return points[:, 0].min(), points[:, 1].min(), points[:, 0].max(), points[:, 1].max()
+
+
+def merge_text(left, right):
+    # words cut by a tile edge come back from both tiles with the overlapping characters twice
+    for size in range(min(len(left), len(right)), 0, -1):
+        if left.endswith(right[:size]):
+            return left + right[size:]
+    return left + right
+
+
+def cut_by_seam(word, other):
+    # word ends on an edge of its tile that lies inside other's tile, so part of it was only visible there
+    tile = word[6] if len(word) > 6 else None
+    other_tile = other[6] if len(other) > 6 else None
+    if tile is None or other_tile is None or tile == other_tile:
+        return False
+    cut_right = word[2] >= tile[3] - SEAM_TOLERANCE and other_tile[3] > tile[3]
+    cut_left = word[0] <= tile[1] + SEAM_TOLERANCE and other_tile[1] < tile[1]
+    return cut_right or cut_left
+
+
+def merge_words(words):
+    # words: [(x0, y0, x1, y1, text, score, tile)], tile as (y0, x0, y1, x1) or None;
+    # joins the pieces of one word cut by a vertical tile seam, neighbouring words are never joined
+    words = sorted(words, key=lambda w: (w[1], w[0]))
+    merged = []
+    for word in words:
+        for i, other in enumerate(merged):
+            height = min(word[3] - word[1], other[3] - other[1])
+            same_line = min(word[3], other[3]) - max(word[1], other[1]) > 0.5 * height
+            touching = word[0] <= other[2] and other[0] <= word[2]
+            if same_line and touching and (cut_by_seam(word, other) or cut_by_seam(other, word)):
+                left, right = (other, word) if other[0] <= word[0] else (word, other)
+                # the joined word spans both tiles, so a further seam beyond either is still recognised
+                tile = (min(word[6][0], other[6][0]), min(word[6][1], other[6][1]),
+                        max(word[6][2], other[6][2]), max(word[6][3], other[6][3]))
+                merged[i] = (
+                    min(word[0], other[0]), min(word[1], other[1]), max(word[2], other[2]), max(word[3], other[3]),
+                    merge_text(left[4], right[4]), min(word[5], other[5]), tile,
+                )
+                break
+        else:
+            merged.append(word)
+    return merged
+
+
+def reading_order(words):
+    # same ordering as PaddleOCR's sorted_boxes: top to bottom, left to right within a 10 px line
+    words = sorted(words, key=lambda w: (w[1], w[0]))
+    for i in range(len(words) - 1):
+        for j in range(i, -1, -1):
+            if abs(words[j + 1][1] - words[j][1]) < 10 and words[j + 1][0] < words[j][0]:
+                words[j], words[j + 1] = words[j + 1], words[j]
+            else:
+                break
+    return words
+
+
+class TiledReader:
+    def __init__(self, ocr_factory, tile_size=1280, overlap=96, workers=2, memory_mb=1024):
+        self.ocr_factory = ocr_factory
+        self.overlap = overlap
+        self.memory_mb = memory_mb
+        # one tile's detector must fit the cap on its own
+        max_side = int(math.sqrt(memory_mb * 1024 * 1024 / DET_BYTES_PER_PIXEL))
+        self.tile_size = max(2 * overlap + 32, min(tile_size, max_side))
+        tile_mb = self.tile_size * self.tile_size * DET_BYTES_PER_PIXEL / (1024 * 1024)
+        self.workers = max(1, min(workers, int(memory_mb // max(tile_mb, 1))))
+        self._extra = []
+        self._lock = threading.Lock()
+        self._executor = None
+        if self.workers > 1:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers - 1, thread_name_prefix="OCRTile")
+        if self.tile_size < tile_size:
+            log.info("Tile size lowered to %d px to stay under %d MB", self.tile_size, memory_mb)
+
+    def needs_tiling(self, image):
+        return max(image.shape[:2]) > self.tile_size
+
+    def _extra_instances(self):
+        # the caller's instance covers one worker, the others get their own; a failed load leaves fewer workers
+        while len(self._extra) < self.workers - 1:
+            try:
+                self._extra.append(self.ocr_factory())
+            except Exception as e:
+                log.error("Extra OCR instance for tiles failed, using %d: %s", len(self._extra) + 1, e)
+                self.workers = len(self._extra) + 1
+                break
+        return list(self._extra)
+
+    def _read_tile(self, ocr, image, tile, core):
+        y0, x0, y1, x1 = tile
+        result = ocr.ocr(image[y0:y1, x0:x1])
+        words = []
+        for line in result or []:
+            for word_info in line or []:
+                if len(word_info) < 2 or not word_info[1]:
+                    continue
+                bx0, by0, bx1, by1 = box_bounds(word_info[0])
+                bx0, by0, bx1, by1 = bx0 + x0, by0 + y0, bx1 + x0, by1 + y0
+                cx, cy = (bx0 + bx1) / 2, (by0 + by1) / 2
+                if core[0] <= cy < core[2] and core[1] <= cx < core[3]:
+                    score = word_info[1][1] if len(word_info[1]) >= 2 else 0.0
+                    words.append((bx0, by0, bx1, by1, word_info[1][0], float(score), tile))
+        return words
+
+    def _read_tiles(self, ocr, image, tiles):
+        words = []
+        for tile, core in tiles:
+            words.extend(self._read_tile(ocr, image, tile, core))
+        return words
+
+    def read(self, image, ocr):
+        # [(text, score)] in reading order, like a single ocr.ocr() call on the whole image
+        height, width = image.shape[:2]
+        tiles = tile_grid(height, width, self.tile_size, self.overlap)
+
+        # one reader at a time owns the extra instances, so none is ever waited for
+        with self._lock:
+            instances = [ocr] + self._extra_instances()[:max(0, len(tiles) - 1)]
+            # each instance reads its own share of the tiles one after another; the caller's runs on this thread
+            shares = [tiles[i::len(instances)] for i in range(len(instances))]
+            futures = [
+                self._executor.submit(self._read_tiles, instance, image, share)
+                for instance, share in zip(instances[1:], shares[1:])
+            ]
+            words = self._read_tiles(ocr, image, shares[0])
+            for future in futures:
+                words.extend(future.result())
+
+        return [(word[4], word[5]) for word in reading_order(merge_words(words))]
@@ -0,0 +1,202 @@
+from tkinter import ttk
+
+
+class VirtualTable:
+    def __init__(self, parent, columns, row_height=None):
+        self.columns = tuple(columns)
+        self.tree = ttk.Treeview(parent, columns=self.columns, show="headings", selectmode="extended")
+        self.v_scrollbar = ttk.Scrollbar(parent, orient="vertical", command=self._on_scrollbar)
+
+        self._keys = []
+        self._index = {}
+        self._values = {}
+        self._offset = 0
+        self._slots = []
+        self._slot_keys = {}
+        # selected keys, kept across scrolling; _focus is the row Up/Down move from
+        self._selected = {}
+        self._focus = None
+        self._applied = frozenset()
+        self._extend = False
+        self._row_height = row_height or self._style_row_height()
+
+        self.tree.bind("<Configure>", self._on_configure)
+        self.tree.bind("<MouseWheel>", self._on_mousewheel)
+        self.tree.bind("<Button-4>", lambda e: self.scroll(-3))
+        self.tree.bind("<Button-5>", lambda e: self.scroll(3))
+        self.tree.bind("<Up>", lambda e: self._move_selection(-1))
+        self.tree.bind("<Down>", lambda e: self._move_selection(1))
+        self.tree.bind("<Prior>", lambda e: self.scroll(-len(self._slots)) or "break")
+        self.tree.bind("<Next>", lambda e: self.scroll(len(self._slots)) or "break")
+        self.tree.bind("<ButtonPress-1>", self._on_press, add="+")
+        self.tree.bind("<<TreeviewSelect>>", self._on_select)
+
+    def _style_row_height(self):
+        try:
+            return int(ttk.Style().lookup("Treeview", "rowheight")) or 20
+        except (ValueError, TypeError):
+            return 20
+
+    def __len__(self):
+        return len(self._keys)
+
+    def keys(self):
+        return list(self._keys)
+
+    def values(self, key):
+        return self._values.get(key)
+
+    def append_rows(self, rows):
+        at_end = self._offset + len(self._slots) >= len(self._keys)
+        for key, values in rows:
+            if key in self._index:
+                self._values[key] = tuple(values)
+                continue
+            self._index[key] = len(self._keys)
+            self._keys.append(key)
+            self._values[key] = tuple(values)
+        if at_end:
+            self._offset = max(0, len(self._keys) - len(self._slots))
+        self._render()
+
+    def update_row(self, key, values):
+        if key not in self._values:
+            return
+        self._values[key] = tuple(values)
+        for slot, slot_key in self._slot_keys.items():
+            if slot_key == key:
+                self.tree.item(slot, values=self._values[key])
+                break
+
+    def delete_rows(self, keys):
+        keys = set(keys)
+        if not keys:
+            return
+        self._keys = [key for key in self._keys if key not in keys]
+        self._index = {key: i for i, key in enumerate(self._keys)}
+        for key in keys:
+            self._values.pop(key, None)
+            self._selected.pop(key, None)
+        if self._focus in keys:
+            self._focus = None
+        self._render()
+
+    def clear(self):
+        self._keys = []
+        self._index = {}
+        self._values = {}
+        self._offset = 0
+        self._selected = {}
+        self._focus = None
+        self._render()
+
+    def selection(self):
+        # keys in table order, including selected rows scrolled out of view
+        return tuple(sorted(self._selected, key=self._index.get))
+
+    def selection_set(self, key):
+        if key in self._index:
+            self._selected = {key: None}
+            self._focus = key
+            self._render()
+
+    def identify_row(self, y):
+        return self._slot_keys.get(self.tree.identify_row(y))
+
+    def see(self, key):
+        index = self._index.get(key)
+        if index is None:
+            return
+        if index < self._offset:
+            self._offset = index
+        elif index >= self._offset + len(self._slots):
+            self._offset = index - len(self._slots) + 1
+        self._render()
+
+    def see_end(self):
+        if self._keys:
+            self.see(self._keys[-1])
+
+    def scroll(self, rows):
+        self._offset += rows
+        self._render()
+
+    def _on_scrollbar(self, *args):
+        if args[0] == "moveto":
+            self._offset = int(round(float(args[1]) * len(self._keys)))
+        elif args[0] == "scroll":
+            step = int(args[1])
+            self._offset += step * (len(self._slots) if args[2] == "pages" else 1)
+        self._render()
+
+    def _on_mousewheel(self, event):
+        self.scroll(-3 if event.delta > 0 else 3)
+        return "break"
+
+    def _move_selection(self, step):
+        if not self._keys:
+            return "break"
+        index = self._index.get(self._focus, -1 if step > 0 else len(self._keys))
+        index = max(0, min(len(self._keys) - 1, index + step))
+        self._focus = self._keys[index]
+        self._selected = {self._focus: None}
+        self.see(self._focus)
+        return "break"
+
+    def _on_press(self, event):
+        # Shift or Control adds to the selection, so rows selected off screen stay selected
+        self._extend = bool(event.state & 0x0005)
+
+    def _on_select(self, event):
+        # the event also arrives after _render re-applied the selection; only a change by the user is taken
+        selected = self.tree.selection()
+        if frozenset(selected) == self._applied:
+            return
+        visible = set(self._slot_keys.values())
+        kept = {key: None for key in self._selected if key not in visible} if self._extend else {}
+        kept.update((self._slot_keys[slot], None) for slot in selected if slot in self._slot_keys)
+        self._selected = kept
+        self._applied = frozenset(selected)
+        self._extend = False
+        focus = self._slot_keys.get(self.tree.focus())
+        if focus in kept:
+            self._focus = focus
+
+    def _on_configure(self, event):
+        count = max(1, (event.height - self._row_height) // self._row_height)
+        if count != len(self._slots):
+            while len(self._slots) < count:
+                self._slots.append(self.tree.insert("", "end", values=()))
+            while len(self._slots) > count:
+                self.tree.delete(self._slots.pop())
+            self._render()
+
+    def _render(self):
+        visible = len(self._slots)
+        self._offset = max(0, min(self._offset, len(self._keys) - visible))
+        self._slot_keys = {}
+        selected_slots = []
+
+        for i, slot in enumerate(self._slots):
+            index = self._offset + i
+            if index < len(self._keys):
+                key = self._keys[index]
+                self._slot_keys[slot] = key
+                self.tree.item(slot, values=self._values[key])
+                if key in self._selected:
+                    selected_slots.append(slot)
+            else:
+                self.tree.item(slot, values=())
+
+        current = self.tree.selection()
+        if not selected_slots and current:
+            self.tree.selection_remove(current)
+        elif selected_slots and set(current) != set(selected_slots):
+            self.tree.selection_set(selected_slots)
+        self._applied = frozenset(selected_slots)
+
+        total = len(self._keys)
+        if total <= visible:
+            self.v_scrollbar.set(0.0, 1.0)
+        else:
+            self.v_scrollbar.set(self._offset / total, (self._offset + visible) / total)